@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Benchmark the collector's hot paths and flag regressions against a stored baseline.
+
+Benchmarks (parametrised over ``--resolutions`` and ``--qualities``):
+- compress_image : edge_data_collector.camera.utils.compress_image
+- encode_image   : Base64 JPEG re-encode of a captured frame
+- format_data    : full payload construction (encode + metadata)
+- json_dumps     : serialisation of a full payload
+- mqtt_publish   : MqttHandler.publish_async to a local broker stand-in,
+                   timed until sent (QoS 0) or acknowledged (QoS 1)
+- video_seek     : VideoHandler.capture_frame_at at random timestamps
+
+Inputs are synthetic frames with a fixed seed, so runs are reproducible.
+Every case runs in a fresh interpreter, so its peak RSS is its own. Reported
+per case: throughput (ops/s), mean/p50/p99 latency (ms) and peak RSS (MiB).
+
+    python benchmark.py                              # run and compare to the baseline
+    python benchmark.py --save-baseline              # store results as the new baseline
+    python benchmark.py -k encode --resolutions 1920x1080 --qualities 75
+
+Baselines are per host (benchmarks/baselines/<hostname>.json by default). A
+case regresses when its p50 latency or throughput is worse than the baseline
+by more than --tolerance, or its peak RSS by more than --rss-tolerance; the
+exit status is 1 when any case regressed.
+"""
+
+import argparse
+import contextlib
+import gc
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DEFAULT_RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080))
+DEFAULT_QUALITIES = (50, 75, 85)
+DEFAULT_QOS = (0, 1)
+BASELINE_DIR = Path("benchmarks/baselines")
+
+SENSOR_DATA = {"temperature": 21.5, "humidity": 48.0, "pressure": 1008.2}
+METADATA = {
+    "camera_id": "camera_01",
+    "location": {"latitude": 55.3676, "longitude": 10.4285},
+    "motion": "slow",
+    "collector_capture_ts": 1718000000.0,
+    "frame_id": "camera_01-1718000000000",
+    "session_id": "benchmark",
+    "seq": 1,
+}
+
+# Parameters each benchmark is parametrised over
+BENCHMARK_PARAMS = {
+    "compress_image": ("resolution", "quality"),
+    "encode_image": ("resolution", "quality"),
+    "format_data": ("resolution", "quality"),
+    "json_dumps": ("resolution", "quality"),
+    "mqtt_publish": ("resolution", "qos"),
+    "video_seek": ("resolution",),
+}
+
+
+def parse_resolution(value):
+    """
+    Parse ``WIDTHxHEIGHT``.
+    Args:
+        value (str): Resolution such as ``1280x720``.
+    Returns:
+        tuple[int, int]: ``(width, height)``.
+    """
+    try:
+        width, height = (int(side) for side in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid resolution {value!r}; expected WIDTHxHEIGHT")
+    return width, height
+
+
+def case_id(case):
+    """
+    Args:
+        case (dict): Benchmark name and its parameter values.
+    Returns:
+        str: Stable identifier such as ``encode_image[1280x720,q85]``.
+    """
+    parts = []
+    for name in BENCHMARK_PARAMS[case["benchmark"]]:
+        value = case[name]
+        if name == "resolution":
+            parts.append(f"{value[0]}x{value[1]}")
+        elif name == "quality":
+            parts.append(f"q{value}")
+        else:
+            parts.append(f"{name}{value}")
+    return f"{case['benchmark']}[{','.join(parts)}]"
+
+
+def build_cases(benchmarks, resolutions, qualities, qos_levels, keyword=None):
+    """
+    Expand each benchmark over the parameters it depends on.
+    Args:
+        benchmarks (list[str]): Benchmark names (keys of ``BENCHMARK_PARAMS``).
+        resolutions (list[tuple[int, int]]): Frame sizes.
+        qualities (list[int]): JPEG qualities.
+        qos_levels (list[int]): MQTT QoS levels.
+        keyword (str | None): Only keep cases whose id contains this text.
+    Returns:
+        list[dict]: Cases holding ``benchmark`` and its parameter values.
+    """
+    values = {"resolution": resolutions, "quality": qualities, "qos": qos_levels}
+    cases = []
+    for benchmark in benchmarks:
+        names = BENCHMARK_PARAMS[benchmark]
+        for combination in itertools.product(*(values[name] for name in names)):
+            case = {"benchmark": benchmark, **dict(zip(names, combination))}
+            if keyword is None or keyword in case_id(case):
+                cases.append(case)
+    return cases
+
+
+# --- Benchmark setups -------------------------------------------------------
+# Each setup prepares its inputs in ``workdir`` (a pathlib.Path), registers
+# cleanups on ``stack`` (a contextlib.ExitStack) and returns the operation to
+# time as a callable taking no arguments.
+
+def _source_frame(workdir, resolution, quality=95):
+    from edge_data_collector.camera.synthetic import SyntheticFrameSource
+
+    path = workdir / f"source_{resolution[0]}x{resolution[1]}.jpg"
+    if not path.exists():
+        SyntheticFrameSource(resolution, profile="water", pool_size=1, quality=quality, seed=0).write(path)
+    return str(path)
+
+
+def setup_compress_image(stack, workdir, resolution, quality):
+    from edge_data_collector.camera.utils import compress_image
+
+    source = _source_frame(workdir, resolution)
+    output = str(workdir / "compressed.jpg")
+    return lambda: compress_image(source, output, quality=quality)
+
+
+def setup_encode_image(stack, workdir, resolution, quality):
+    from edge_data_collector.formatter.data_formatter import encode_image
+
+    source = _source_frame(workdir, resolution)
+    return lambda: encode_image(source, quality=quality)
+
+
+def setup_format_data(stack, workdir, resolution, quality):
+    from edge_data_collector.formatter.data_formatter import format_data
+
+    source = _source_frame(workdir, resolution)
+    return lambda: format_data(source, SENSOR_DATA, METADATA, image_quality=quality)
+
+
+def setup_json_dumps(stack, workdir, resolution, quality):
+    from edge_data_collector.formatter.data_formatter import format_data
+
+    payload = format_data(_source_frame(workdir, resolution), SENSOR_DATA, METADATA, image_quality=quality)
+    return lambda: json.dumps(payload)
+
+
+def setup_mqtt_publish(stack, workdir, resolution, qos):
+    from edge_data_collector.formatter.data_formatter import format_data
+    from edge_data_sender.transmission.broker_stub import MqttBrokerStub
+    from edge_data_sender.transmission.mqtt_handler import MqttHandler
+
+    payload = format_data(_source_frame(workdir, resolution), SENSOR_DATA, METADATA, image_quality=85)
+    broker = stack.enter_context(MqttBrokerStub())
+    handler = MqttHandler(broker.host, broker.port, "benchmark/data", qos=qos, client_id="benchmark")
+    handler.connect()
+    stack.callback(handler.client.loop_stop)
+    stack.callback(handler.client.disconnect)
+    deadline = time.monotonic() + 5.0
+    while not handler.client.is_connected():
+        if time.monotonic() > deadline:
+            raise RuntimeError("Could not connect to the broker stand-in")
+        time.sleep(0.01)
+    return lambda: handler.publish_async(payload).result(timeout=10.0)
+
+
+def setup_video_seek(stack, workdir, resolution):
+    import cv2
+
+    from edge_data_collector.camera.synthetic import SyntheticFrameSource
+    from main_video import VideoHandler
+
+    fps, frames = 10.0, 100
+    video_path = str(workdir / f"video_{resolution[0]}x{resolution[1]}.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), fps, tuple(resolution))
+    source = SyntheticFrameSource(resolution, profile="moving", pool_size=16, seed=0)
+    for _ in range(frames):
+        writer.write(cv2.cvtColor(source.next_array(), cv2.COLOR_RGB2BGR))
+    writer.release()
+
+    frame_folder = workdir / "frames"
+    handler = VideoHandler(video_path, camera_id="benchmark", image_folder=str(frame_folder))
+    stack.callback(handler.close)
+    rng = random.Random(0)
+    sequence = itertools.count(1)
+
+    def seek():
+        frame_path, _ = handler.capture_frame_at(rng.uniform(0, handler.duration_seconds), next(sequence))
+        os.remove(frame_path)
+
+    return seek
+
+
+SETUPS = {
+    "compress_image": setup_compress_image,
+    "encode_image": setup_encode_image,
+    "format_data": setup_format_data,
+    "json_dumps": setup_json_dumps,
+    "mqtt_publish": setup_mqtt_publish,
+    "video_seek": setup_video_seek,
+}
+
+
+# --- Running ----------------------------------------------------------------
+
+def peak_rss_mib():
+    """
+    Returns:
+        float: Peak resident set size of this process in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile of already sorted values.
+    Args:
+        sorted_values (list[float]): Values in ascending order.
+        q (float): Percentile as a fraction, e.g. 0.99.
+    Returns:
+        float: The percentile value.
+    """
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_case(case, iterations, warmup):
+    """
+    Time one case in this process.
+    Args:
+        case (dict): Case from ``build_cases``.
+        iterations (int): Timed iterations.
+        warmup (int): Untimed iterations run first.
+    Returns:
+        dict: Result with ``case``, ``iterations``, ``ops_per_sec``, ``mean_ms``,
+        ``p50_ms``, ``p99_ms`` and ``peak_rss_mib``.
+    """
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as workdir, contextlib.ExitStack() as stack:
+        params = {name: case[name] for name in BENCHMARK_PARAMS[case["benchmark"]]}
+        operation = SETUPS[case["benchmark"]](stack, Path(workdir), **params)
+        for _ in range(warmup):
+            operation()
+        gc.collect()
+        latencies = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "case": case_id(case),
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / total, 2) if total else None,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+def run_isolated(case, iterations, warmup):
+    """Run one case in a fresh interpreter so peak RSS is measured per case (see ``run_case``)."""
+    command = [
+        sys.executable, os.path.abspath(__file__), "--run-case", json.dumps(case),
+        "--iterations", str(iterations), "--warmup", str(warmup),
+    ]
+    env = dict(os.environ, PYTHONHASHSEED="0")
+    completed = subprocess.run(command, capture_output=True, text=True, env=env, cwd=Path(__file__).parent)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{case_id(case)} failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# --- Baselines --------------------------------------------------------------
+
+def default_baseline_path():
+    return BASELINE_DIR / f"{platform.node() or 'default'}.json"
+
+
+def environment():
+    import PIL
+
+    return {
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def load_baseline(path):
+    """
+    Args:
+        path (pathlib.Path): Baseline file.
+    Returns:
+        dict[str, dict]: Stored results by case id (empty if there is no baseline).
+    """
+    if not path.exists():
+        return {}
+    with path.open() as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(path, results):
+    """
+    Merge results into the baseline file, keeping cases not run this time.
+    Args:
+        path (pathlib.Path): Baseline file.
+        results (list[dict]): Results from ``run_case``.
+    """
+    merged = load_baseline(path)
+    merged.update({result["case"]: result for result in results})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as f:
+        json.dump({"environment": environment(), "results": dict(sorted(merged.items()))}, f, indent=2)
+        f.write("\n")
+
+
+def compare(result, baseline, tolerance, rss_tolerance):
+    """
+    Args:
+        result (dict): Result from ``run_case``.
+        baseline (dict | None): Stored result of the same case.
+        tolerance (float): Allowed relative p50/throughput regression.
+        rss_tolerance (float): Allowed relative peak RSS regression.
+    Returns:
+        list[str]: Regressions of ``result`` against ``baseline`` (empty if none).
+    """
+    if not baseline:
+        return []
+    regressions = []
+    if result["p50_ms"] > baseline["p50_ms"] * (1 + tolerance):
+        regressions.append(f"p50 {baseline['p50_ms']} -> {result['p50_ms']} ms")
+    if baseline.get("ops_per_sec") and result["ops_per_sec"] < baseline["ops_per_sec"] * (1 - tolerance):
+        regressions.append(f"throughput {baseline['ops_per_sec']} -> {result['ops_per_sec']} ops/s")
+    if result["peak_rss_mib"] > baseline["peak_rss_mib"] * (1 + rss_tolerance):
+        regressions.append(f"peak RSS {baseline['peak_rss_mib']} -> {result['peak_rss_mib']} MiB")
+    return regressions
+
+
+def format_row(result, baseline, regressions):
+    delta = ""
+    if baseline:
+        delta = f"{(result['p50_ms'] / baseline['p50_ms'] - 1) * 100:+7.1f}%" if baseline["p50_ms"] else ""
+    status = "REGRESSION: " + "; ".join(regressions) if regressions else ""
+    return (
+        f"{result['case']:<34}{result['ops_per_sec']:>10}{result['p50_ms']:>10}{result['p99_ms']:>10}"
+        f"{result['peak_rss_mib']:>9}{delta:>9}  {status}"
+    )
+
+
+def iter_results(cases, iterations, warmup, isolate):
+    for case in cases:
+        yield run_isolated(case, iterations, warmup) if isolate else run_case(case, iterations, warmup)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the collector's hot paths.")
+    parser.add_argument("benchmarks", nargs="*",
+                        help=f"Benchmarks to run (default: all of {', '.join(BENCHMARK_PARAMS)}).")
+    parser.add_argument("-k", dest="keyword", default=None, help="Only run cases whose id contains this text.")
+    parser.add_argument("--resolutions", type=lambda v: [parse_resolution(r) for r in v.split(",")],
+                        default=list(DEFAULT_RESOLUTIONS), help="Comma-separated WIDTHxHEIGHT list.")
+    parser.add_argument("--qualities", type=lambda v: [int(q) for q in v.split(",")],
+                        default=list(DEFAULT_QUALITIES), help="Comma-separated JPEG qualities.")
+    parser.add_argument("--qos", type=lambda v: [int(q) for q in v.split(",")],
+                        default=list(DEFAULT_QOS), help="Comma-separated QoS levels for mqtt_publish.")
+    parser.add_argument("--iterations", type=int, default=30, help="Timed iterations per case.")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed iterations per case.")
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="Baseline file (default: benchmarks/baselines/<hostname>.json).")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed relative p50/throughput regression (default 0.15).")
+    parser.add_argument("--rss-tolerance", type=float, default=0.20,
+                        help="Allowed relative peak RSS regression (default 0.20).")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the results as JSON.")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="Run all cases in this process (faster; peak RSS becomes cumulative).")
+    parser.add_argument("--run-case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case is not None:
+        case = json.loads(args.run_case)
+        if "resolution" in case:
+            case["resolution"] = tuple(case["resolution"])
+        print(json.dumps(run_case(case, args.iterations, args.warmup)))
+        return
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARK_PARAMS]
+    if unknown:
+        parser.error(f"Unknown benchmarks {unknown}; choose from {list(BENCHMARK_PARAMS)}")
+    benchmarks = args.benchmarks or list(BENCHMARK_PARAMS)
+    cases = build_cases(benchmarks, args.resolutions, args.qualities, args.qos, args.keyword)
+    if not cases:
+        parser.error("No benchmark cases selected")
+
+    baseline_path = args.baseline or default_baseline_path()
+    baseline = load_baseline(baseline_path)
+    if baseline:
+        print(f"Comparing against {baseline_path} (tolerance {args.tolerance:.0%}, RSS {args.rss_tolerance:.0%})")
+    else:
+        print(f"No baseline at {baseline_path}; run with --save-baseline to store one")
+    print(f"{'case':<34}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'RSS MiB':>9}{'Δp50':>9}")
+
+    results, regressed = [], []
+    for result in iter_results(cases, args.iterations, args.warmup, isolate=not args.no_isolate):
+        regressions = compare(result, baseline.get(result["case"]), args.tolerance, args.rss_tolerance)
+        print(format_row(result, baseline.get(result["case"]), regressions), flush=True)
+        results.append(result)
+        if regressions:
+            regressed.append(result["case"])
+
+    if args.output:
+        with args.output.open("w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+            f.write("\n")
+    if args.save_baseline:
+        save_baseline(baseline_path, results)
+        print(f"Baseline saved to {baseline_path}")
+    if regressed:
+        print(f"{len(regressed)} case(s) regressed: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
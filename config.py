@@ -17,6 +17,197 @@ else:
     MQTT_BROKER = "192.168.42.10"
 MQTT_PORT = 1883
 MQTT_TOPIC = "sensor/data"
+# QoS for published samples (0 = fire-and-forget, 1 = broker acknowledged) and
+# the number of messages allowed in flight before publishing applies
+# backpressure to the pipeline.
+MQTT_QOS = 0
+MQTT_MAX_INFLIGHT = 10
+
+# Chunked transfer: messages larger than CHUNK_THRESHOLD bytes are split into a
+# manifest plus CHUNK_SIZE-byte chunks published on "<MQTT_TOPIC>/chunked".
+# Consumers reassemble them with edge_data_sender.transmission.chunking.ChunkReassembler.
+CHUNKED_TRANSFER = False
+CHUNK_SIZE = 64 * 1024
+CHUNK_THRESHOLD = 256 * 1024
+
+# MQTT protocol version ("3.1.1" or "5"). With MQTT v5 the collector uses topic
+# aliases when the broker grants them, copies the MQTT_USER_PROPERTIES metadata
+# keys into user properties for routing without parsing the JSON body, and sets
+# a message expiry of MQTT_MESSAGE_EXPIRY seconds (None = never) so the broker
+# discards frames that could not be delivered in time.
+MQTT_PROTOCOL = "3.1.1"
+MQTT_MESSAGE_EXPIRY = None
+MQTT_USER_PROPERTIES = ("camera_id", "motion", "sample_id", "frame_id", "priority")
+
+# Partitioned publishing: with MQTT_PARTITIONS > 0 each frame is published on
+# "<MQTT_TOPIC>/<partition>", where the partition is a stable hash of the
+# frame's MQTT_PARTITION_KEY metadata value (one camera always maps to the same
+# partition, so its frames stay in order). Processing Pi workers pick their
+# partitions with edge_data_sender.transmission.partitioning.subscription_filters.
+MQTT_PARTITIONS = 0
+MQTT_PARTITION_KEY = "camera_id"
+
+# Consumer feedback: Processing Pi/Jetson workers report their queue depth or a
+# desired interval/rate on MQTT_FEEDBACK_TOPIC. Under pressure the collector
+# lengthens the capture interval and lowers JPEG quality and resolution within
+# these bounds, and records what it applied in metadata["feedback"].
+FEEDBACK_ENABLED = False
+MQTT_FEEDBACK_TOPIC = "sensor/feedback"
+FEEDBACK_INTERVAL_BOUNDS = (5.0, 30.0)  # seconds
+FEEDBACK_QUALITY_BOUNDS = (50, 90)
+FEEDBACK_SCALE_BOUNDS = (0.5, 1.0)
+FEEDBACK_QUEUE_DEPTH_BOUNDS = (2, 10)  # consumer queue depth for no / full pressure
+FEEDBACK_STALE_AFTER = 60.0  # seconds before a silent consumer stops counting
+
+# Runtime control: JSON commands on MQTT_CONTROL_TOPIC change interval, quality,
+# resolution, motion hint, publish topic (and the sensor regime in video
+# replay) without a restart. Each command is validated as a whole, applied
+# atomically and acknowledged with a timestamp on MQTT_CONTROL_ACK_TOPIC.
+CONTROL_ENABLED = False
+MQTT_CONTROL_TOPIC = "sensor/control"
+MQTT_CONTROL_ACK_TOPIC = "sensor/control/ack"
+
+# Separate telemetry stream: when enabled, sensor readings are polled every
+# TELEMETRY_INTERVAL seconds and published on MQTT_TELEMETRY_TOPIC over a second
+# connection, so they are never queued behind image messages. Image messages
+# reuse the latest reading and carry its metadata["sample_id"].
+SEPARATE_TELEMETRY = False
+MQTT_TELEMETRY_TOPIC = "sensor/telemetry"
+TELEMETRY_INTERVAL = 60.0
+
+# Compression of messages without image data (telemetry, control acks) with a
+# shared dictionary: None, "zlib" or "zstd" (requires the zstandard package).
+# Train the dictionary from captured messages with train_compression_dictionary.py
+# and give consumers the same file for decompress_payload(). Compressed messages
+# start with the b"EDCZ" header; plain JSON messages are unchanged.
+PAYLOAD_COMPRESSION = None
+COMPRESSION_DICTIONARY_PATH = None
+
+# Sequence numbers: metadata["seq"] counts up per camera and metadata["session_id"]
+# identifies the collector run, so consumers can measure loss, reordering and
+# gaps (edge_data_collector.metadata.sequencing.SequenceLossTracker).
+SEQUENCE_NUMBERS_ENABLED = True
+
+# Per-stage latency trace: monotonic durations in ms of capture, the wait for
+# the main loop, sensor read, format/encode and publish-queue time, attached as
+# metadata["trace"]. Publish-to-ack latency is added locally and a percentile
+# summary is printed every STAGE_TRACE_SUMMARY_INTERVAL seconds and on exit.
+STAGE_TRACE_ENABLED = False
+STAGE_TRACE_SUMMARY_INTERVAL = 60.0
+
+# Logging: level of the collector's log output ("DEBUG" shows per-frame
+# messages), LOG_FORMAT "text" or "json" (one object per line), at most
+# LOG_RATE_LIMIT records per second per call site after a burst of
+# LOG_RATE_BURST (None disables the limit), and LOG_ASYNC to write records
+# from a background thread so slow consoles never block the capture loop.
+LOG_LEVEL = "INFO"
+LOG_FORMAT = "text"
+LOG_RATE_LIMIT = 1.0
+LOG_RATE_BURST = 10
+LOG_ASYNC = False
+
+# Sampling profiler: while enabled, every PROFILER_EVERY-th capture, encode
+# and publish runs under cProfile with tracemalloc snapshots, and a report
+# (hot functions, top allocators, memory growth) is written to
+# PROFILER_OUTPUT_DIR, keeping the newest PROFILER_MAX_REPORTS. With
+# PROFILER_SIGNAL, `kill -USR1 <pid>` switches it on and off at runtime.
+PROFILER_ENABLED = False
+PROFILER_SIGNAL = True
+PROFILER_EVERY = 100
+PROFILER_OUTPUT_DIR = "profiles"
+PROFILER_MAX_REPORTS = 20
+PROFILER_TOP = 25
+
+# Metrics: counters, gauges and latency histograms of capture, sensor reads,
+# formatting, publishing, queue depth, sensor staleness and disk usage.
+# METRICS_HTTP_ENABLED serves them in the Prometheus text format at
+# http://METRICS_HTTP_HOST:METRICS_HTTP_PORT/metrics; STATS_ENABLED publishes a
+# compact snapshot on MQTT_STATS_TOPIC every STATS_INTERVAL seconds.
+METRICS_HTTP_ENABLED = False
+METRICS_HTTP_HOST = "0.0.0.0"
+METRICS_HTTP_PORT = 9108
+STATS_ENABLED = False
+MQTT_STATS_TOPIC = "sensor/stats"
+STATS_INTERVAL = 60.0
+
+# Sensor delta encoding: sensor_data is only sent when a value changes by more
+# than its epsilon, or as a keyframe every SENSOR_KEYFRAME_EVERY messages per
+# camera. Messages carry metadata["sensor_revision"] and ["sensor_keyframe"];
+# consumers rebuild readings with edge_data_collector.sensors.sensor_delta.SensorStateTracker.
+SENSOR_DELTA_ENCODING = False
+SENSOR_DELTA_EPSILON = {"temperature": 0.1, "humidity": 0.5, "pressure": 0.1}
+SENSOR_KEYFRAME_EVERY = 12
+
+# Rolling sensor statistics: baselines and deltas (ΔT/ΔRH/ΔP) of the readings
+# over each window, attached as metadata["sensor_stats"]. The capacity bounds
+# the number of readings kept for the longest window.
+SENSOR_STATS_ENABLED = False
+SENSOR_STATS_WINDOWS = {"10m": 600, "1h": 3600, "6h": 21600}  # name -> seconds
+SENSOR_STATS_CAPACITY = 8192
 
 SIMULATE_IMAGE_CREATION = False
 SIMULATE_SENSOR_DATA = False
+
+# Simulated frames (SIMULATE_IMAGE_CREATION and the mock PiCamera): a pool of
+# pre-rendered JPEGs handed out round robin. Profiles: "static", "moving", "water".
+SIMULATED_IMAGE_RESOLUTION = (1920, 1080)
+SIMULATED_IMAGE_PROFILE = "water"
+SIMULATED_IMAGE_POOL_SIZE = 16
+SIMULATED_IMAGE_QUALITY = 85
+
+# Netatmo API root. Point it at the bundled stub
+# (python -m edge_data_collector.sensors.netatmo_stub) to exercise the token
+# refresh, retry and parsing paths offline. NETATMO_BASE_URL in .env overrides it.
+NETATMO_BASE_URL = "https://api.netatmo.com"
+NETATMO_REQUEST_TIMEOUT = 10.0  # seconds per Netatmo HTTP request
+
+# Cameras driven by main.py. Each camera captures on its own thread at its own
+# interval (seconds); frames from all cameras share one MQTT connection.
+# camera_index selects the physical camera on multi-camera boards.
+CAMERAS = [
+    {"camera_id": "camera_01", "camera_index": 0, "interval": 5.0},
+    # {"camera_id": "camera_02", "camera_index": 1, "interval": 5.0},
+]
+
+# Multi-resolution tiering: publish a small thumbnail with every sample and keep
+# the full-resolution frames in a bounded local cache. The Processing Pi can
+# request a cached frame by id on MQTT_FULL_RES_REQUEST_TOPIC and receives it on
+# MQTT_FULL_RES_RESPONSE_TOPIC (or the ``response_topic`` given in the request).
+PUBLISH_THUMBNAILS = True
+THUMBNAIL_SIZE = (320, 180)
+THUMBNAIL_QUALITY = 70
+FULL_RES_CACHE_SIZE = 32
+MQTT_FULL_RES_REQUEST_TOPIC = "sensor/full_res/request"
+MQTT_FULL_RES_RESPONSE_TOPIC = "sensor/full_res/response"
+
+# Edge preprocessing applied to each frame before encoding. Leave all values at
+# None to publish frames unmodified.
+# PREPROCESS_ROI: (x, y, width, height) crop in source pixels.
+# PREPROCESS_TARGET_SIZE: (width, height) of the published image, e.g. the
+#   downstream model input size (640, 640).
+# CAMERA_MATRIX / DIST_COEFFS: lens calibration (3x3 intrinsics and
+#   k1, k2, p1, p2[, k3]). When both are set frames are undistorted; the remap
+#   tables are computed once and persisted to PREPROCESS_REMAP_CACHE.
+PREPROCESS_ROI = None
+PREPROCESS_TARGET_SIZE = None
+CAMERA_MATRIX = None
+DIST_COEFFS = None
+PREPROCESS_REMAP_CACHE = "edge_data_collector/preprocessing/remap_cache.npz"
+
+# Water-likelihood prefilter: a cheap heuristic score attached to
+# metadata["priority"]. Likely flood frames are published first and at the upper
+# end of PRIORITY_QUALITY_RANGE; under load, frames scoring below
+# PRIORITY_LOW_THRESHOLD are decimated to one in PRIORITY_LOW_KEEP_EVERY.
+WATER_PREFILTER_ENABLED = True
+PRIORITY_QUALITY_RANGE = (60, 90)
+PRIORITY_QUEUE_MAX_PENDING = 20
+PRIORITY_QUEUE_LOAD_THRESHOLD = 5
+PRIORITY_LOW_THRESHOLD = 0.3
+PRIORITY_LOW_KEEP_EVERY = 3
+
+# Multiprocess encoding: when ENCODER_PROCESSES > 0, main.py captures frames as
+# arrays, hands them to that many encoder processes through a shared-memory
+# ring and receives the Base64 JPEGs back the same way. ENCODER_FRAME_SHAPE is
+# the largest (height, width, channels) frame the ring must hold.
+ENCODER_PROCESSES = 0
+ENCODER_FRAME_SHAPE = (1080, 1920, 3)
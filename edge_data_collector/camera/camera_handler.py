@@ -1,3 +1,4 @@
+import logging
 import os
 import time  # For generating timestamps for image simulation
 import config
@@ -10,14 +11,31 @@ except ImportError:  # Fall back to legacy PiCamera or mock camera
         from picamera import PiCamera
     except ImportError:
         from edge_data_collector.camera.mock.pi_camera import PiCamera
+from edge_data_sender.monitoring.metrics import REGISTRY
+from .synthetic import synthetic_frame_source
 from .utils import compress_image
+
+logger = logging.getLogger(__name__)
+
+CAPTURES = REGISTRY.counter("camera_captures_total", "Capture attempts by result", ("camera_id", "result"))
+CAPTURE_SECONDS = REGISTRY.histogram("camera_capture_seconds", "Time to capture one frame", ("camera_id",))
 # from edge_data_collector.camera.utils import compress_image
 
 
 class CameraHandler:
-    def __init__(self, camera_id, image_folder="edge_data_collector/camera/images"):
+    def __init__(self, camera_id, image_folder="edge_data_collector/camera/images", camera_index=0, clock=time.time):
+        """
+        Args:
+            camera_id (str): Identifier reported in metadata.
+            image_folder (str): Folder captured images are written to.
+            camera_index (int): Index of the physical camera on multi-camera boards.
+            clock (callable): Returns the capture timestamp in seconds since the
+                Unix epoch. Cameras driven by one ``CameraManager`` share a clock.
+        """
         self.camera_id = camera_id
         self.image_folder = image_folder
+        self.camera_index = camera_index
+        self.clock = clock
         os.makedirs(self.image_folder, exist_ok=True)  # Ensure the image folder exists
         self.simulate_image_creation = config.SIMULATE_IMAGE_CREATION
 
@@ -25,14 +43,20 @@ class CameraHandler:
 
         if not self.simulate_image_creation:
             if PICAMERA2_AVAILABLE:
-                self.camera = Picamera2()
+                self.camera = Picamera2(camera_num=camera_index)
                 self.camera.configure(self.camera.create_still_configuration(main={"size": (1920, 1080)}))
                 self.camera.start()
             else:
-                self.camera = PiCamera()
+                self.camera = PiCamera(camera_num=camera_index)
                 self.camera.resolution = (1920, 1080)
         else:
             self.camera = None  # No real camera if simulating
+            self.frame_source = synthetic_frame_source(
+                config.SIMULATED_IMAGE_RESOLUTION,
+                config.SIMULATED_IMAGE_PROFILE,
+                config.SIMULATED_IMAGE_POOL_SIZE,
+                config.SIMULATED_IMAGE_QUALITY,
+            )
 
 
     def capture_image(self, compress=False):
@@ -48,20 +72,23 @@ class CameraHandler:
         """
         capture_timestamp = None
 
-        if(self.simulate_image_creation):
-            # # Simulate image capture
-            raw_image_path, capture_timestamp = self.simulate_image_capture()
+        with CAPTURE_SECONDS.time(camera_id=self.camera_id):
+            if(self.simulate_image_creation):
+                # # Simulate image capture
+                raw_image_path, capture_timestamp = self.simulate_image_capture()
 
-        else:
-            # Real image capture 
-            raw_image_path, capture_timestamp = self.capture_image_using_camera()
+            else:
+                # Real image capture 
+                raw_image_path, capture_timestamp = self.capture_image_using_camera()
 
         if not raw_image_path:
-            print("Failed to capture image.")
+            CAPTURES.inc(camera_id=self.camera_id, result="error")
+            logger.error("Camera %s failed to capture image.", self.camera_id)
             return None, None
+        CAPTURES.inc(camera_id=self.camera_id, result="ok")
 
 
-        print(f"Raw image saved to {raw_image_path}")
+        logger.debug("Raw image saved to %s", raw_image_path)
 
         if compress:
 
@@ -74,7 +101,7 @@ class CameraHandler:
 
             # Delete the raw image
             os.remove(raw_image_path)
-            print(f"Raw image deleted: {raw_image_path}")
+            logger.debug("Raw image deleted: %s", raw_image_path)
 
             return compressed_image_path, capture_timestamp
         else:
@@ -84,19 +111,17 @@ class CameraHandler:
     # Simulate image Capturing
     def simulate_image_capture(self):
         """
-        Simulate capturing an image by creating a placeholder file.
+        Simulate capturing an image by writing the next synthetic frame.
 
         Returns:
             tuple[str, float]: Path to the simulated raw image and capture timestamp.
         """
-        capture_time = time.time()
-        raw_image_path = os.path.join(self.image_folder, f"raw_image_{int(capture_time)}.jpg")
+        capture_time = self.clock()
+        raw_image_path = self._raw_image_path(capture_time)
 
-        # Create a placeholder raw image (for simulation purposes)
-        with open(raw_image_path, "wb") as f:
-            f.write(os.urandom(1024 * 1024))  # Write 1MB of random data to simulate an image
+        self.frame_source.write(raw_image_path)
 
-        print(f"Raw image simulated and saved to {raw_image_path}")
+        logger.debug("Raw image simulated and saved to %s", raw_image_path)
         return raw_image_path, capture_time
 
 
@@ -109,9 +134,9 @@ class CameraHandler:
             tuple[str | None, float | None]: Path to the captured raw image and
             capture timestamp, or (None, None) on failure.
         """
-        capture_time = time.time()
-        raw_image_path = os.path.join(self.image_folder, f"raw_image_{int(capture_time)}.jpg")
-        print(f"Capturing image from camera {self.camera_id}")
+        capture_time = self.clock()
+        raw_image_path = self._raw_image_path(capture_time)
+        logger.debug("Capturing image from camera %s", self.camera_id)
 
 
         # Capture the image and save it to the specified path
@@ -121,13 +146,66 @@ class CameraHandler:
             else:
                 self.camera.capture(raw_image_path)
         except Exception as e:
-            print(f"Failed to capture image: {e}")
+            logger.error("Camera %s failed to capture image: %s", self.camera_id, e)
             return None, None
 
-        print(f"Image captured using camera and saved to {raw_image_path}")
+        logger.debug("Image captured using camera and saved to %s", raw_image_path)
         return raw_image_path, capture_time
     
 
+    def capture_array(self):
+        """
+        Capture a frame as an in-memory RGB array instead of a file.
+
+        Used by the multiprocess encoder mode, which hands frames to encoder
+        processes through shared memory.
+
+        Returns:
+            tuple[numpy.ndarray | None, float | None]: HxWx3 uint8 RGB frame and
+            capture timestamp, or (None, None) on failure.
+        """
+        with CAPTURE_SECONDS.time(camera_id=self.camera_id):
+            frame, capture_time = self._capture_array()
+        CAPTURES.inc(camera_id=self.camera_id, result="error" if frame is None else "ok")
+        return frame, capture_time
+
+    def _capture_array(self):
+        import numpy as np
+
+        capture_time = self.clock()
+        if self.simulate_image_creation:
+            return self.frame_source.next_array(), capture_time
+
+        try:
+            if PICAMERA2_AVAILABLE:
+                # The still configuration's BGR888 format yields RGB-ordered arrays.
+                return self.camera.capture_array("main")[..., :3], capture_time
+        except Exception as e:
+            logger.error("Camera %s failed to capture image: %s", self.camera_id, e)
+            return None, None
+
+        # Legacy and mock cameras can only capture to files.
+        from PIL import Image
+
+        raw_image_path, capture_time = self.capture_image_using_camera()
+        if not raw_image_path:
+            return None, None
+        try:
+            with Image.open(raw_image_path) as img:
+                frame = np.asarray(img.convert("RGB"))
+        except Exception as e:
+            logger.error("Failed to load captured image: %s", e)
+            return None, None
+        finally:
+            os.remove(raw_image_path)
+        return frame, capture_time
+
+    def _raw_image_path(self, capture_time):
+        """Unique per camera and millisecond, so concurrent cameras never collide."""
+        return os.path.join(
+            self.image_folder, f"raw_image_{self.camera_id}_{int(capture_time * 1000)}.jpg"
+        )
+
     def close_camera(self):
         """
         Cleanly close the camera when done.
@@ -138,7 +216,7 @@ class CameraHandler:
                 self.camera.close()
             else:
                 self.camera.close()
-        print("Camera closed.")
+        logger.info("Camera %s closed.", self.camera_id)
 
 
 
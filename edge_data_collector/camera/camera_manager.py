@@ -0,0 +1,262 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class SharedClock:
+    """Wall-clock timestamps derived from one monotonic reference.
+
+    Every camera thread stamps its frames with the same clock, so timestamps
+    are directly comparable across cameras and do not jump when NTP adjusts the
+    system time mid-run.
+    """
+
+    def __init__(self):
+        self._wall_anchor = time.time()
+        self._monotonic_anchor = time.monotonic()
+
+    def __call__(self):
+        return self._wall_anchor + (time.monotonic() - self._monotonic_anchor)
+
+
+class CameraManager:
+    """Drives several cameras concurrently, one capture thread per camera.
+
+    Each camera captures at its own interval on a dedicated thread and places
+    its frames in a small per-camera queue. ``next_capture`` interleaves the
+    queues round-robin so a fast camera cannot starve a slow one on the shared
+    publisher. A failing camera backs off and retries without affecting the
+    others.
+    """
+
+    def __init__(self, cameras, max_pending_per_camera=2, retry_delay=5.0, capture_arrays=False, profiler=None):
+        """
+        Args:
+            cameras (list[tuple[CameraHandler, float]]): Camera handlers with their
+                capture interval in seconds.
+            max_pending_per_camera (int): Frames buffered per camera; when full the
+                oldest frame is discarded (and its file deleted).
+            retry_delay (float): Maximum back-off after a failed capture.
+            capture_arrays (bool): Capture in-memory RGB arrays
+                (``CameraHandler.capture_array``) instead of image files.
+            profiler (SamplingProfiler | None): Samples captures as stage ``capture``.
+        """
+        if not cameras:
+            raise ValueError("At least one camera is required")
+        self.cameras = [handler for handler, _ in cameras]
+        self.intervals = {handler.camera_id: float(interval) for handler, interval in cameras}
+        if len(self.intervals) != len(self.cameras):
+            raise ValueError("camera_id values must be unique")
+        self.max_pending_per_camera = max_pending_per_camera
+        self.retry_delay = retry_delay
+        self.capture_arrays = capture_arrays
+        self.profiler = profiler
+        self.min_interval = None
+        # Stage durations (seconds) of the frame last returned by next_capture
+        self.last_timing = None
+
+        self.stats = {
+            handler.camera_id: {"captured": 0, "failed": 0, "discarded": 0}
+            for handler in self.cameras
+        }
+        self._pending = {handler.camera_id: deque() for handler in self.cameras}
+        self._order = [handler.camera_id for handler in self.cameras]
+        self._next_index = 0
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    @classmethod
+    def from_config(cls, camera_configs, default_interval=5.0, image_folder="edge_data_collector/camera/images",
+                    capture_arrays=False):
+        """
+        Build a manager from ``config.CAMERAS`` style entries.
+
+        A camera whose handler cannot be created (missing device, bad entry) is
+        logged and skipped, so the remaining cameras still run.
+
+        Args:
+            camera_configs (list[dict]): Entries with ``camera_id`` and optional
+                ``camera_index`` and ``interval``.
+            default_interval (float): Interval for entries without one.
+            image_folder (str): Folder captured images are written to.
+            capture_arrays (bool): Capture in-memory arrays instead of files.
+
+        Returns:
+            CameraManager: Manager whose cameras share one clock.
+
+        Raises:
+            RuntimeError: If none of the cameras could be created.
+        """
+        from .camera_handler import CameraHandler
+
+        clock = SharedClock()
+        cameras = []
+        for index, entry in enumerate(camera_configs):
+            try:
+                handler = CameraHandler(
+                    camera_id=entry["camera_id"],
+                    image_folder=image_folder,
+                    camera_index=entry.get("camera_index", index),
+                    clock=clock,
+                )
+            except Exception as e:
+                logger.error("Skipping camera %s: %s", entry.get("camera_id", index), e)
+                continue
+            cameras.append((handler, entry.get("interval", default_interval)))
+        if camera_configs and not cameras:
+            raise RuntimeError("None of the configured cameras could be initialized")
+        return cls(cameras, capture_arrays=capture_arrays)
+
+    def start(self):
+        """Start one capture thread per camera."""
+        self._stop_event.clear()
+        for handler in self.cameras:
+            thread = threading.Thread(
+                target=self._capture_loop,
+                args=(handler,),
+                name=f"capture-{handler.camera_id}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _capture(self, handler):
+        capture = handler.capture_array if self.capture_arrays else handler.capture_image
+        if self.profiler is None:
+            return capture()
+        with self.profiler.sample("capture"):
+            return capture()
+
+    def stop(self, timeout=5.0):
+        """Stop the capture threads and close all cameras."""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        for handler in self.cameras:
+            try:
+                handler.close_camera()
+            except Exception as e:
+                logger.error("Failed to close camera %s: %s", handler.camera_id, e)
+
+    def set_interval(self, interval, camera_id=None):
+        """
+        Change the configured capture interval at runtime.
+
+        Args:
+            interval (float): Seconds between captures.
+            camera_id (str | None): Camera to change; all cameras when None.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be greater than zero")
+        for target in ([camera_id] if camera_id is not None else list(self.intervals)):
+            if target not in self.intervals:
+                raise KeyError(f"Unknown camera_id: {target}")
+            self.intervals[target] = float(interval)
+
+    def throttle(self, min_interval=None):
+        """
+        Lengthen every camera's capture interval to at least ``min_interval``.
+
+        Takes effect from each camera's next capture; cameras configured with a
+        longer interval keep it.
+
+        Args:
+            min_interval (float | None): Minimum seconds between captures, or
+                None to restore the configured intervals.
+        """
+        self.min_interval = min_interval
+
+    def interval_for(self, camera_id):
+        """Return the capture interval currently in effect for a camera."""
+        interval = self.intervals[camera_id]
+        min_interval = self.min_interval
+        return interval if min_interval is None else max(interval, min_interval)
+
+    def next_capture(self, timeout=None):
+        """
+        Return the next captured frame, alternating fairly between cameras.
+
+        Args:
+            timeout (float | None): Seconds to wait for a frame.
+
+        Returns:
+            tuple[str, str | numpy.ndarray, float] | None: (camera_id, image path or
+            frame array, capture_ts), or None if no frame became available in time
+            or the manager stopped. ``last_timing`` then holds the frame's
+            ``capture`` duration and its ``wait`` in the per-camera queue.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                for offset in range(len(self._order)):
+                    camera_id = self._order[(self._next_index + offset) % len(self._order)]
+                    pending = self._pending[camera_id]
+                    if pending:
+                        self._next_index = (self._next_index + offset + 1) % len(self._order)
+                        image, capture_ts, capture_sec, enqueued = pending.popleft()
+                        self.last_timing = {"capture": capture_sec, "wait": time.perf_counter() - enqueued}
+                        return camera_id, image, capture_ts
+
+                if self._stop_event.is_set():
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def _capture_loop(self, handler):
+        camera_id = handler.camera_id
+        next_due = time.monotonic()
+        failures = 0
+
+        while not self._stop_event.is_set():
+            delay = next_due - time.monotonic()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+
+            started = time.perf_counter()
+            try:
+                image, capture_ts = self._capture(handler)
+            except Exception as e:
+                logger.exception("Camera %s capture raised: %s", camera_id, e)
+                image, capture_ts = None, None
+
+            if image is None or (isinstance(image, str) and not image):
+                failures += 1
+                self.stats[camera_id]["failed"] += 1
+                # Back off exponentially, capped at retry_delay, then resume the schedule.
+                next_due = time.monotonic() + min(self.retry_delay, 0.5 * 2 ** (failures - 1))
+                continue
+
+            failures = 0
+            self._enqueue(camera_id, image, capture_ts, time.perf_counter() - started)
+            interval = self.interval_for(camera_id)
+            next_due += interval
+            if next_due < time.monotonic():
+                # Capture took longer than the interval; skip missed slots.
+                next_due = time.monotonic() + interval
+
+    def _enqueue(self, camera_id, image, capture_ts, capture_sec=0.0):
+        discarded = None
+        with self._condition:
+            pending = self._pending[camera_id]
+            if len(pending) >= self.max_pending_per_camera:
+                discarded = pending.popleft()[0]
+                self.stats[camera_id]["discarded"] += 1
+            pending.append((image, capture_ts, capture_sec, time.perf_counter()))
+            self.stats[camera_id]["captured"] += 1
+            self._condition.notify()
+
+        if isinstance(discarded, str):
+            try:
+                os.remove(discarded)
+            except OSError:
+                pass
@@ -0,0 +1,83 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class FrameCache:
+    """Bounded cache of full-resolution frames keyed by frame id.
+
+    The cache keeps references to the captured image files (not the decoded
+    pixels) so holding a few dozen 1080p frames costs almost no memory. When the
+    cache is full the least recently used frame is evicted and, if
+    ``delete_evicted`` is enabled, its file is removed from disk.
+    """
+
+    def __init__(self, max_frames=32, delete_evicted=True):
+        """
+        Args:
+            max_frames (int): Maximum number of frames kept in the cache.
+            delete_evicted (bool): Remove the image file of evicted frames.
+        """
+        if max_frames < 1:
+            raise ValueError("max_frames must be at least 1")
+        self.max_frames = max_frames
+        self.delete_evicted = delete_evicted
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, frame_id, image_path, metadata=None):
+        """
+        Store a frame in the cache, evicting the oldest entries if necessary.
+
+        Args:
+            frame_id (str): Identifier of the frame.
+            image_path (str): Path to the full-resolution image file.
+            metadata (dict | None): Metadata that was published with the frame.
+        """
+        with self._lock:
+            self._frames[frame_id] = (image_path, dict(metadata or {}))
+            self._frames.move_to_end(frame_id)
+            evicted = []
+            while len(self._frames) > self.max_frames:
+                evicted.append(self._frames.popitem(last=False)[1][0])
+
+        if self.delete_evicted:
+            for path in evicted:
+                if path != image_path:
+                    self._remove_file(path)
+
+    def get(self, frame_id):
+        """
+        Look up a cached frame.
+
+        Args:
+            frame_id (str): Identifier of the frame.
+
+        Returns:
+            tuple[str, dict] | None: Image path and metadata, or None if the frame
+            is not cached (never captured, or already evicted).
+        """
+        with self._lock:
+            entry = self._frames.get(frame_id)
+            if entry is None:
+                return None
+            self._frames.move_to_end(frame_id)
+            image_path, metadata = entry
+        if not os.path.exists(image_path):
+            return None
+        return image_path, dict(metadata)
+
+    def __contains__(self, frame_id):
+        with self._lock:
+            return frame_id in self._frames
+
+    def __len__(self):
+        with self._lock:
+            return len(self._frames)
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,9 +1,16 @@
+import logging
 import os
 import time
 
+import config
+from edge_data_collector.camera.synthetic import synthetic_frame_source
+
+logger = logging.getLogger(__name__)
+
 class PiCamera:
-    def __init__(self):
-        print("Mock PiCamera initialized")
+    def __init__(self, camera_num=0):
+        logger.info("Mock PiCamera %s initialized", camera_num)
+        self.camera_num = camera_num
         self.resolution = (1920, 1080)  # Default resolution
         self.is_open = True
 
@@ -11,30 +18,34 @@ class PiCamera:
         if not self.is_open:
             raise RuntimeError("Mock PiCamera is closed and cannot capture images.")
         
-        print(f"Mock capture started with resolution: {self.resolution}")
+        logger.debug("Mock capture started with resolution: %s", self.resolution)
         
-        # Simulate image creation by writing dummy data to the file
+        # Simulate image creation by writing a synthetic frame at the set resolution
         try:
-            with open(output_path, "wb") as f:
-                f.write(os.urandom(1024 * 1024))  # Create a 1MB dummy file
-            print(f"Mock capture saved to {output_path}")
+            synthetic_frame_source(
+                tuple(self.resolution),
+                config.SIMULATED_IMAGE_PROFILE,
+                config.SIMULATED_IMAGE_POOL_SIZE,
+                config.SIMULATED_IMAGE_QUALITY,
+            ).write(output_path)
+            logger.debug("Mock capture saved to %s", output_path)
         except Exception as e:
-            print(f"Failed to save mock capture: {e}")
+            logger.error("Failed to save mock capture: %s", e)
             raise
 
     def close(self):
         if self.is_open:
-            print("Mock PiCamera closed")
+            logger.info("Mock PiCamera closed")
             self.is_open = False
         else:
-            print("Mock PiCamera is already closed")
+            logger.debug("Mock PiCamera is already closed")
 
     def set_resolution(self, width, height):
         """Set the resolution of the mock camera."""
         if not self.is_open:
             raise RuntimeError("Cannot set resolution on a closed Mock PiCamera.")
         self.resolution = (width, height)
-        print(f"Mock PiCamera resolution set to: {self.resolution}")
+        logger.info("Mock PiCamera resolution set to: %s", self.resolution)
 
     # Compatibility with Picamera2 API
     def capture_file(self, output_path):
@@ -0,0 +1,192 @@
+import io
+import itertools
+import threading
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+PROFILES = ("static", "moving", "water")
+
+# Fraction of the frame height above the horizon (sky and buildings)
+_HORIZON = 0.45
+
+
+class SyntheticFrameSource:
+    """Pool of pre-rendered JPEG frames for simulation mode.
+
+    Frames show a street-like scene (sky gradient, building silhouettes and a
+    textured road) and are encoded once into a pool that is then handed out
+    round robin, so simulated capture costs a file write instead of random
+    bytes Pillow cannot decode. Per-frame sensor noise and textures keep JPEG
+    sizes close to real camera output. Profiles:
+
+    * ``static``: fixed scene, only sensor noise changes;
+    * ``moving``: the scene pans and a vehicle-sized block crosses the road;
+    * ``water``: a rippling puddle with sky reflections and highlights covers
+      the road, animated across the pool.
+    """
+
+    def __init__(self, resolution=(1920, 1080), profile="water", pool_size=16, quality=85, seed=0):
+        """
+        Args:
+            resolution (tuple[int, int]): Frame ``(width, height)``.
+            profile (str): One of ``PROFILES``.
+            pool_size (int): Distinct frames rendered; they repeat afterwards.
+            quality (int): JPEG quality of the pool.
+            seed (int): Random seed, so pools are reproducible.
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown synthetic profile {profile!r}; expected one of {PROFILES}")
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.width, self.height = (int(v) for v in resolution)
+        if self.width < 16 or self.height < 16:
+            raise ValueError("resolution must be at least 16x16")
+        self.profile = profile
+        self.pool_size = pool_size
+        self.quality = quality
+        self.seed = seed
+        self._pool = None
+        self._arrays = None
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def resolution(self):
+        return self.width, self.height
+
+    def prerender(self):
+        """Renders and encodes the pool (done on first use otherwise)."""
+        with self._lock:
+            if self._pool is None:
+                background = self._background()
+                self._pool = [self._encode(self._render(background, index)) for index in range(self.pool_size)]
+                self._arrays = [None] * self.pool_size
+        return self
+
+    def next_jpeg(self):
+        """
+        Returns:
+            bytes: Next JPEG of the pool.
+        """
+        pool = self._pool if self._pool is not None else self.prerender()._pool
+        return pool[next(self._counter) % len(pool)]
+
+    def next_array(self):
+        """
+        Each pool frame is decoded once, on first use, and then handed out
+        without copying.
+        Returns:
+            numpy.ndarray: Next frame of the pool as a read-only HxWx3 uint8 RGB
+            array (``copy()`` it before modifying).
+        """
+        pool = self._pool if self._pool is not None else self.prerender()._pool
+        index = next(self._counter) % len(pool)
+        frame = self._arrays[index]
+        if frame is None:
+            # Concurrent first uses may both decode; the results are identical.
+            with Image.open(io.BytesIO(pool[index])) as img:
+                frame = np.asarray(img.convert("RGB"))
+            frame.flags.writeable = False
+            self._arrays[index] = frame
+        return frame
+
+    def write(self, path):
+        """
+        Writes the next JPEG of the pool to ``path``.
+        Returns:
+            int: Bytes written.
+        """
+        data = self.next_jpeg()
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+    def _encode(self, frame):
+        buffer = io.BytesIO()
+        Image.fromarray(frame).save(buffer, "JPEG", quality=self.quality)
+        return buffer.getvalue()
+
+    def _smooth_noise(self, rng, cells, height, width):
+        """Low-frequency noise in [0, 1]: random cells upscaled bilinearly."""
+        small = (rng.random((max(2, height * cells // width), cells)) * 255).astype(np.uint8)
+        upscaled = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+        return np.asarray(upscaled, dtype=np.float32) / 255.0
+
+    def _background(self):
+        rng = np.random.default_rng(self.seed)
+        h, w = self.height, self.width
+        horizon = int(h * _HORIZON)
+        frame = np.empty((h, w, 3), dtype=np.float32)
+
+        # Sky: vertical gradient with soft clouds.
+        rows = np.linspace(0.0, 1.0, horizon, dtype=np.float32)[:, None, None]
+        sky = np.array([110, 150, 200], np.float32) * (1 - rows) + np.array([190, 205, 215], np.float32) * rows
+        clouds = self._smooth_noise(rng, 12, horizon, w)[..., None]
+        frame[:horizon] = sky + (clouds - 0.5) * 50
+
+        # Buildings: blocks of varying height and shade standing on the horizon.
+        x = 0
+        while x < w:
+            block = int(rng.integers(w // 24 + 1, w // 8 + 2))
+            top = int(horizon * rng.uniform(0.2, 0.8))
+            frame[top:horizon, x:x + block] = rng.uniform(60, 150) + rng.normal(0, 6, 3)
+            # Window rows give the blocks high-frequency detail.
+            frame[top + 4:horizon:max(4, h // 60), x + 2:x + block - 2] *= 0.75
+            x += block + int(rng.integers(0, w // 40 + 1))
+
+        # Road: grey asphalt with coarse and fine texture and lane markings.
+        ground = h - horizon
+        coarse = self._smooth_noise(rng, 48, ground, w)[..., None]
+        fine = rng.normal(0, 10, (ground, w, 1)).astype(np.float32)
+        frame[horizon:] = 95 + (coarse - 0.5) * 40 + fine
+        lane = slice(horizon + ground // 2 - max(1, h // 200), horizon + ground // 2 + max(1, h // 200))
+        for start in range(0, w, w // 8 + 1):
+            frame[lane, start:start + w // 16] = 215
+        return frame
+
+    def _render(self, background, index):
+        rng = np.random.default_rng(self.seed + 1 + index)
+        h, w = self.height, self.width
+        horizon = int(h * _HORIZON)
+        phase = 2 * np.pi * index / self.pool_size
+
+        if self.profile == "moving":
+            frame = np.roll(background, index * max(1, w // 64), axis=1)
+            car_w, car_h = w // 6, h // 8
+            car_x = int((index / self.pool_size) * (w + car_w)) - car_w
+            car_y = horizon + (h - horizon) // 3
+            left, right = max(0, car_x), min(w, car_x + car_w)
+            if right > left:
+                frame[car_y:car_y + car_h, left:right] = (150, 30, 35)
+                frame[car_y:car_y + car_h // 3, left:right] = (60, 70, 80)
+        else:
+            frame = background.copy()
+
+        if self.profile == "water":
+            top = horizon + (h - horizon) // 5
+            depth = h - top
+            yy, xx = np.mgrid[0:depth, 0:w].astype(np.float32)
+            ripple = (np.sin(xx * (24 / w) + yy * (60 / h) + phase)
+                      + 0.6 * np.sin(xx * (70 / w) - yy * (150 / h) + 2 * phase)
+                      + 0.3 * np.sin((xx + yy) * (300 / w) - 3 * phase))
+            # Sky and buildings mirrored into the puddle, darkened and tinted.
+            mirror_rows = np.clip(top - 1 - yy[:, 0].astype(np.int64) - (ripple[:, 0] * 3).astype(np.int64), 0, h - 1)
+            reflection = frame[mirror_rows] * 0.55 + np.array([20, 35, 50], np.float32)
+            edge = np.clip(np.minimum(yy, depth - yy) / (depth * 0.15 + 1), 0, 1)[..., None]
+            water = reflection + ripple[..., None] * 12
+            water[ripple > 1.6] = 230
+            frame[top:] = frame[top:] * (1 - edge) + water * edge
+
+        noise = rng.normal(0, 3, (h, w, 1)).astype(np.float32)
+        return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+@lru_cache(maxsize=8)
+def synthetic_frame_source(resolution=(1920, 1080), profile="water", pool_size=16, quality=85, seed=0):
+    """
+    Returns a shared ``SyntheticFrameSource``, so cameras with the same
+    settings render the pool once.
+    """
+    return SyntheticFrameSource(tuple(resolution), profile, pool_size, quality, seed)
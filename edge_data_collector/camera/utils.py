@@ -1,6 +1,9 @@
 from PIL import Image
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 def compress_image(input_path, output_path, quality=85):
     """
     Compresses an image to reduce its file size while maintaining acceptable quality.
@@ -23,9 +26,9 @@ def compress_image(input_path, output_path, quality=85):
             # Save the image with compression
             img.save(output_path, "JPEG", quality=quality)
 
-        print(f"Image compressed and saved to {output_path}")
+        logger.debug("Image compressed and saved to %s", output_path)
         return output_path
 
     except Exception as e:
-        print(f"Error compressing image: {e}")
+        logger.error("Error compressing image %s: %s", input_path, e)
         raise
@@ -1,3 +1,11 @@
+import logging
+
+from edge_data_sender.monitoring.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+FORMAT_SECONDS = REGISTRY.histogram("format_seconds", "Time to encode and format one sample", ("variant",))
+FORMATTED_BYTES = REGISTRY.counter("formatted_image_bytes_total", "Base64 image bytes produced", ("variant",))
 
 
 _ALLOWED_MOTION_STATES = {"fast", "slow", "stop"}
@@ -28,47 +36,149 @@ def _normalize_resource_flag(value):
     return False
 
 
-def format_data(image_data, sensor_data, metadata):
+def format_data(image_data, sensor_data, metadata, thumbnail_size=None, thumbnail_quality=70, preprocessor=None,
+                image_quality=None, scale=None, max_size=None):
     """
     Formats image data, sensor data, and metadata into a JSON-like dictionary.
     Args:
         image_data (str): Path to the image file.
         sensor_data (dict): Dictionary containing sensor data.
         metadata (dict): Additional metadata for the data payload.
+        thumbnail_size (tuple[int, int] | None): When set, a thumbnail bounded by
+            this (width, height) is sent instead of the full-resolution image and
+            ``metadata["image_variant"]`` is set to ``"thumbnail"``.
+        thumbnail_quality (int): JPEG quality used for the thumbnail.
+        preprocessor (FramePreprocessor | None): Crop/resize/undistort stage
+            applied to the decoded frame before encoding. The applied steps are
+            recorded in ``metadata["preprocessing"]``.
+        image_quality (int | None): JPEG quality of the full-resolution image;
+            Pillow's default is used when None.
+        scale (float | None): Downscale factor (0-1] applied to the encoded
+            image (or to the thumbnail bounds).
+        max_size (tuple[int, int] | None): Bounding (width, height) of the
+            full-resolution image; the aspect ratio is preserved.
     Returns:
         dict: Formatted data payload with Base64-encoded image.
     """
-    metadata_payload = dict(metadata or {})
-    motion_hint = metadata_payload.get("motion")
-    resource_flag = metadata_payload.get("resource_constrained")
-    metadata_payload["motion"] = _normalize_motion_hint(motion_hint)
-    metadata_payload["resource_constrained"] = _normalize_resource_flag(resource_flag)
+    metadata_payload = _normalize_metadata(metadata)
+
+    if preprocessor is not None and not preprocessor.is_active:
+        preprocessor = None
+    if preprocessor is not None:
+        metadata_payload["preprocessing"] = preprocessor.describe()
 
-    encoded_image_data = encode_image(image_data)
+    variant = "thumbnail" if thumbnail_size else "full"
+    with FORMAT_SECONDS.time(variant=variant):
+        if thumbnail_size:
+            if scale:
+                thumbnail_size = tuple(max(1, int(round(side * scale))) for side in thumbnail_size)
+            encoded_image_data = encode_thumbnail(
+                image_data, thumbnail_size, quality=thumbnail_quality, preprocessor=preprocessor
+            )
+            metadata_payload["image_variant"] = "thumbnail"
+        else:
+            encoded_image_data = encode_image(
+                image_data, preprocessor=preprocessor, quality=image_quality, scale=scale, max_size=max_size
+            )
+    FORMATTED_BYTES.inc(len(encoded_image_data), variant=variant)
     return {
         "image_data": encoded_image_data,
         "sensor_data": sensor_data,
         "metadata": metadata_payload
     }
+
+
+def format_encoded_data(encoded_image_data, sensor_data, metadata):
+    """
+    Formats an already Base64-encoded image, sensor data, and metadata into a
+    JSON-like dictionary. Used when images are encoded out of process.
+    Args:
+        encoded_image_data (str): Base64-encoded JPEG.
+        sensor_data (dict): Dictionary containing sensor data.
+        metadata (dict): Additional metadata for the data payload.
+    Returns:
+        dict: Formatted data payload.
+    """
+    FORMATTED_BYTES.inc(len(encoded_image_data), variant="encoded")
+    return {
+        "image_data": encoded_image_data,
+        "sensor_data": sensor_data,
+        "metadata": _normalize_metadata(metadata)
+    }
+
+
+def _normalize_metadata(metadata):
+    metadata_payload = dict(metadata or {})
+    motion_hint = metadata_payload.get("motion")
+    resource_flag = metadata_payload.get("resource_constrained")
+    metadata_payload["motion"] = _normalize_motion_hint(motion_hint)
+    metadata_payload["resource_constrained"] = _normalize_resource_flag(resource_flag)
+    return metadata_payload
     
 
-def encode_image(image_path):
+def encode_image(image_path, preprocessor=None, quality=None, scale=None, max_size=None):
     """
     Encodes an image file into Base64 format.
     Args:
         image_path (str): Path to the image file.
+        preprocessor (FramePreprocessor | None): Optional stage applied to the
+            decoded frame before it is re-encoded.
+        quality (int | None): JPEG quality (1-100); Pillow's default when None.
+        scale (float | None): Downscale factor (0-1]; the image is encoded at
+            full size when None.
+        max_size (tuple[int, int] | None): Bounding (width, height); the aspect
+            ratio is preserved.
     Returns:
         str: Base64-encoded string of the image.
     """
     from PIL import Image
     from io import BytesIO
     import base64
-    print(image_path)
+    logger.debug("Encoding image %s", image_path)
 
     with Image.open(image_path) as img:
         buffered = BytesIO()
         img = img.convert('RGB')
-        img.save(buffered, format="JPEG")
+        if preprocessor is not None:
+            img = preprocessor.process_image(img)
+        if scale and scale < 1:
+            img.thumbnail((max(1, int(round(img.width * scale))), max(1, int(round(img.height * scale)))))
+        if max_size:
+            img.thumbnail(tuple(max_size))
+        if quality is None:
+            img.save(buffered, format="JPEG")
+        else:
+            img.save(buffered, format="JPEG", quality=quality)
         return base64.b64encode(buffered.getvalue()).decode()
-    
 
+
+def encode_thumbnail(image_path, size, quality=70, preprocessor=None):
+    """
+    Encodes a downscaled copy of an image file into Base64 format.
+    Args:
+        image_path (str): Path to the image file.
+        size (tuple[int, int]): Maximum (width, height) of the thumbnail. The
+            aspect ratio of the source image is preserved.
+        quality (int): JPEG quality of the thumbnail (1-100).
+        preprocessor (FramePreprocessor | None): Optional stage applied to the
+            decoded frame before it is downscaled.
+    Returns:
+        str: Base64-encoded string of the thumbnail.
+    """
+    from PIL import Image
+    from io import BytesIO
+    import base64
+
+    with Image.open(image_path) as img:
+        if preprocessor is None:
+            # Let the JPEG decoder downscale while decoding instead of decoding
+            # the full frame and shrinking it afterwards. Skipped when
+            # preprocessing, since the ROI is given in full-resolution pixels.
+            img.draft("RGB", tuple(size))
+        img = img.convert('RGB')
+        if preprocessor is not None:
+            img = preprocessor.process_image(img)
+        img.thumbnail(tuple(size))
+        buffered = BytesIO()
+        img.save(buffered, format="JPEG", quality=quality)
+        return base64.b64encode(buffered.getvalue()).decode()
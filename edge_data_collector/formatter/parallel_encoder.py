@@ -0,0 +1,313 @@
+import base64
+import logging
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Future
+from io import BytesIO
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Set up logging for error handling
+logger = logging.getLogger(__name__)
+
+
+class SharedFrameRing:
+    """Fixed-size slots inside one ``multiprocessing.shared_memory`` block.
+
+    Frames and encoded results are exchanged between processes by writing them
+    into a slot and passing only the slot index and length through a queue, so
+    megabyte buffers are never pickled.
+    """
+
+    def __init__(self, slot_count, slot_size, name=None):
+        """
+        Args:
+            slot_count (int): Number of slots.
+            slot_size (int): Size of each slot in bytes.
+            name (str | None): Attach to an existing block instead of creating one.
+        """
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=slot_count * slot_size)
+        else:
+            self._shm = _attach_shared_memory(name)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def slot(self, index):
+        """
+        Args:
+            index (int): Slot index.
+
+        Returns:
+            memoryview: Writable view of the slot.
+        """
+        start = index * self.slot_size
+        return self._shm.buf[start:start + self.slot_size]
+
+    def frame_view(self, index, shape, dtype=np.uint8):
+        """Return a numpy array backed by the slot (no copy)."""
+        return np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=index * self.slot_size)
+
+    def close(self):
+        """Detach from the block, and free it if this ring created it."""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no ``track`` argument
+        shm = shared_memory.SharedMemory(name=name)
+        # Only the creating process may unlink the block; stop this process's
+        # resource tracker from removing it when the worker exits.
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _encoder_worker(frame_ring_name, result_ring_name, slot_count, frame_slot_size, result_slot_size,
+                    tasks, results, preprocessor):
+    """Encode frames from the frame ring into Base64 JPEGs in the result ring."""
+    frames = SharedFrameRing(slot_count, frame_slot_size, name=frame_ring_name)
+    encoded = SharedFrameRing(slot_count, result_slot_size, name=result_ring_name)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            job_id, slot = task[0], task[1]
+            try:
+                length = _encode_task(frames, encoded, task, preprocessor)
+                results.put((job_id, slot, length, None))
+            except Exception as e:
+                results.put((job_id, slot, 0, f"{type(e).__name__}: {e}"))
+    finally:
+        frames.close()
+        encoded.close()
+
+
+def _encode_task(frames, encoded, task, preprocessor):
+    from PIL import Image
+
+    _, slot, shape, dtype, options = task
+    frame = frames.frame_view(slot, shape, np.dtype(dtype))
+    if options.get("save_path"):
+        # Full-resolution copy for on-demand fetches, before any preprocessing.
+        Image.fromarray(frame).save(options["save_path"], format="JPEG", quality=95)
+    img = Image.fromarray(preprocessor.process(frame) if preprocessor is not None else frame)
+    if options.get("thumbnail_size"):
+        img.thumbnail(tuple(options["thumbnail_size"]))
+    buffered = BytesIO()
+    if options.get("quality") is None:
+        img.save(buffered, format="JPEG")
+    else:
+        img.save(buffered, format="JPEG", quality=options["quality"])
+    data = base64.b64encode(buffered.getvalue())
+    if len(data) > encoded.slot_size:
+        raise ValueError(f"Encoded frame ({len(data)} bytes) exceeds result slot size")
+    encoded.slot(slot)[:len(data)] = data
+    return len(data)
+
+
+class ParallelEncoder:
+    """Encodes frames to Base64 JPEG in a pool of worker processes.
+
+    The parent copies each frame into a free slot of a shared-memory frame ring
+    and queues a tiny task descriptor for the least busy worker. The worker
+    encodes the frame and writes the Base64 text into the matching slot of a
+    shared-memory result ring. A collector thread in the parent turns finished
+    slots back into strings and resolves the ``Future`` returned by ``submit``.
+    When every slot is busy, ``submit`` blocks, which throttles capture to the
+    encoders' throughput.
+
+    Workers are checked every ``health_check_interval`` seconds. When one has
+    died (e.g. OOM-killed mid-encode), the futures of its pending frames fail
+    with ``RuntimeError``, their slots are freed and the worker is restarted,
+    so neither ``submit`` nor waiting callers hang.
+    """
+
+    def __init__(self, workers=2, frame_shape=(1080, 1920, 3), slots=None, preprocessor=None,
+                 health_check_interval=1.0):
+        """
+        Args:
+            workers (int): Number of encoder processes.
+            frame_shape (tuple[int, ...]): Largest frame shape (uint8) to be encoded.
+            slots (int | None): Number of ring slots; defaults to two per worker.
+            preprocessor (FramePreprocessor | None): Applied in the workers
+                before encoding.
+            health_check_interval (float): Seconds between checks for dead workers.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.slot_count = slots or 2 * workers
+        self.frame_slot_size = int(np.prod(frame_shape))
+        # Base64 grows data by 4/3; a JPEG never meaningfully exceeds raw size.
+        self.result_slot_size = self.frame_slot_size * 4 // 3 + 4
+        self.health_check_interval = health_check_interval
+        self.restarts = 0
+
+        self._frames = SharedFrameRing(self.slot_count, self.frame_slot_size)
+        self._encoded = SharedFrameRing(self.slot_count, self.result_slot_size)
+        self._context = multiprocessing.get_context("spawn")
+        self._preprocessor = preprocessor
+        self._results = self._context.Queue()
+        self._free_slots = queue.Queue()
+        for slot in range(self.slot_count):
+            self._free_slots.put(slot)
+        # job id -> (future, worker index, slot)
+        self._jobs = {}
+        self._next_job_id = 0
+        self._closing = False
+        self._lock = threading.Lock()
+
+        self._workers = [None] * workers
+        self._task_queues = [None] * workers
+        for index in range(workers):
+            self._start_worker(index)
+        self._collector = threading.Thread(target=self._collect_results, name="encoder-results", daemon=True)
+        self._collector.start()
+
+    def _start_worker(self, index):
+        # Each worker has its own task queue, so the parent knows which frames a
+        # dead worker took with it.
+        tasks = self._context.Queue()
+        process = self._context.Process(
+            target=_encoder_worker,
+            args=(
+                self._frames.name,
+                self._encoded.name,
+                self.slot_count,
+                self.frame_slot_size,
+                self.result_slot_size,
+                tasks,
+                self._results,
+                self._preprocessor,
+            ),
+            name=f"encoder-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[index] = process
+        self._task_queues[index] = tasks
+
+    def submit(self, frame, quality=None, thumbnail_size=None, save_path=None):
+        """
+        Queue a frame for encoding.
+
+        Args:
+            frame (numpy.ndarray): HxWx3 uint8 RGB frame.
+            quality (int | None): JPEG quality; Pillow's default when None.
+            thumbnail_size (tuple[int, int] | None): Encode a thumbnail bounded by
+                this size instead of the full frame.
+            save_path (str | None): Also write the full-resolution JPEG here.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the Base64-encoded JPEG string,
+            or fails with ``RuntimeError`` if encoding failed or its worker died.
+        """
+        frame = np.asarray(frame, dtype=np.uint8)
+        if frame.nbytes > self.frame_slot_size:
+            raise ValueError(f"Frame of shape {frame.shape} does not fit the configured frame_shape")
+
+        while True:
+            try:
+                slot = self._free_slots.get(timeout=self.health_check_interval)
+                break
+            except queue.Empty:
+                self.check_workers()
+        self._frames.frame_view(slot, frame.shape)[...] = frame
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.check_workers()
+        options = {"quality": quality, "thumbnail_size": thumbnail_size, "save_path": save_path}
+        with self._lock:
+            job_id = self._next_job_id
+            self._next_job_id += 1
+            worker = min(range(len(self._workers)), key=self._load)
+            self._jobs[job_id] = (future, worker, slot)
+            self._task_queues[worker].put((job_id, slot, frame.shape, frame.dtype.str, options))
+        return future
+
+    def encode(self, frame, **options):
+        """Encode a frame and wait for the Base64 JPEG string."""
+        return self.submit(frame, **options).result()
+
+    def check_workers(self):
+        """
+        Fails the pending frames of dead workers and restarts them.
+
+        Returns:
+            int: Number of workers restarted.
+        """
+        failed = []
+        restarted = 0
+        with self._lock:
+            if self._closing:
+                return 0
+            for index, process in enumerate(self._workers):
+                if process.is_alive():
+                    continue
+                logger.error("Encoder worker %s exited with code %s; restarting it", process.name, process.exitcode)
+                error = RuntimeError(f"Encoder worker {process.name} exited with code {process.exitcode}")
+                for job_id in [job_id for job_id, job in self._jobs.items() if job[1] == index]:
+                    future, _, slot = self._jobs.pop(job_id)
+                    self._free_slots.put(slot)
+                    failed.append((future, error))
+                self._task_queues[index].close()
+                self._start_worker(index)
+                restarted += 1
+            self.restarts += restarted
+        for future, error in failed:
+            future.set_exception(error)
+        return restarted
+
+    def close(self, timeout=5.0):
+        """Stop the workers and release the shared memory."""
+        with self._lock:
+            self._closing = True
+        for tasks in self._task_queues:
+            tasks.put(None)
+        for process in self._workers:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._collector.join(timeout)
+        self._frames.close()
+        self._encoded.close()
+
+    def _load(self, index):
+        return sum(1 for job in self._jobs.values() if job[1] == index)
+
+    def _collect_results(self):
+        while True:
+            try:
+                result = self._results.get(timeout=self.health_check_interval)
+            except queue.Empty:
+                self.check_workers()
+                continue
+            if result is None:
+                break
+            job_id, slot, length, error = result
+            with self._lock:
+                job = self._jobs.pop(job_id, None)
+            if job is None:
+                # Already failed by check_workers, which also freed the slot.
+                continue
+            future = job[0]
+            data = None if error else bytes(self._encoded.slot(slot)[:length]).decode("ascii")
+            self._free_slots.put(slot)
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(data)
@@ -17,3 +17,17 @@ class MetadataHandler:
         return metadata
 
 
+
+    @staticmethod
+    def make_frame_id(camera_id, capture_ts):
+        """
+        Build the identifier used to reference a captured frame.
+
+        Args:
+            camera_id (str): Identifier of the capturing camera.
+            capture_ts (float): Capture timestamp in seconds since the Unix epoch.
+
+        Returns:
+            str: Frame id of the form ``<camera_id>-<capture time in ms>``.
+        """
+        return f"{camera_id}-{int(round(float(capture_ts) * 1000))}"
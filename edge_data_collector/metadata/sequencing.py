@@ -0,0 +1,174 @@
+import threading
+import uuid
+from collections import Counter
+
+
+def new_session_id():
+    """Random id identifying one run of the collector."""
+    return uuid.uuid4().hex[:12]
+
+
+class StreamSequencer:
+    """Stamps payload metadata with per-stream sequence numbers.
+
+    Each stream (``metadata[stream_key]``, the camera by default) counts
+    ``seq`` up from 1 in the order samples are created; ``session_id``
+    changes on every restart, so receivers can tell a reboot from a wrap or a
+    gap. Numbers are assigned before the publish queue, so frames the
+    collector drops later show up as gaps at the receiver.
+    """
+
+    def __init__(self, session_id=None, stream_key="camera_id"):
+        """
+        Args:
+            session_id (str | None): Session id; a new random id when None.
+            stream_key (str): Metadata key identifying a stream.
+        """
+        self.session_id = session_id or new_session_id()
+        self.stream_key = stream_key
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def stamp(self, metadata):
+        """
+        Sets ``metadata["session_id"]`` and ``metadata["seq"]``.
+        Args:
+            metadata (dict): Metadata of one sample; modified in place.
+        Returns:
+            dict: The same metadata.
+        """
+        stream = metadata.get(self.stream_key)
+        with self._lock:
+            seq = self._counters.get(stream, 0) + 1
+            self._counters[stream] = seq
+        metadata["session_id"] = self.session_id
+        metadata["seq"] = seq
+        return metadata
+
+
+class _StreamLoss:
+    def __init__(self, seq):
+        self.first = seq
+        self.highest = seq
+        self.received = 1
+        self.duplicates = 0
+        self.reordered = 0
+        self.expired = 0
+        self.late = 0
+        self.missing = set()
+        self.gaps = Counter()
+
+
+class SequenceLossTracker:
+    """Consumer-side loss, reorder and gap accounting for sequenced payloads.
+
+    Per ``(session_id, stream)``, a sequence number above the highest seen so
+    far opens a gap (recorded by length in ``gaps``); a number that fills an
+    open gap counts as reordered, one seen before as a duplicate. Gaps older
+    than ``reorder_window`` numbers are considered lost for good, which bounds
+    the memory per stream; payloads arriving after that are counted as late.
+
+    Example::
+
+        tracker = SequenceLossTracker()
+
+        def on_message(client, userdata, msg):
+            tracker.update(json.loads(msg.payload))
+
+        print(tracker.report())
+    """
+
+    def __init__(self, stream_key="camera_id", reorder_window=1024):
+        """
+        Args:
+            stream_key (str): Metadata key identifying a stream.
+            reorder_window (int): Sequence numbers a late payload may trail
+                the highest one and still count as reordered instead of lost.
+        """
+        self.stream_key = stream_key
+        self.reorder_window = reorder_window
+        self.unsequenced = 0
+        self._streams = {}
+
+    def update(self, payload):
+        """
+        Args:
+            payload (dict): Received payload.
+        Returns:
+            str: ``"new"``, ``"in_order"``, ``"gap"``, ``"reordered"``,
+            ``"late"``, ``"duplicate"`` or ``"unsequenced"``.
+        """
+        metadata = payload.get("metadata") or {}
+        seq = metadata.get("seq")
+        if not isinstance(seq, int) or isinstance(seq, bool):
+            self.unsequenced += 1
+            return "unsequenced"
+        key = (metadata.get("session_id"), metadata.get(self.stream_key))
+        stream = self._streams.get(key)
+        if stream is None:
+            self._streams[key] = _StreamLoss(seq)
+            return "new"
+
+        if seq == stream.highest + 1:
+            stream.highest = seq
+            stream.received += 1
+            return "in_order"
+        if seq > stream.highest:
+            stream.gaps[seq - stream.highest - 1] += 1
+            # Only the last reorder_window numbers can still arrive; the rest of
+            # a large jump is lost at once, so memory stays bounded.
+            cutoff = seq - self.reorder_window
+            stream.expired += max(0, cutoff - (stream.highest + 1))
+            stream.missing.update(range(max(stream.highest + 1, cutoff), seq))
+            stream.highest = seq
+            stream.received += 1
+            self._expire(stream)
+            return "gap"
+        if seq in stream.missing:
+            stream.missing.discard(seq)
+            stream.received += 1
+            stream.reordered += 1
+            return "reordered"
+        if stream.highest - seq > self.reorder_window:
+            stream.late += 1
+            return "late"
+        if seq < stream.first:
+            # Arrived ahead of the first payload we saw.
+            stream.missing.update(range(seq + 1, stream.first))
+            stream.first = seq
+            stream.received += 1
+            stream.reordered += 1
+            return "reordered"
+        stream.duplicates += 1
+        return "duplicate"
+
+    def _expire(self, stream):
+        cutoff = stream.highest - self.reorder_window
+        if stream.missing and min(stream.missing) < cutoff:
+            expired = {seq for seq in stream.missing if seq < cutoff}
+            stream.missing -= expired
+            stream.expired += len(expired)
+
+    def report(self):
+        """
+        Returns:
+            dict: Per ``"<session_id>/<stream>"``: ``received``, ``expected``,
+            ``lost``, ``loss_rate``, ``reordered``, ``late``, ``duplicates``, ``gaps``
+            (gap length -> count) and ``max_gap``.
+        """
+        report = {}
+        for (session_id, stream_id), stream in self._streams.items():
+            expected = stream.highest - stream.first + 1
+            lost = len(stream.missing) + stream.expired
+            report[f"{session_id}/{stream_id}"] = {
+                "received": stream.received,
+                "expected": expected,
+                "lost": lost,
+                "loss_rate": round(lost / expected, 4),
+                "reordered": stream.reordered,
+                "late": stream.late,
+                "duplicates": stream.duplicates,
+                "gaps": dict(sorted(stream.gaps.items())),
+                "max_gap": max(stream.gaps, default=0),
+            }
+        return report
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Metadata key of the per-sample trace block
+TRACE_KEY = "trace"
+
+
+class StageTrace:
+    """Monotonic-clock durations of the stages one sample passes through.
+
+    ``as_metadata()`` gives the compact block attached as
+    ``metadata["trace"]``: stage name -> milliseconds, in the order the stages
+    ran, e.g. ``{"capture": 41.2, "wait": 0.3, "sensor": 180.5, "format": 22.9}``.
+    Durations only, so the block stays meaningful on hosts with another clock.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        Args:
+            clock (callable): Monotonic clock in seconds.
+        """
+        self.clock = clock
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block as stage ``name``."""
+        started = self.clock()
+        try:
+            yield self
+        finally:
+            self.add(name, self.clock() - started)
+
+    def add(self, name, seconds):
+        """Adds ``seconds`` to stage ``name`` (repeated stages accumulate)."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def as_metadata(self):
+        """
+        Returns:
+            dict[str, float]: Stage -> milliseconds, rounded to 0.1 ms.
+        """
+        return {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+
+
+class LatencySummary:
+    """Local aggregate of sample traces: percentiles per stage.
+
+    Keeps the last ``window`` durations of each stage; ``total`` is derived
+    per recorded trace as the sum of its stages.
+    """
+
+    def __init__(self, window=1024):
+        """
+        Args:
+            window (int): Durations kept per stage.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self.count = 0
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, trace):
+        """
+        Args:
+            trace (dict[str, float]): Stage -> milliseconds, e.g. a
+                ``metadata["trace"]`` block plus locally measured stages.
+        """
+        with self._lock:
+            self.count += 1
+            for name, value in list(trace.items()) + [("total", sum(trace.values()))]:
+                self._samples.setdefault(name, deque(maxlen=self.window)).append(value)
+
+    def summary(self):
+        """
+        Returns:
+            dict: Stage -> ``{"count", "mean", "p50", "p95", "p99", "max"}`` in ms.
+        """
+        with self._lock:
+            samples = {name: np.array(values) for name, values in self._samples.items()}
+        summary = {}
+        for name, values in samples.items():
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            summary[name] = {
+                "count": len(values),
+                "mean": round(float(values.mean()), 1),
+                "p50": round(float(p50), 1),
+                "p95": round(float(p95), 1),
+                "p99": round(float(p99), 1),
+                "max": round(float(values.max()), 1),
+            }
+        return summary
+
+    def format(self):
+        """Returns the summary as a printable table."""
+        lines = [f"{'stage':<10}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for name, stats in self.summary().items():
+            lines.append(
+                f"{name:<10}{stats['count']:>7}{stats['mean']:>9}{stats['p50']:>9}"
+                f"{stats['p95']:>9}{stats['p99']:>9}{stats['max']:>9}"
+            )
+        return "\n".join(lines)
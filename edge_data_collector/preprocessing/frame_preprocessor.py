@@ -0,0 +1,216 @@
+import logging
+import os
+
+import numpy as np
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:  # Fall back to numpy/Pillow implementations
+    CV2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class FramePreprocessor:
+    """Crops, resizes and optionally undistorts captured frames.
+
+    The stage runs on the decoded pixel array right before JPEG encoding so the
+    collector ships images at the downstream model's input size instead of full
+    1080p frames. Steps are applied in this order:
+
+    1. Lens undistortion (optional) using remap tables that are computed once per
+       frame shape, restricted to the ROI, and optionally persisted to disk.
+    2. Crop to the region of interest ``(x, y, width, height)``.
+    3. Resize to ``target_size`` ``(width, height)``.
+
+    OpenCV is used when available; otherwise numpy nearest-neighbour remapping
+    and Pillow resizing are used.
+    """
+
+    def __init__(self, roi=None, target_size=None, camera_matrix=None, dist_coeffs=None, remap_cache_path=None):
+        """
+        Args:
+            roi (tuple[int, int, int, int] | None): Region of interest as
+                (x, y, width, height) in source pixel coordinates.
+            target_size (tuple[int, int] | None): Output (width, height).
+            camera_matrix (list | None): 3x3 intrinsic matrix. Enables
+                undistortion together with ``dist_coeffs``.
+            dist_coeffs (list | None): Distortion coefficients (k1, k2, p1, p2[, k3]).
+            remap_cache_path (str | None): ``.npz`` file used to persist the
+                undistortion remap tables between runs.
+        """
+        self.roi = tuple(int(v) for v in roi) if roi else None
+        self.target_size = tuple(int(v) for v in target_size) if target_size else None
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64) if camera_matrix is not None else None
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).ravel() if dist_coeffs is not None else None
+        self.remap_cache_path = remap_cache_path
+        self._remap_tables = {}
+
+        if self.roi and (self.roi[2] <= 0 or self.roi[3] <= 0):
+            raise ValueError("ROI width and height must be positive")
+        if self.target_size and (self.target_size[0] <= 0 or self.target_size[1] <= 0):
+            raise ValueError("target_size must be positive")
+        if (self.camera_matrix is None) != (self.dist_coeffs is None):
+            raise ValueError("camera_matrix and dist_coeffs must be given together")
+
+    @property
+    def undistort(self):
+        return self.camera_matrix is not None
+
+    @property
+    def is_active(self):
+        """True when at least one preprocessing step is configured."""
+        return bool(self.roi or self.target_size or self.undistort)
+
+    def describe(self):
+        """
+        Summarise the applied steps for inclusion in payload metadata.
+
+        Returns:
+            dict: ROI, target size and whether undistortion was applied.
+        """
+        return {
+            "roi": list(self.roi) if self.roi else None,
+            "target_size": list(self.target_size) if self.target_size else None,
+            "undistorted": self.undistort,
+        }
+
+    def process(self, frame):
+        """
+        Apply the configured steps to a frame.
+
+        Args:
+            frame (numpy.ndarray): HxW or HxWxC uint8 image array.
+
+        Returns:
+            numpy.ndarray: Preprocessed, C-contiguous image array.
+        """
+        height, width = frame.shape[:2]
+        if self.roi:
+            x, y, w, h = self._clip_roi(width, height)
+        else:
+            x, y, w, h = 0, 0, width, height
+
+        if self.undistort:
+            frame = self._remap(frame, (height, width), (x, y, w, h))
+        else:
+            frame = frame[y:y + h, x:x + w]
+
+        if self.target_size and (frame.shape[1], frame.shape[0]) != self.target_size:
+            frame = self._resize(frame, self.target_size)
+
+        return np.ascontiguousarray(frame)
+
+    def process_image(self, img):
+        """
+        Apply the configured steps to a Pillow image.
+
+        Args:
+            img (PIL.Image.Image): Source image.
+
+        Returns:
+            PIL.Image.Image: Preprocessed image.
+        """
+        from PIL import Image
+
+        return Image.fromarray(self.process(np.asarray(img)))
+
+    def _clip_roi(self, width, height):
+        x, y, w, h = self.roi
+        x = min(max(x, 0), width - 1)
+        y = min(max(y, 0), height - 1)
+        return x, y, min(w, width - x), min(h, height - y)
+
+    def _remap(self, frame, source_shape, roi):
+        key = (source_shape, roi)
+        tables = self._remap_tables.get(key)
+        if tables is None:
+            tables = self._build_remap_tables(source_shape, roi)
+            self._remap_tables[key] = tables
+
+        if CV2_AVAILABLE:
+            map1, map2 = tables
+            return cv2.remap(frame, map1, map2, interpolation=cv2.INTER_LINEAR)
+        rows, cols = tables
+        return frame[rows, cols]
+
+    def _build_remap_tables(self, source_shape, roi):
+        map_x, map_y = self._load_cached_maps(source_shape, roi)
+        if map_x is None:
+            map_x, map_y = self._compute_undistort_maps(roi)
+            self._save_cached_maps(source_shape, roi, map_x, map_y)
+
+        if CV2_AVAILABLE:
+            # Fixed-point maps make cv2.remap considerably faster than float maps.
+            return cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+
+        height, width = source_shape
+        rows = np.clip(np.rint(map_y), 0, height - 1).astype(np.intp)
+        cols = np.clip(np.rint(map_x), 0, width - 1).astype(np.intp)
+        return rows, cols
+
+    def _compute_undistort_maps(self, roi):
+        """Map each output pixel of the ROI to its source pixel in the distorted frame."""
+        x0, y0, w, h = roi
+        fx, fy = self.camera_matrix[0, 0], self.camera_matrix[1, 1]
+        cx, cy = self.camera_matrix[0, 2], self.camera_matrix[1, 2]
+        k1, k2, p1, p2, k3 = (list(self.dist_coeffs) + [0.0] * 5)[:5]
+
+        u, v = np.meshgrid(
+            np.arange(x0, x0 + w, dtype=np.float64),
+            np.arange(y0, y0 + h, dtype=np.float64),
+        )
+        x = (u - cx) / fx
+        y = (v - cy) / fy
+        r2 = x * x + y * y
+        radial = 1.0 + r2 * (k1 + r2 * (k2 + r2 * k3))
+        x_distorted = x * radial + 2.0 * p1 * x * y + p2 * (r2 + 2.0 * x * x)
+        y_distorted = y * radial + p1 * (r2 + 2.0 * y * y) + 2.0 * p2 * x * y
+
+        map_x = (fx * x_distorted + cx).astype(np.float32)
+        map_y = (fy * y_distorted + cy).astype(np.float32)
+        return map_x, map_y
+
+    def _cache_signature(self, source_shape, roi):
+        return np.concatenate([
+            np.asarray(source_shape, dtype=np.float64),
+            np.asarray(roi, dtype=np.float64),
+            self.camera_matrix.ravel(),
+            self.dist_coeffs,
+        ])
+
+    def _load_cached_maps(self, source_shape, roi):
+        if not self.remap_cache_path or not os.path.exists(self.remap_cache_path):
+            return None, None
+        try:
+            with np.load(self.remap_cache_path) as cached:
+                signature = self._cache_signature(source_shape, roi)
+                if cached["signature"].shape == signature.shape and np.allclose(cached["signature"], signature):
+                    return cached["map_x"], cached["map_y"]
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning("Ignoring unreadable remap cache %s: %s", self.remap_cache_path, e)
+        return None, None
+
+    def _save_cached_maps(self, source_shape, roi, map_x, map_y):
+        if not self.remap_cache_path:
+            return
+        try:
+            directory = os.path.dirname(self.remap_cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.remap_cache_path, "wb") as f:
+                np.savez(f, signature=self._cache_signature(source_shape, roi), map_x=map_x, map_y=map_y)
+        except OSError as e:
+            logger.warning("Failed to persist remap cache: %s", e)
+
+    @staticmethod
+    def _resize(frame, target_size):
+        if CV2_AVAILABLE:
+            shrinking = target_size[0] < frame.shape[1] or target_size[1] < frame.shape[0]
+            interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR
+            return cv2.resize(frame, target_size, interpolation=interpolation)
+
+        from PIL import Image
+
+        return np.asarray(Image.fromarray(frame).resize(target_size, Image.BILINEAR))
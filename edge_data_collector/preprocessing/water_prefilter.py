@@ -0,0 +1,130 @@
+import numpy as np
+
+
+class WaterLikelihoodScorer:
+    """Cheap heuristic estimate of how likely a frame shows standing water.
+
+    The score is not a detector; it only orders frames so that likely flood
+    frames are published first and at higher quality on a congested link. It
+    combines three statistics computed on a heavily downsampled frame:
+
+    * **Water-coloured smooth area** – fraction of pixels in the ground region
+      that are smooth (low local gradient) and either grey/low-saturation,
+      muddy brown, or bluish.
+    * **Reflectance** – fraction of bright, low-saturation pixels that look like
+      sky reflections or specular highlights on a water surface.
+    * **Texture** – mean gradient magnitude; dry streets, grass and gravel are
+      considerably more textured than water.
+
+    Everything is vectorised numpy on an image of roughly ``analysis_size``
+    pixels, so scoring costs a few milliseconds even on a Raspberry Pi.
+    """
+
+    # Weights of the individual statistics in the final score.
+    WATER_AREA_WEIGHT = 0.55
+    REFLECTANCE_WEIGHT = 0.25
+    SMOOTHNESS_WEIGHT = 0.20
+
+    def __init__(self, analysis_size=(160, 90), ground_fraction=0.6, smooth_gradient=12.0, texture_scale=30.0):
+        """
+        Args:
+            analysis_size (tuple[int, int]): Approximate (width, height) the frame
+                is reduced to before scoring.
+            ground_fraction (float): Lower fraction of the frame treated as the
+                ground region where standing water can appear.
+            smooth_gradient (float): Gradient magnitude (0-255 scale) below which a
+                pixel counts as smooth.
+            texture_scale (float): Mean gradient magnitude that maps to "fully
+                textured" (smoothness 0).
+        """
+        if not 0 < ground_fraction <= 1:
+            raise ValueError("ground_fraction must be in (0, 1]")
+        self.analysis_size = tuple(analysis_size)
+        self.ground_fraction = ground_fraction
+        self.smooth_gradient = smooth_gradient
+        self.texture_scale = texture_scale
+
+    def score_image(self, image_path):
+        """
+        Score an image file.
+
+        Args:
+            image_path (str): Path to the image file.
+
+        Returns:
+            float: Water likelihood in [0, 1].
+        """
+        from PIL import Image
+
+        with Image.open(image_path) as img:
+            # JPEG frames are decoded directly at 1/2-1/8 scale.
+            img.draft("RGB", self.analysis_size)
+            img = img.convert("RGB")
+            img.thumbnail(self.analysis_size)
+            return self.score(np.asarray(img))
+
+    def score(self, frame):
+        """
+        Score an RGB frame.
+
+        Args:
+            frame (numpy.ndarray): HxWx3 uint8 RGB array of any size.
+
+        Returns:
+            float: Water likelihood in [0, 1].
+        """
+        frame = self._downsample(frame)
+        ground = frame[int(frame.shape[0] * (1.0 - self.ground_fraction)):].astype(np.float32)
+        if ground.shape[0] < 2 or ground.shape[1] < 2:
+            return 0.0
+
+        red, green, blue = ground[..., 0], ground[..., 1], ground[..., 2]
+        value = ground.max(axis=2)
+        saturation = (value - ground.min(axis=2)) / np.maximum(value, 1.0)
+        brightness = value / 255.0
+
+        gray = 0.299 * red + 0.587 * green + 0.114 * blue
+        grad_x = np.abs(np.diff(gray, axis=1))[:-1, :]
+        grad_y = np.abs(np.diff(gray, axis=0))[:, :-1]
+        gradient = grad_x + grad_y
+        smooth = gradient < self.smooth_gradient
+
+        # Colour classes are evaluated on the same (H-1)x(W-1) grid as the gradient.
+        red, green, blue = red[:-1, :-1], green[:-1, :-1], blue[:-1, :-1]
+        saturation, brightness = saturation[:-1, :-1], brightness[:-1, :-1]
+        greyish = (saturation < 0.25) & (brightness > 0.15) & (brightness < 0.9)
+        muddy = (red >= green) & (green >= blue) & (saturation < 0.55) & (brightness > 0.15)
+        bluish = (blue > red) & (blue >= green)
+        water_area = np.mean(smooth & (greyish | muddy | bluish))
+
+        reflectance = np.mean((brightness > 0.8) & (saturation < 0.15))
+        smoothness = 1.0 - min(float(np.mean(gradient)) / self.texture_scale, 1.0)
+
+        score = (
+            self.WATER_AREA_WEIGHT * water_area
+            + self.REFLECTANCE_WEIGHT * min(reflectance * 4.0, 1.0)
+            + self.SMOOTHNESS_WEIGHT * smoothness
+        )
+        return round(float(np.clip(score, 0.0, 1.0)), 3)
+
+    def _downsample(self, frame):
+        target_width, target_height = self.analysis_size
+        step = max(1, min(frame.shape[1] // target_width, frame.shape[0] // target_height))
+        return frame[::step, ::step, :3]
+
+    @staticmethod
+    def quality_for(score, quality_range):
+        """
+        Map a score to a JPEG quality.
+
+        Args:
+            score (float | None): Water likelihood in [0, 1].
+            quality_range (tuple[int, int]): (low, high) quality bounds.
+
+        Returns:
+            int: Quality interpolated between the bounds.
+        """
+        low, high = quality_range
+        if score is None:
+            return int(round((low + high) / 2))
+        return int(round(low + (high - low) * min(max(score, 0.0), 1.0)))
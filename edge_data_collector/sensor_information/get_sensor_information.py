@@ -15,7 +15,8 @@ if __name__ == "__main__":
     sensor_id = os.getenv("NETATMO_SENSOR_ID_INDOOR")
     access_token = os.getenv("NETATMO_ACCESS_TOKEN")
 
-    url = "https://api.netatmo.com/api/getstationsdata"
+    base_url = os.getenv("NETATMO_BASE_URL", "https://api.netatmo.com").rstrip("/")
+    url = f"{base_url}/api/getstationsdata"
     headers = {
         'Authorization': f'Bearer {access_token}'
     }
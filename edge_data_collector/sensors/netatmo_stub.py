@@ -0,0 +1,332 @@
+"""
+Local stand-in for the Netatmo API endpoints used by ``SensorHandler``.
+
+Implements ``/oauth2/token`` (refresh_token and authorization_code grants) and
+``/api/getstationsdata`` with scripted latency, token expiry, 401s and rate
+limits, so the real HTTP path can be tested and benchmarked offline::
+
+    python -m edge_data_collector.sensors.netatmo_stub --port 8765 --token-ttl 60
+
+then set ``NETATMO_BASE_URL=http://127.0.0.1:8765`` and the printed tokens in
+``.env``. Tests use ``NetatmoStub`` directly::
+
+    with NetatmoStub(token_ttl=1) as stub:
+        handler = SensorHandler(..., base_url=stub.url,
+                                access_token=stub.access_token, refresh_token=stub.refresh_token)
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+TOKEN_PATH = "/oauth2/token"
+STATIONS_PATH = "/api/getstationsdata"
+
+# Error bodies in the shape the real API returns them
+_API_ERRORS = {
+    400: {"code": 21, "message": "Invalid request"},
+    401: {"code": 2, "message": "Invalid access token"},
+    403: {"code": 3, "message": "Access token expired"},
+    404: {"code": 9, "message": "Device not found"},
+    429: {"code": 26, "message": "User usage reached"},
+    500: {"code": 1, "message": "Internal error"},
+    503: {"code": 1, "message": "Service unavailable"},
+}
+
+
+def default_stations(now=None):
+    """
+    Returns:
+        list[dict]: ``body.devices`` of one station with an indoor, outdoor
+        and rain module, matching the ids in ``.env.example``.
+    """
+    now = int(now if now is not None else time.time())
+    return [{
+        "_id": "70:ee:50:b9:07:c2",
+        "type": "NAMain",
+        "station_name": "Stub station",
+        "dashboard_data": {"time_utc": now, "Temperature": 21.5, "Humidity": 48, "Pressure": 1008.2, "CO2": 612},
+        "modules": [
+            {"_id": "02:00:00:b9:1c:18", "type": "NAModule1", "module_name": "Outdoor",
+             "dashboard_data": {"time_utc": now, "Temperature": 9.8, "Humidity": 91}},
+            {"_id": "05:00:00:0a:3e:11", "type": "NAModule3", "module_name": "Rain gauge",
+             "dashboard_data": {"time_utc": now, "Rain": 0.4, "sum_rain_1": 2.1, "sum_rain_24": 14.0}},
+        ],
+    }]
+
+
+class NetatmoStub:
+    """Threaded HTTP server emulating the Netatmo token and station endpoints.
+
+    Behaviour is scripted through the constructor and can be changed while
+    the server runs:
+
+    * ``latency``: seconds added to every response, or ``(low, high)`` for
+      uniform jitter;
+    * ``token_ttl``: seconds an access token stays valid; expired tokens get
+      the API's 403 "Access token expired" (``expire_tokens()`` forces it);
+    * ``rate_limit`` / ``rate_window``: requests allowed per sliding window
+      before 429 "User usage reached";
+    * ``unauthorized_every``: every Nth station request gets a 401;
+    * ``fail_next(path, *statuses)``: the next requests to ``path`` return the
+      given statuses in order.
+
+    Refresh tokens rotate on every refresh, as with the real API; an unknown
+    refresh token gets ``invalid_grant``. Every request is recorded in
+    ``requests`` as ``(method, path, status)``.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, stations=None, latency=0.0, token_ttl=10800,
+                 rate_limit=None, rate_window=10.0, unauthorized_every=0,
+                 access_token="stub-access-token", refresh_token="stub-refresh-token"):
+        """
+        Args:
+            host (str): Interface to bind.
+            port (int): Port to bind; 0 picks a free port (see ``url``).
+            stations (list[dict] | callable | None): ``body.devices`` returned by
+                getstationsdata, or a callable producing it per request;
+                ``default_stations`` when None.
+            latency (float | tuple[float, float]): Response delay in seconds.
+            token_ttl (float): Access token lifetime in seconds.
+            rate_limit (int | None): Requests allowed per ``rate_window``.
+            rate_window (float): Rate limit window in seconds.
+            unauthorized_every (int): Answer every Nth station request with 401 (0 = never).
+            access_token (str): Initially valid access token.
+            refresh_token (str): Initially valid refresh token.
+        """
+        self.stations = stations if stations is not None else default_stations
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.unauthorized_every = unauthorized_every
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.requests = []
+
+        self._lock = threading.Lock()
+        self._access_tokens = {access_token: time.monotonic() + token_ttl}
+        self._refresh_tokens = {refresh_token}
+        self._token_ids = itertools.count(1)
+        self._scripted = {}
+        self._recent = deque()
+        self._station_requests = 0
+        self._thread = None
+
+        self._server = ThreadingHTTPServer((host, port), _StubRequestHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+
+    @property
+    def url(self):
+        """Base URL to pass as ``SensorHandler(base_url=...)``."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def counts(self):
+        """Counter of ``(path, status)`` over all recorded requests."""
+        with self._lock:
+            return Counter((path, status) for _, path, status in self.requests)
+
+    def start(self):
+        """Serves requests on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="netatmo-stub", daemon=True)
+            self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves requests on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """Stops serving and releases the port."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, path, *statuses):
+        """
+        Scripts the statuses of the next requests to an endpoint.
+        Args:
+            path (str): ``TOKEN_PATH`` or ``STATIONS_PATH``.
+            *statuses (int): HTTP statuses, returned in order.
+        """
+        with self._lock:
+            self._scripted.setdefault(path, deque()).extend(statuses)
+
+    def expire_tokens(self):
+        """Expires every issued access token."""
+        with self._lock:
+            self._access_tokens = dict.fromkeys(self._access_tokens, 0.0)
+
+    def handle(self, method, path, headers, params):
+        """
+        Produces the response for one request.
+        Returns:
+            tuple[int, dict, dict]: Status, JSON body and extra headers.
+        """
+        delay = random.uniform(*self.latency) if isinstance(self.latency, (tuple, list)) else self.latency
+        if delay:
+            time.sleep(delay)
+
+        with self._lock:
+            status, body, extra = self._respond(method, path, headers, params)
+            self.requests.append((method, path, status))
+        return status, body, extra
+
+    def _respond(self, method, path, headers, params):
+        now = time.monotonic()
+        if path not in (TOKEN_PATH, STATIONS_PATH):
+            return 404, {"error": {"code": 404, "message": "Not found"}}, {}
+        if path == TOKEN_PATH and method != "POST":
+            return 405, {"error": "invalid_request"}, {}
+
+        if self.rate_limit is not None:
+            while self._recent and self._recent[0] <= now - self.rate_window:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                retry_after = max(1, int(self._recent[0] + self.rate_window - now + 1))
+                return 429, {"error": _API_ERRORS[429]}, {"Retry-After": str(retry_after)}
+            self._recent.append(now)
+
+        scripted = self._scripted.get(path)
+        if scripted:
+            status = scripted.popleft()
+            return status, self._error_body(path, status), {}
+
+        if path == TOKEN_PATH:
+            return self._token(params, now)
+        return self._stations(headers, params, now)
+
+    def _token(self, params, now):
+        grant_type = params.get("grant_type")
+        if grant_type == "refresh_token":
+            if params.get("refresh_token") not in self._refresh_tokens:
+                return 400, {"error": "invalid_grant"}, {}
+            self._refresh_tokens.discard(params["refresh_token"])
+        elif grant_type == "authorization_code":
+            if not params.get("code"):
+                return 400, {"error": "invalid_grant"}, {}
+        else:
+            return 400, {"error": "unsupported_grant_type"}, {}
+
+        token_id = next(self._token_ids)
+        self.access_token = f"stub-access-{token_id}"
+        self.refresh_token = f"stub-refresh-{token_id}"
+        self._access_tokens[self.access_token] = now + self.token_ttl
+        self._refresh_tokens.add(self.refresh_token)
+        ttl = int(self.token_ttl)
+        return 200, {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "expires_in": ttl,
+            "expire_in": ttl,
+            "scope": ["read_station"],
+        }, {}
+
+    def _stations(self, headers, params, now):
+        self._station_requests += 1
+        authorization = headers.get("Authorization") or ""
+        token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else params.get("access_token")
+        if token not in self._access_tokens:
+            return 401, {"error": _API_ERRORS[401]}, {}
+        if self._access_tokens[token] <= now:
+            return 403, {"error": _API_ERRORS[403]}, {}
+        if self.unauthorized_every and self._station_requests % self.unauthorized_every == 0:
+            return 401, {"error": _API_ERRORS[401]}, {}
+
+        devices = self.stations() if callable(self.stations) else self.stations
+        device_id = params.get("device_id")
+        if device_id:
+            devices = [device for device in devices if device.get("_id") == device_id]
+            if not devices:
+                return 404, {"error": _API_ERRORS[404]}, {}
+        return 200, {
+            "body": {"devices": devices, "user": {"mail": "stub@example.com"}},
+            "status": "ok",
+            "time_server": int(time.time()),
+        }, {}
+
+    @staticmethod
+    def _error_body(path, status):
+        if path == TOKEN_PATH and status == 400:
+            return {"error": "invalid_request"}
+        return {"error": _API_ERRORS.get(status, {"code": status, "message": "Scripted error"})}
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            form = self.rfile.read(length).decode("utf-8")
+            params.update({key: values[-1] for key, values in parse_qs(form).items()})
+
+        status, body, extra = self.server.stub.handle(self.command, url.path, self.headers, params)
+        encoded = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        for name, value in extra.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Netatmo API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to bind.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random delay in seconds.")
+    parser.add_argument("--token-ttl", type=float, default=10800, help="Access token lifetime in seconds.")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests allowed per rate window.")
+    parser.add_argument("--rate-window", type=float, default=10.0, help="Rate limit window in seconds.")
+    parser.add_argument("--unauthorized-every", type=int, default=0, help="Answer every Nth station request with 401.")
+    args = parser.parse_args()
+
+    latency = (args.latency, args.latency + args.jitter) if args.jitter else args.latency
+    stub = NetatmoStub(
+        host=args.host, port=args.port, latency=latency, token_ttl=args.token_ttl,
+        rate_limit=args.rate_limit, rate_window=args.rate_window, unauthorized_every=args.unauthorized_every,
+    )
+    print(f"Netatmo stub listening on {stub.url}")
+    print(f"  NETATMO_BASE_URL={stub.url}")
+    print(f"  NETATMO_ACCESS_TOKEN={stub.access_token}")
+    print(f"  NETATMO_REFRESH_TOKEN={stub.refresh_token}")
+    stub.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
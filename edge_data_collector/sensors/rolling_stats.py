@@ -0,0 +1,148 @@
+import math
+import threading
+
+import numpy as np
+
+DEFAULT_FIELDS = ("temperature", "humidity", "pressure")
+
+
+class RollingSensorStats:
+    """Rolling baselines and deltas of sensor readings over time windows.
+
+    Readings are stored in one fixed-size ring of numpy arrays shared by all
+    windows. Each window keeps a running sum and count per field and the index
+    of its oldest reading; an update adds the new reading to every window and
+    evicts readings that fell out of it, so the cost per update is O(1)
+    amortised per window regardless of window length. Missing, non-numeric
+    and non-finite values are skipped per field. Updates that repeat the
+    previous ``reading_id`` (the same sensor reading attached to frames of
+    several cameras) are not stored again.
+
+    ``features()`` returns, per window, the mean of the window (the baseline)
+    and the current reading minus that baseline, e.g. the temperature drop,
+    humidity rise and pressure drop the downstream FSM looks for::
+
+        {"1h": {"samples": 720, "span_sec": 3595.0,
+                "baseline": {"temperature": 17.0, ...},
+                "delta": {"temperature": -3.5, ...}}}
+    """
+
+    def __init__(self, windows, fields=DEFAULT_FIELDS, capacity=4096):
+        """
+        Args:
+            windows (dict[str, float]): Window name -> length in seconds.
+            fields (tuple[str, ...]): Reading fields to track.
+            capacity (int): Readings kept; when full, the oldest reading leaves
+                every window early (reported through ``span_sec``).
+        """
+        if not windows:
+            raise ValueError("At least one window is required")
+        if any(length <= 0 for length in windows.values()):
+            raise ValueError("Window lengths must be greater than zero")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.windows = dict(windows)
+        self.fields = tuple(fields)
+        self.capacity = capacity
+
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._values = np.full((capacity, len(self.fields)), np.nan, dtype=np.float64)
+        self._written = 0
+        self._starts = {name: 0 for name in self.windows}
+        self._sums = {name: np.zeros(len(self.fields)) for name in self.windows}
+        self._counts = {name: np.zeros(len(self.fields), dtype=np.int64) for name in self.windows}
+        self._latest = np.full(len(self.fields), np.nan)
+        self._latest_ts = None
+        self._last_reading_id = None
+        self._lock = threading.Lock()
+
+    def update(self, reading, timestamp, reading_id=None):
+        """
+        Adds a reading.
+        Args:
+            reading (dict | None): Sensor reading, e.g. ``{"temperature": 12.0, ...}``.
+            timestamp (float): Reading time in seconds (monotonically increasing).
+            reading_id (hashable | None): Identifies the sensor reading (e.g. a
+                telemetry sample id); an update with the same id as the previous
+                one is not stored again. None always stores the reading.
+        Returns:
+            dict: ``features()`` after the update.
+        """
+        values = np.array([_as_float((reading or {}).get(field)) for field in self.fields])
+        valid = ~np.isnan(values)
+        with self._lock:
+            if reading_id is not None and reading_id == self._last_reading_id:
+                return self._features()
+            self._last_reading_id = reading_id
+            if self._written >= self.capacity:
+                # The slot about to be overwritten holds the oldest reading.
+                oldest = self._written - self.capacity
+                for name in self.windows:
+                    if self._starts[name] <= oldest:
+                        self._evict(name, oldest)
+                        self._starts[name] = oldest + 1
+
+            slot = self._written % self.capacity
+            self._timestamps[slot] = timestamp
+            self._values[slot] = values
+            self._written += 1
+            for name, length in self.windows.items():
+                self._sums[name] += np.where(valid, values, 0.0)
+                self._counts[name] += valid
+                cutoff = timestamp - length
+                while self._starts[name] < self._written - 1 and \
+                        self._timestamps[self._starts[name] % self.capacity] < cutoff:
+                    self._evict(name, self._starts[name])
+                    self._starts[name] += 1
+            self._latest = values
+            self._latest_ts = timestamp
+            return self._features()
+
+    def features(self):
+        """
+        Returns:
+            dict: Per window: ``samples``, ``span_sec``, ``baseline`` and
+            ``delta`` per field (None where a field has no data).
+        """
+        with self._lock:
+            return self._features()
+
+    def _evict(self, name, index):
+        values = self._values[index % self.capacity]
+        valid = ~np.isnan(values)
+        self._sums[name] -= np.where(valid, values, 0.0)
+        self._counts[name] -= valid
+
+    def _features(self):
+        features = {}
+        for name in self.windows:
+            start = self._starts[name]
+            samples = self._written - start
+            baseline = {}
+            delta = {}
+            for index, field in enumerate(self.fields):
+                count = self._counts[name][index]
+                if count == 0:
+                    baseline[field] = None
+                    delta[field] = None
+                    continue
+                mean = self._sums[name][index] / count
+                baseline[field] = round(float(mean), 3)
+                latest = self._latest[index]
+                delta[field] = None if np.isnan(latest) else round(float(latest - mean), 3)
+            span = 0.0
+            if samples:
+                span = float(self._latest_ts - self._timestamps[start % self.capacity])
+            features[name] = {"samples": samples, "span_sec": round(span, 3), "baseline": baseline, "delta": delta}
+        return features
+
+
+def _as_float(value):
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    # inf would turn the running sums into NaN for good.
+    return value if math.isfinite(value) else math.nan
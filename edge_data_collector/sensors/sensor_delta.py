@@ -0,0 +1,138 @@
+import threading
+
+
+class _StreamState:
+    def __init__(self):
+        self.sent = None
+        self.revision = 0
+        self.since_keyframe = 0
+
+
+class SensorDeltaEncoder:
+    """Omits unchanged ``sensor_data`` from payloads.
+
+    Netatmo readings change at most every few minutes, yet every frame carries
+    them. Per stream (``metadata[stream_key]``, the camera by default) the
+    encoder remembers the last readings it sent and includes ``sensor_data``
+    only when a value moved by more than its epsilon, or every
+    ``keyframe_every`` messages so late-joining consumers catch up. Each payload
+    is marked with:
+
+    * ``metadata["sensor_revision"]``: increments whenever the sent readings change;
+    * ``metadata["sensor_keyframe"]``: True if the payload carries ``sensor_data``.
+
+    Consumers rebuild the full readings with ``SensorStateTracker``.
+    """
+
+    def __init__(self, epsilon=0.0, keyframe_every=12, stream_key="camera_id"):
+        """
+        Args:
+            epsilon (float | dict[str, float]): Change below which a reading is
+                considered unchanged, for all fields or per field name.
+            keyframe_every (int): Send the full readings at least once per this
+                many messages of a stream.
+            stream_key (str): Metadata key identifying a stream.
+        """
+        if keyframe_every < 1:
+            raise ValueError("keyframe_every must be at least 1")
+        self.epsilon = epsilon
+        self.keyframe_every = keyframe_every
+        self.stream_key = stream_key
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def encode(self, payload):
+        """
+        Drops ``sensor_data`` from a payload when it carries no news.
+        Args:
+            payload (dict): Formatted payload; modified in place.
+        Returns:
+            dict: The same payload.
+        """
+        metadata = payload.setdefault("metadata", {})
+        sensor_data = payload.get("sensor_data")
+        with self._lock:
+            state = self._streams.setdefault(metadata.get(self.stream_key), _StreamState())
+            changed = state.revision == 0 or self._changed(state.sent, sensor_data)
+            if changed:
+                state.revision += 1
+            keyframe = changed or state.since_keyframe + 1 >= self.keyframe_every
+            if keyframe:
+                state.sent = dict(sensor_data) if isinstance(sensor_data, dict) else sensor_data
+                state.since_keyframe = 0
+            else:
+                state.since_keyframe += 1
+            revision = state.revision
+
+        if not keyframe:
+            payload.pop("sensor_data", None)
+        metadata["sensor_revision"] = revision
+        metadata["sensor_keyframe"] = keyframe
+        return payload
+
+    def _changed(self, previous, current):
+        if not isinstance(previous, dict) or not isinstance(current, dict):
+            return previous != current
+        if previous.keys() != current.keys():
+            return True
+        for name, value in current.items():
+            old = previous[name]
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)) \
+                    and not isinstance(value, bool) and not isinstance(old, bool):
+                epsilon = self.epsilon.get(name, 0.0) if isinstance(self.epsilon, dict) else self.epsilon
+                if abs(value - old) > epsilon:
+                    return True
+            elif value != old:
+                return True
+        return False
+
+
+class SensorStateTracker:
+    """Consumer-side helper that keeps the current sensor readings per stream.
+
+    Example::
+
+        tracker = SensorStateTracker()
+
+        def on_message(client, userdata, msg):
+            payload = json.loads(msg.payload)
+            sensor_data = tracker.update(payload)  # None until a keyframe arrives
+    """
+
+    def __init__(self, stream_key="camera_id"):
+        """
+        Args:
+            stream_key (str): Metadata key identifying a stream.
+        """
+        self.stream_key = stream_key
+        self._state = {}
+
+    def update(self, payload):
+        """
+        Args:
+            payload (dict): Received payload, with or without ``sensor_data``.
+        Returns:
+            dict | None: Readings in effect for the payload, or None if a change
+            was missed and no keyframe has arrived since.
+        """
+        metadata = payload.get("metadata") or {}
+        revision = metadata.get("sensor_revision")
+        if revision is None or "sensor_data" in payload:
+            # Unencoded payloads always carry their readings.
+            self._state[metadata.get(self.stream_key)] = (revision, payload.get("sensor_data"))
+            return payload.get("sensor_data")
+
+        known = self._state.get(metadata.get(self.stream_key))
+        if known is not None and known[0] == revision:
+            return known[1]
+        return None
+
+    def current(self, stream=None):
+        """
+        Args:
+            stream (str | None): Stream id (e.g. camera id).
+        Returns:
+            dict | None: Latest known readings of the stream.
+        """
+        known = self._state.get(stream)
+        return None if known is None else known[1]
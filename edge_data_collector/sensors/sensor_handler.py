@@ -4,22 +4,69 @@ from jwt.exceptions import DecodeError
 from datetime import datetime, timezone
 from urllib.parse import urlencode
 from dotenv import set_key
+import logging
 import os
+import time
 import config
+from edge_data_sender.monitoring.metrics import REGISTRY, weak_callback
 
 
 import random
 
+logger = logging.getLogger(__name__)
+
+# Characters of a Netatmo response body included in debug logs
+_RESPONSE_LOG_LIMIT = 500
+
+
+# Netatmo module types in a getstationsdata response
+OUTDOOR_MODULE_TYPES = ("NAModule1",)
+RAIN_MODULE_TYPES = ("NAModule3",)
+
+SENSOR_READS = REGISTRY.counter("sensor_reads_total", "Sensor reads by result", ("result",))
+SENSOR_READ_SECONDS = REGISTRY.histogram("sensor_read_seconds", "Time to read the sensors, including token refresh")
+SENSOR_AGE = REGISTRY.gauge("sensor_age_seconds", "Seconds since the last successful sensor read")
+
+# dashboard_data fields reported per module role
+_MODULE_FIELDS = {
+    "indoor": {"temperature": "Temperature", "humidity": "Humidity", "pressure": "Pressure", "co2": "CO2"},
+    "outdoor": {"temperature": "Temperature", "humidity": "Humidity"},
+    "rain": {"rain": "Rain", "rain_1h": "sum_rain_1", "rain_24h": "sum_rain_24"},
+}
+
 
 class SensorHandler:
-    def __init__(self, sensor_id, client_id, client_secret, redirect_uri, access_token=None, refresh_token=None, simulate_sensor=False):
+    def __init__(self, sensor_id, client_id, client_secret, redirect_uri, access_token=None, refresh_token=None, simulate_sensor=False,
+                 outdoor_sensor_id=None, rain_sensor_id=None, base_url=None, request_timeout=None):
+        """
+        Args:
+            sensor_id (str | None): MAC of the station (indoor NAMain module).
+            outdoor_sensor_id (str | None): Id of the outdoor module; the
+                station's first outdoor module is used when None.
+            rain_sensor_id (str | None): Id of the rain gauge; the station's
+                first rain gauge is used when None.
+            base_url (str | None): Netatmo API root; ``config.NETATMO_BASE_URL``
+                when None.
+            request_timeout (float | None): Seconds per HTTP request;
+                ``config.NETATMO_REQUEST_TIMEOUT`` when None.
+        """
         self.sensor_id = sensor_id
+        self.outdoor_sensor_id = outdoor_sensor_id
+        self.rain_sensor_id = rain_sensor_id
+        # role -> module id, resolved from the first getstationsdata response
+        self.module_map = None
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
         self.access_token = access_token
         self.refresh_token = refresh_token
         self.simulate_sensor = simulate_sensor or config.SIMULATE_SENSOR_DATA
+        self.base_url = (base_url or config.NETATMO_BASE_URL).rstrip("/")
+        self.request_timeout = request_timeout if request_timeout is not None else config.NETATMO_REQUEST_TIMEOUT
+        self.last_success = None
+        SENSOR_AGE.set_function(weak_callback(
+            self, lambda handler: None if handler.last_success is None else time.time() - handler.last_success
+        ))
         # self.access_token = os.getenv("NETATMO_ACCESS_TOKEN")
         # self.refresh_token = os.getenv("NETATMO_REFRESH_TOKEN")
 
@@ -29,11 +76,11 @@ class SensorHandler:
             set_key(".env", "NETATMO_ACCESS_TOKEN", self.access_token)
         if self.refresh_token:
             set_key(".env", "NETATMO_REFRESH_TOKEN", self.refresh_token)
-        print("Tokens saved to .env file.")
+        logger.info("Tokens saved to .env file.")
 
     def generate_auth_url(self, state="unique_state_string"):
         """Generate the URL to redirect the user for authorization."""
-        url = "https://api.netatmo.com/oauth2/authorize"
+        url = f"{self.base_url}/oauth2/authorize"
         params = {
             "client_id": self.client_id,
             "redirect_uri": self.redirect_uri,
@@ -48,8 +95,8 @@ class SensorHandler:
 
     def exchange_authorization_code(self, authorization_code):
         """Exchange the authorization code for access and refresh tokens."""
-        print("Exchanging authorization code for tokens...")
-        url = "https://api.netatmo.com/oauth2/token"
+        logger.info("Exchanging authorization code for tokens...")
+        url = f"{self.base_url}/oauth2/token"
         payload = {
             "grant_type": "authorization_code",
             "client_id": self.client_id,
@@ -57,26 +104,26 @@ class SensorHandler:
             "code": authorization_code,
             "redirect_uri": self.redirect_uri
         }
-        response = requests.post(url, data=payload)
+        response = requests.post(url, data=payload, timeout=self.request_timeout)
         if response.status_code == 200:
             data = response.json()
             self.access_token = data.get("access_token")
             self.refresh_token = data.get("refresh_token")
             self.save_tokens()
-            print("Tokens retrieved and saved successfully.")
+            logger.info("Tokens retrieved and saved successfully.")
         else:
-            print(f"Failed to exchange authorization code: {response.json()}")
+            logger.error("Failed to exchange authorization code: %s", response.text[:_RESPONSE_LOG_LIMIT])
             raise Exception("Token exchange failed.")
 
     def refresh_access_token(self):
         """Refresh the access token using the refresh token."""
         if not self.refresh_token:
-            print("No refresh token available. Redirecting to reauthenticate.")
+            logger.warning("No refresh token available. Redirecting to reauthenticate.")
             self.reauthenticate()
             return
 
-        print("Refreshing access token...")
-        url = "https://api.netatmo.com/oauth2/token"
+        logger.info("Refreshing access token...")
+        url = f"{self.base_url}/oauth2/token"
         payload = {
             "grant_type": "refresh_token",
             "client_id": self.client_id,
@@ -84,25 +131,25 @@ class SensorHandler:
             "refresh_token": self.refresh_token
         }
 
-        response = requests.post(url, data=payload)
-        print(f"Refresh token request status: {response.status_code}")
+        response = requests.post(url, data=payload, timeout=self.request_timeout)
+        logger.debug("Refresh token request status: %s", response.status_code)
 
         if response.status_code == 200:
             data = response.json()
             self.access_token = data.get("access_token")
             self.refresh_token = data.get("refresh_token")
             self.save_tokens()
-            print("Access token refreshed and saved successfully.")
+            logger.info("Access token refreshed and saved successfully.")
         else:
             try:
                 error_details = response.json()
-                print(f"Failed to refresh access token. Error details: {error_details}")
+                logger.error("Failed to refresh access token. Error details: %s", error_details)
             except ValueError:
-                print("Failed to parse error details. Raw response:")
-                print(response.text)
+                error_details = {}
+                logger.error("Failed to parse error details. Raw response: %s", response.text[:_RESPONSE_LOG_LIMIT])
 
             if "invalid_grant" in error_details.get("error", ""):
-                print("The refresh token is invalid or expired. Redirecting to reauthenticate.")
+                logger.warning("The refresh token is invalid or expired. Redirecting to reauthenticate.")
                 self.reauthenticate()
             else:
                 raise Exception(f"Unexpected error during token refresh: {response.json()}")
@@ -124,57 +171,161 @@ class SensorHandler:
 
     def reauthenticate(self):
         """Guide the user to reauthorize the application."""
-        print("Reauthentication required.")
+        logger.warning("Reauthentication required.")
         self.generate_auth_url()
         authorization_code = input("Enter the authorization code provided after authorization: ").strip()
         self.exchange_authorization_code(authorization_code)
 
     def read_sensor_data(self):
         """Read data from the sensor, refreshing the token if necessary."""
+        with SENSOR_READ_SECONDS.time():
+            try:
+                reading = self._read_sensor_data()
+            except Exception:
+                SENSOR_READS.inc(result="error")
+                raise
+        if reading is None:
+            SENSOR_READS.inc(result="empty")
+        else:
+            SENSOR_READS.inc(result="ok")
+            self.last_success = time.time()
+        return reading
+
+    def _read_sensor_data(self):
         if self.simulate_sensor:
-            print(f"Simulating data for sensor {self.sensor_id}...")
+            logger.debug("Simulating data for sensor %s", self.sensor_id)
             return self._generate_fake_data()
 
         if not self.access_token:
-            print("Access token expired or unavailable, attempting to refresh...")
+            logger.info("Access token expired or unavailable, attempting to refresh...")
             self.refresh_access_token()
 
-        print(f"Reading data from Netatmo sensor {self.sensor_id}...")
-        url = "https://api.netatmo.com/api/getstationsdata"
+        logger.debug("Reading data from Netatmo sensor %s", self.sensor_id)
+        url = f"{self.base_url}/api/getstationsdata"
         headers = {
             "Authorization": f"Bearer {self.access_token}"
         }
-        response = requests.get(url, headers=headers)
-        print(f"Sensor data request status: {response.status_code}")
-        print(f"Response: {response.text}")
+        # Once the station is known, only request that station's data.
+        params = {"device_id": self.module_map["station"]} if self.module_map else None
+        response = requests.get(url, headers=headers, params=params, timeout=self.request_timeout)
+        logger.debug("Sensor data request status: %s", response.status_code)
 
         if response.status_code == 401 or response.status_code == 403:  # Token expired or invalid
-            print("Access token expired or invalid, refreshing token...")
+            logger.info("Access token expired or invalid (status %s), refreshing token...", response.status_code)
             self.refresh_access_token()
             headers["Authorization"] = f"Bearer {self.access_token}"
-            response = requests.get(url, headers=headers)
-            print(f"Sensor data request status: {response.status_code}")
-            print(f"Response: {response.text}")
+            response = requests.get(url, headers=headers, params=params, timeout=self.request_timeout)
+            logger.debug("Sensor data request status after refresh: %s", response.status_code)
+        if logger.isEnabledFor(logging.DEBUG):
+            # The body is large; only slice it when it will actually be logged.
+            logger.debug("Sensor data response: %s", response.text[:_RESPONSE_LOG_LIMIT])
 
         if response.status_code == 200:
             devices = response.json().get("body", {}).get("devices", [])
-            if devices:
-                station_data = devices[0].get("dashboard_data", {})
-                sensor_data = {
-                    "temperature": station_data.get("Temperature"),
-                    "humidity": station_data.get("Humidity"),
-                    "pressure": station_data.get("Pressure")
-                }
-                return sensor_data
-            else:
-                print("No devices found in the response.")
+            if not devices:
+                logger.warning("No devices found in the response.")
                 return None
+            if self.module_map is None:
+                self.module_map = self.resolve_modules(devices)
+                logger.info("Resolved Netatmo modules: %s", self.module_map)
+            try:
+                return self.parse_reading(devices, self.module_map)
+            except ValueError:
+                # Station layout changed; resolve the modules again next time.
+                self.module_map = None
+                raise
         else:
             raise Exception(f"Failed to fetch sensor data: {response.status_code} {response.json()}")
 
+    def resolve_modules(self, devices):
+        """
+        Find the configured station and its indoor, outdoor and rain modules.
+
+        Args:
+            devices (list[dict]): ``body.devices`` of a getstationsdata response.
+
+        Returns:
+            dict: ``station``, ``indoor``, ``outdoor`` and ``rain`` module ids
+            (None for roles the station does not have).
+
+        Raises:
+            ValueError: If a configured id is not part of the response.
+        """
+        configured = [module_id for module_id in (self.sensor_id, self.outdoor_sensor_id, self.rain_sensor_id) if module_id]
+        station = None
+        for device in devices:
+            ids = {device.get("_id")} | {module.get("_id") for module in device.get("modules", [])}
+            if not configured or any(module_id in ids for module_id in configured):
+                station = device
+                break
+        if station is None:
+            raise ValueError(f"No Netatmo station contains the configured modules {configured}")
+        if not configured and len(devices) > 1:
+            logger.warning("No Netatmo sensor id configured; using station %s", station.get("_id"))
+
+        modules = station.get("modules", [])
+
+        def pick(configured_id, types):
+            if configured_id:
+                if configured_id == station.get("_id") or any(m.get("_id") == configured_id for m in modules):
+                    return configured_id
+                raise ValueError(f"Netatmo module {configured_id} not found on station {station.get('_id')}")
+            match = next((m for m in modules if m.get("type") in types), None)
+            return match.get("_id") if match else None
+
+        return {
+            "station": station.get("_id"),
+            "indoor": station.get("_id"),
+            "outdoor": pick(self.outdoor_sensor_id, OUTDOOR_MODULE_TYPES),
+            "rain": pick(self.rain_sensor_id, RAIN_MODULE_TYPES),
+        }
+
+    @staticmethod
+    def parse_reading(devices, module_map):
+        """
+        Build a multi-module reading from one getstationsdata response.
+
+        The top-level ``temperature``, ``humidity`` and ``pressure`` keep coming
+        from the station's indoor module; ``modules`` holds every resolved
+        module's values (None for a module that is offline).
+
+        Args:
+            devices (list[dict]): ``body.devices`` of a getstationsdata response.
+            module_map (dict): Result of ``resolve_modules``.
+
+        Returns:
+            dict: Sensor reading.
+        """
+        station = next((d for d in devices if d.get("_id") == module_map["station"]), None)
+        if station is None:
+            raise ValueError(f"Netatmo station {module_map['station']} missing from response")
+        dashboards = {station.get("_id"): station.get("dashboard_data")}
+        for module in station.get("modules", []):
+            dashboards[module.get("_id")] = module.get("dashboard_data")
+
+        modules = {}
+        for role, fields in _MODULE_FIELDS.items():
+            module_id = module_map.get(role)
+            if module_id is None:
+                continue
+            dashboard = dashboards.get(module_id)
+            if not dashboard:
+                modules[role] = None
+                continue
+            modules[role] = {name: dashboard.get(key) for name, key in fields.items()}
+            modules[role]["module_id"] = module_id
+            modules[role]["time_utc"] = dashboard.get("time_utc")
+
+        indoor = modules.get("indoor") or {}
+        return {
+            "temperature": indoor.get("temperature"),
+            "humidity": indoor.get("humidity"),
+            "pressure": indoor.get("pressure"),
+            "modules": modules,
+        }
+
     def _generate_fake_data(self):
         """Generate simulated sensor readings."""
-        print("Generating Fake Sensor Data")
         return {
             "temperature": round(random.uniform(15, 30), 2),
             "humidity": round(random.uniform(30, 90), 2),
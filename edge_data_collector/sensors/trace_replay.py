@@ -0,0 +1,144 @@
+import csv
+import json
+import logging
+import math
+
+import numpy as np
+
+from .rolling_stats import DEFAULT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Column/key names accepted for the timestamp of a trace row
+TIME_KEYS = ("t", "time", "timestamp", "video_timestamp_sec", "collector_capture_ts")
+
+
+class TraceSensorSource:
+    """Replays a recorded sensor trace in step with a video.
+
+    The trace is loaded once into sorted numpy arrays. ``read_sensor_data(t)``
+    finds the readings for video time ``t`` with a binary search (O(log n)) and
+    either holds the last reading at or before ``t`` or, with ``interpolate``,
+    linearly interpolates between the neighbouring readings.
+
+    Supported files:
+
+    * CSV with a header: a time column (``t``, ``timestamp``, ...) and one
+      column per field;
+    * NDJSON: one object per line, either flat (``{"t": 0.0, "temperature": ...}``)
+      or a captured payload (``{"sensor_data": {...}, "metadata":
+      {"collector_capture_ts": ...}}``).
+
+    Timestamps are rebased so the first reading is at ``t = 0`` (recorded
+    traces usually carry epoch time); ``offset`` then shifts the trace
+    relative to the video.
+    """
+
+    def __init__(self, path, fields=DEFAULT_FIELDS, interpolate=True, offset=0.0, rebase=True):
+        """
+        Args:
+            path (str): CSV (``.csv``) or NDJSON trace file.
+            fields (tuple[str, ...]): Reading fields to replay.
+            interpolate (bool): Interpolate between readings instead of holding
+                the previous one.
+            offset (float): Trace seconds added to the video time before lookup.
+            rebase (bool): Shift timestamps so the first reading is at 0.
+        """
+        self.path = path
+        self.fields = tuple(fields)
+        self.interpolate = interpolate
+        self.offset = offset
+
+        rows = self._load_csv(path) if str(path).lower().endswith(".csv") else self._load_ndjson(path)
+        if not rows:
+            raise ValueError(f"No sensor readings found in trace {path}")
+        times = np.array([row[0] for row in rows], dtype=np.float64)
+        values = np.array([[_as_float(row[1].get(field)) for field in self.fields] for row in rows])
+        order = np.argsort(times, kind="stable")
+        self.times = times[order] - (times[order][0] if rebase else 0.0)
+        self.values = values[order]
+        logger.info("Sensor trace loaded: %s (%d readings, %.1fs)", path, len(self.times), self.duration)
+
+    @property
+    def duration(self):
+        """Seconds covered by the trace."""
+        return float(self.times[-1] - self.times[0])
+
+    def read_sensor_data(self, video_time=0.0):
+        """
+        Args:
+            video_time (float): Timestamp within the video in seconds.
+
+        Returns:
+            dict: Reading per field (None where the trace has no value). Times
+            outside the trace return its first or last reading.
+        """
+        t = video_time + self.offset
+        index = int(np.searchsorted(self.times, t, side="right")) - 1
+        if index < 0:
+            return self._reading(self.values[0])
+        if index >= len(self.times) - 1 or not self.interpolate:
+            return self._reading(self.values[index])
+
+        t0, t1 = self.times[index], self.times[index + 1]
+        before, after = self.values[index], self.values[index + 1]
+        fraction = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+        blended = before + (after - before) * fraction
+        # Hold the previous value where either neighbour is missing.
+        return self._reading(np.where(np.isnan(blended), before, blended))
+
+    def _reading(self, values):
+        return {
+            field: None if math.isnan(value) else round(float(value), 3)
+            for field, value in zip(self.fields, values)
+        }
+
+    def _load_csv(self, path):
+        rows = []
+        with open(path, newline="", encoding="utf-8") as trace:
+            for record in csv.DictReader(trace):
+                timestamp = _row_time(record)
+                if timestamp is not None:
+                    rows.append((timestamp, record))
+        return rows
+
+    def _load_ndjson(self, path):
+        rows = []
+        with open(path, encoding="utf-8") as trace:
+            for line in trace:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(record, dict):
+                    continue
+                if isinstance(record.get("sensor_data"), dict):
+                    timestamp = _row_time(record.get("metadata") or {})
+                    if timestamp is None:
+                        timestamp = _row_time(record)
+                    record = record["sensor_data"]
+                else:
+                    timestamp = _row_time(record)
+                if timestamp is not None:
+                    rows.append((timestamp, record))
+        return rows
+
+
+def _row_time(record):
+    for key in TIME_KEYS:
+        value = _as_float(record.get(key))
+        if not math.isnan(value):
+            return value
+    return None
+
+
+def _as_float(value):
+    if isinstance(value, bool) or value is None or value == "":
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
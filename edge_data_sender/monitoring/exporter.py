@@ -0,0 +1,131 @@
+import logging
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .metrics import REGISTRY
+
+# Set up logging for error handling
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsHttpServer:
+    """Serves a ``MetricsRegistry`` at ``/metrics`` for Prometheus to scrape."""
+
+    def __init__(self, registry=REGISTRY, host="0.0.0.0", port=9108):
+        """
+        Args:
+            registry (MetricsRegistry): Metrics to expose.
+            host (str): Interface to bind.
+            port (int): Port to bind; 0 picks a free port.
+        """
+        self._server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        self._server.daemon_threads = True
+        self._server.registry = registry
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        """Serves requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and releases the port."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+class StatsPublisher:
+    """Publishes a compact metrics snapshot on its own topic every ``interval`` seconds.
+
+    Messages have the shape::
+
+        {"stats": {"camera_captures_total": {"camera_01,ok": 120}, ...},
+         "metadata": {"collector_publish_ts": ..., ...}}
+
+    so health can be followed from the broker without scraping each device.
+    """
+
+    def __init__(self, mqtt_handler, topic, registry=REGISTRY, interval=60.0, build_metadata=None):
+        """
+        Args:
+            mqtt_handler (MqttHandler): Handler used to publish.
+            topic (str): Stats topic.
+            registry (MetricsRegistry): Metrics to report.
+            interval (float): Seconds between messages.
+            build_metadata (callable | None): Returns extra metadata (e.g. the
+                collector's session id) for each message.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be greater than zero")
+        self.mqtt_handler = mqtt_handler
+        self.topic = topic
+        self.registry = registry
+        self.interval = interval
+        self.build_metadata = build_metadata
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Publishes in the background, starting one interval from now."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="stats", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stops the publishing thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def publish(self):
+        """Publishes one snapshot now."""
+        metadata = dict(self.build_metadata() or {}) if self.build_metadata is not None else {}
+        metadata.setdefault("stats_ts", time.time())
+        try:
+            self.mqtt_handler.publish({"stats": self.registry.snapshot(), "metadata": metadata}, topic=self.topic)
+        except Exception as e:
+            logger.error("Failed to publish stats: %s", e)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.publish()
+
+
+def register_disk_usage(path, registry=REGISTRY):
+    """
+    Reports free and used bytes of the filesystem holding ``path`` as the
+    ``disk_free_bytes`` and ``disk_used_bytes`` gauges (labelled by path),
+    read on every collection.
+    """
+    free = registry.gauge("disk_free_bytes", "Free bytes on the filesystem holding path", ("path",))
+    used = registry.gauge("disk_used_bytes", "Used bytes on the filesystem holding path", ("path",))
+    free.set_function(lambda: shutil.disk_usage(path).free, path=path)
+    used.set_function(lambda: shutil.disk_usage(path).used, path=path)
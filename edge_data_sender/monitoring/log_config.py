@@ -0,0 +1,174 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``
+# and is rendered as a structured field.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "suppressed",
+}
+
+FORMATS = ("text", "json")
+
+
+def _fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as ``key=value`` text lines or one JSON object per line.
+
+    Values passed with ``extra=`` become fields, so call sites can log
+    ``logger.debug("Frame captured", extra={"camera_id": cid, "bytes": size})``
+    and consumers of the JSON output get them as keys::
+
+        2024-06-10 12:00:00,123 DEBUG edge_data_collector.camera.camera_handler: Frame captured camera_id=camera_01 bytes=412330
+        {"ts": 1718013600.123, "level": "DEBUG", "logger": "...", "msg": "Frame captured", "camera_id": "camera_01", ...}
+    """
+
+    def __init__(self, fmt="text"):
+        """
+        Args:
+            fmt (str): ``"text"`` or ``"json"``.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown log format {fmt!r}; expected one of {FORMATS}")
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        self.fmt = fmt
+
+    def format(self, record):
+        message = record.getMessage()
+        suppressed = getattr(record, "suppressed", 0)
+        if self.fmt == "json":
+            entry = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name, "msg": message}
+            entry.update(_fields(record))
+            if suppressed:
+                entry["suppressed"] = suppressed
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        record.message = message
+        record.asctime = self.formatTime(record)
+        line = self.formatMessage(record)
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if suppressed:
+            line += f" ({suppressed} similar messages suppressed)"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class RateLimitFilter(logging.Filter):
+    """Token-bucket limit per call site, so a failing loop cannot flood the log.
+
+    Records are grouped by logger, level and unformatted message template, so
+    ``"Failed to capture image: %s"`` counts as one source whatever the error.
+    Each source may emit ``burst`` records at once and ``rate`` per second
+    after that; records over the limit are dropped before they are formatted,
+    and the next record let through reports how many were suppressed.
+    Records at or above ``exempt_level`` are never limited.
+    """
+
+    def __init__(self, rate=1.0, burst=10, exempt_level=logging.CRITICAL, clock=time.monotonic):
+        """
+        Args:
+            rate (float): Sustained records per second per source.
+            burst (int): Records a source may emit back to back.
+            exempt_level (int): Level from which records always pass.
+            clock (callable): Monotonic clock in seconds.
+        """
+        super().__init__()
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.exempt_level = exempt_level
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= self.exempt_level:
+            return True
+        key = (record.name, record.levelno, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = self.clock()
+        with self._lock:
+            tokens, updated, suppressed = self._buckets.get(key, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[key] = (tokens - 1, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Defer formatting to the listener thread: only resolve the message so
+        # arguments cannot change before it runs, and keep fields and exc_info.
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener = None
+
+
+def configure_logging(level="INFO", fmt="text", rate=None, burst=10, async_queue=False, stream=None):
+    """
+    Installs the collector's root log handler.
+
+    Hot-path messages are logged at DEBUG with %-style arguments, so at INFO
+    they cost a level check. With ``async_queue`` the calling thread only puts
+    records on a queue and a listener thread formats and writes them, keeping
+    slow consoles (serial, journald) off the capture loop.
+    Args:
+        level (str | int): Root log level.
+        fmt (str): ``"text"`` or ``"json"`` (see ``StructuredFormatter``).
+        rate (float | None): Records per second per call site; None disables
+            rate limiting (see ``RateLimitFilter``).
+        burst (int): Burst size of the rate limit.
+        async_queue (bool): Write records from a background thread.
+        stream: Output stream; stderr by default.
+    Returns:
+        logging.Handler: The handler installed on the root logger.
+    """
+    global _listener
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    output = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    output.setFormatter(StructuredFormatter(fmt))
+    handler = output
+    if async_queue:
+        handler = _QueueHandler(queue.SimpleQueue())
+        _listener = logging.handlers.QueueListener(handler.queue, output)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    if rate is not None:
+        handler.addFilter(RateLimitFilter(rate=rate, burst=burst))
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    return handler
+
+
+def shutdown_logging():
+    """Flushes and stops the async listener started by ``configure_logging``."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
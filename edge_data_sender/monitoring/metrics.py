@@ -0,0 +1,290 @@
+import bisect
+import math
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a fast JPEG encode to a slow Netatmo call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def weak_callback(owner, function):
+    """
+    Returns a callable computing ``function(owner)`` that does not keep
+    ``owner`` alive; once ``owner`` is garbage collected it returns None, which
+    gauges treat as "no value".
+    Args:
+        owner (object): Instance the value is read from.
+        function (callable): Called as ``function(owner)``.
+    """
+    ref = weakref.ref(owner)
+
+    def read():
+        target = ref()
+        return None if target is None else function(target)
+    return read
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key, extra=None):
+        pairs = list(zip(self.labelnames, key)) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _series(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. captured frames."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        return [(self.name, self._label_text(key), value) for key, value in self._series()]
+
+    def compact(self):
+        return {key: value for key, value in self._series()}
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, set directly or read from a callback."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function, **labels):
+        """Reads the value from ``function()`` whenever metrics are collected."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = function
+
+    def remove(self, function=None, **labels):
+        """
+        Drops a series. With ``function``, only if the series is still read from
+        it, so closing an older component leaves a newer one's gauge in place.
+        """
+        key = self._key(labels)
+        with self._lock:
+            if function is None or self._values.get(key) is function:
+                self._values.pop(key, None)
+
+    def value(self, **labels):
+        with self._lock:
+            value = self._values.get(self._key(labels))
+        return value() if callable(value) else value
+
+    def _evaluated(self):
+        series = []
+        for key, value in self._series():
+            if callable(value):
+                try:
+                    value = value()
+                except Exception:
+                    continue
+            if value is not None:
+                series.append((key, value))
+        return series
+
+    def samples(self):
+        return [(self.name, self._label_text(key), value) for key, value in self._evaluated()]
+
+    def compact(self):
+        return {key: value for key, value in self._evaluated()}
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies in seconds) in fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the enclosed block (monotonic clock)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _copies(self):
+        with self._lock:
+            return [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+
+    def samples(self):
+        samples = []
+        for key, (counts, total, count) in self._copies():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", self._label_text(key, ("le", _number(float(bound)))), cumulative))
+            samples.append((f"{self.name}_sum", self._label_text(key), total))
+            samples.append((f"{self.name}_count", self._label_text(key), count))
+        return samples
+
+    def compact(self):
+        compact = {}
+        for key, (counts, total, count) in self._copies():
+            compact[key] = {
+                "count": count,
+                "mean": round(total / count, 4) if count else None,
+                "p95": self._quantile(counts, count, 0.95),
+            }
+        return compact
+
+    def _quantile(self, counts, count, q):
+        """
+        Upper bound of the bucket holding the q-quantile (None when empty). When
+        it lies above all buckets the highest bound is returned, as a lower
+        bound, so slow outliers still show up.
+        """
+        if not count:
+            return None
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            if cumulative >= q * count:
+                return bound
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms shared by the pipeline.
+
+    Metrics are declared once (typically at module import) and updated from
+    any thread. ``render()`` produces the Prometheus text format served by
+    ``MetricsHttpServer``; ``snapshot()`` a compact dict for the stats topic.
+    Declaring an existing name again returns the existing metric.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labels):
+                raise ValueError(f"Metric {name} already registered as a different {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labels, buckets=buckets)
+
+    def get(self, name):
+        with self._lock:
+            return self._metrics.get(name)
+
+    def _sorted(self):
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def render(self):
+        """
+        Returns:
+            str: All metrics in the Prometheus text exposition format (0.0.4).
+        """
+        lines = []
+        for metric in self._sorted():
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Metric name -> value; labelled metrics map the comma-joined
+            label values to their value. Histograms report ``count``, ``mean``
+            and a bucket-resolution ``p95``. Metrics without data are omitted.
+        """
+        snapshot = {}
+        for metric in self._sorted():
+            series = metric.compact()
+            if not series:
+                continue
+            if not metric.labelnames:
+                snapshot[metric.name] = series.get(())
+            else:
+                snapshot[metric.name] = {",".join(key): value for key, value in series.items()}
+        return snapshot
+
+
+# Registry used by the pipeline's built-in instrumentation
+REGISTRY = MetricsRegistry()
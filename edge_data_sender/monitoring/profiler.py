@@ -0,0 +1,184 @@
+import cProfile
+import glob
+import io
+import logging
+import os
+import pstats
+import signal
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Set up logging for error handling
+logger = logging.getLogger(__name__)
+
+# Frames dropped from allocation statistics: the profiler's own bookkeeping
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class SamplingProfiler:
+    """Opt-in cProfile and tracemalloc sampling of pipeline stages.
+
+    Pipeline code wraps each unit of work in ``sample(stage)``; while the
+    profiler is enabled, every ``every``-th call per stage runs under cProfile
+    and is bracketed by tracemalloc snapshots. Each sampled call writes a text
+    report (hot functions, top allocators, what the call allocated and what
+    the stage's allocations grew by since its previous sample) plus a
+    ``.prof`` file for snakeviz/pstats to ``output_dir``; only the newest
+    ``max_reports`` reports are kept.
+
+    cProfile only sees the thread that runs the sampled call, so stages are
+    sampled where they run (capture threads, main loop, publisher thread).
+    Work done in other processes (``ParallelEncoder`` workers) is not profiled.
+    tracemalloc traces every thread while the profiler is enabled, which costs
+    noticeable CPU; disabled, ``sample`` costs a flag check.
+    Only one sample runs at a time; calls that coincide with another stage's
+    sample are not profiled.
+    """
+
+    def __init__(self, output_dir="profiles", every=100, top=25, max_reports=20, trace_frames=10, enabled=False):
+        """
+        Args:
+            output_dir (str): Folder for reports.
+            every (int): Profile every Nth call of each stage.
+            top (int): Entries per report section.
+            max_reports (int): Reports kept on disk; older ones are deleted.
+            trace_frames (int): Stack frames tracemalloc keeps per allocation.
+            enabled (bool): Start sampling immediately.
+        """
+        if every < 1 or max_reports < 1:
+            raise ValueError("every and max_reports must be at least 1")
+        self.output_dir = output_dir
+        self.every = every
+        self.top = top
+        self.max_reports = max_reports
+        self.trace_frames = trace_frames
+        self.enabled = enabled
+        self.reports_written = 0
+        self._counts = {}
+        self._previous = {}
+        self._started_tracemalloc = False
+        self._window = threading.Lock()
+        self._counts_lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        """Stops sampling; tracing stops at the next ``sample`` call or ``close``."""
+        self.enabled = False
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        logger.warning("Profiler %s", "enabled" if self.enabled else "disabled")
+
+    def install_signal_handler(self, signum=None):
+        """
+        Toggles the profiler on ``signum`` (SIGUSR1 by default), e.g.
+        ``kill -USR1 <pid>``. Must be called from the main thread.
+        Returns:
+            bool: Whether a handler was installed (not on platforms without the signal).
+        """
+        signum = signum if signum is not None else getattr(signal, "SIGUSR1", None)
+        if signum is None:
+            return False
+        signal.signal(signum, lambda received, frame: self.toggle())
+        return True
+
+    def close(self):
+        """Stops tracemalloc if the profiler started it."""
+        with self._window:
+            self._stop_tracing()
+
+    @contextmanager
+    def sample(self, stage):
+        """Profiles the enclosed block if it is the stage's Nth call while enabled."""
+        if not self.enabled:
+            if self._started_tracemalloc:
+                self.close()
+            yield
+            return
+        with self._counts_lock:
+            count = self._counts.get(stage, 0) + 1
+            self._counts[stage] = count
+        if count % self.every or not self._window.acquire(blocking=False):
+            yield
+            return
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.trace_frames)
+                self._started_tracemalloc = True
+            before = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+            tracemalloc.reset_peak()
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                elapsed = time.perf_counter() - started
+                try:
+                    self._write_report(stage, count, elapsed, profile, before)
+                except Exception as e:
+                    logger.error("Failed to write profile report: %s", e)
+        finally:
+            self._window.release()
+
+    def _stop_tracing(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+            self._previous.clear()
+
+    def _write_report(self, stage, count, elapsed, profile, before):
+        after = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+        current, peak = tracemalloc.get_traced_memory()
+        previous = self._previous.get(stage)
+        self._previous[stage] = after
+
+        hot = io.StringIO()
+        pstats.Stats(profile, stream=hot).sort_stats("cumulative").print_stats(self.top)
+        sections = [
+            f"stage: {stage}  call: {count}  wall: {elapsed * 1000:.1f} ms",
+            f"traced memory: current {current / 1024:.1f} KiB, peak during call {peak / 1024:.1f} KiB",
+            "",
+            "== Hot functions (cumulative) ==",
+            hot.getvalue().strip(),
+            "",
+            "== Top allocators (live traced memory) ==",
+            *map(str, after.statistics("lineno")[:self.top]),
+            "",
+            "== Allocated during this call (net) ==",
+            *map(str, after.compare_to(before, "lineno")[:self.top]),
+        ]
+        if previous is not None:
+            sections += [
+                "",
+                f"== Growth since the previous {stage} sample ==",
+                *map(str, after.compare_to(previous, "lineno")[:self.top]),
+            ]
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile_{time.strftime('%Y%m%d-%H%M%S')}_{stage}_{count:08d}")
+        with open(base + ".txt", "w") as f:
+            f.write("\n".join(sections) + "\n")
+        profile.dump_stats(base + ".prof")
+        self.reports_written += 1
+        self._rotate()
+        logger.info("Profile report written to %s.txt", base)
+
+    def _rotate(self):
+        reports = sorted(glob.glob(os.path.join(self.output_dir, "profile_*.txt")), key=os.path.getmtime)
+        for report in reports[:-self.max_reports]:
+            for path in (report, report[:-len(".txt")] + ".prof"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
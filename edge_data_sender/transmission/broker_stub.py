@@ -0,0 +1,220 @@
+"""
+Minimal in-process MQTT broker stand-in for tests and benchmarks.
+
+Speaks enough MQTT 3.1.1 and 5 for ``MqttHandler``: CONNECT/CONNACK,
+PUBLISH at QoS 0, 1 (PUBACK) and 2 (PUBREC/PUBREL/PUBCOMP),
+SUBSCRIBE/SUBACK, PINGREQ/PINGRESP and DISCONNECT. Published messages are
+counted, not routed to subscribers, so publish throughput can be measured
+without a Mosquitto install::
+
+    with MqttBrokerStub() as broker:
+        handler = MqttHandler(broker.host, broker.port, "sensor/data", qos=1)
+        handler.connect()
+        handler.publish_async(payload).result(timeout=5)
+        broker.wait_for(1)
+"""
+
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import Counter, deque
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = 1, 2, 3, 4, 5, 6, 7
+SUBSCRIBE, SUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 12, 13, 14
+
+MQTT_V5 = 5
+
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise ConnectionError("Client closed the connection")
+    return data
+
+
+def _read_varint(stream):
+    value, shift = 0, 0
+    while True:
+        byte = _read_exact(stream, 1)[0]
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value
+        shift += 7
+        if shift > 21:
+            raise ValueError("Malformed remaining length")
+
+
+def _decode_varint(data, offset):
+    value, shift = 0, 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _packet(packet_type, body=b"", flags=0):
+    length, encoded = len(body), bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | (0x80 if length else 0))
+        if not length:
+            break
+    return bytes([packet_type << 4 | flags]) + bytes(encoded) + body
+
+
+class _BrokerRequestHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.protocol_level = 4
+
+    def handle(self):
+        broker = self.server.broker
+        try:
+            while True:
+                header = _read_exact(self.rfile, 1)[0]
+                body = _read_exact(self.rfile, _read_varint(self.rfile))
+                packet_type, flags = header >> 4, header & 0x0F
+                if packet_type == DISCONNECT:
+                    return
+                reply = self._reply(broker, packet_type, flags, body)
+                if reply:
+                    if broker.ack_delay:
+                        time.sleep(broker.ack_delay)
+                    self.wfile.write(reply)
+        except (ConnectionError, OSError):
+            return
+
+    def _reply(self, broker, packet_type, flags, body):
+        v5 = self.protocol_level == MQTT_V5
+        if packet_type == CONNECT:
+            name_length = struct.unpack_from("!H", body)[0]
+            self.protocol_level = body[2 + name_length]
+            broker._record("connect")
+            # Session present 0, return code 0 (and no properties in v5).
+            return _packet(CONNACK, b"\x00\x00\x00" if self.protocol_level == MQTT_V5 else b"\x00\x00")
+        if packet_type == PUBLISH:
+            qos = (flags >> 1) & 0x03
+            topic_length = struct.unpack_from("!H", body)[0]
+            topic = body[2:2 + topic_length].decode("utf-8")
+            offset = 2 + topic_length
+            packet_id = None
+            if qos:
+                packet_id = body[offset:offset + 2]
+                offset += 2
+            if v5:
+                properties_length, offset = _decode_varint(body, offset)
+                offset += properties_length
+            broker._record_publish(topic, len(body) - offset)
+            if qos == 1:
+                return _packet(PUBACK, packet_id)
+            if qos == 2:
+                return _packet(PUBREC, packet_id)
+            return None
+        if packet_type == PUBREL:
+            return _packet(PUBCOMP, body[:2])
+        if packet_type == SUBSCRIBE:
+            offset = 2
+            if v5:
+                properties_length, offset = _decode_varint(body, offset)
+                offset += properties_length
+            granted = bytearray()
+            while offset < len(body):
+                topic_length = struct.unpack_from("!H", body, offset)[0]
+                offset += 2 + topic_length
+                granted.append(min(body[offset] & 0x03, 2))
+                offset += 1
+            broker._record("subscribe")
+            return _packet(SUBACK, body[:2] + (b"\x00" if v5 else b"") + bytes(granted))
+        if packet_type == PINGREQ:
+            return _packet(PINGRESP)
+        return None
+
+
+class _BrokerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MqttBrokerStub:
+    """Threaded TCP server answering MQTT clients like a broker would.
+
+    ``ack_delay`` adds a fixed delay before every reply (PUBACK, SUBACK...),
+    emulating a broker across a slow link. Received messages are counted in
+    ``messages`` / ``payload_bytes`` and per topic in ``topics``; the last
+    ``keep`` (topic, size) pairs are kept in ``recent``.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, ack_delay=0.0, keep=100):
+        """
+        Args:
+            host (str): Interface to bind.
+            port (int): Port to bind; 0 picks a free port (see ``port``).
+            ack_delay (float): Seconds to wait before each reply.
+            keep (int): Recent messages remembered in ``recent``.
+        """
+        self.ack_delay = ack_delay
+        self.messages = 0
+        self.payload_bytes = 0
+        self.topics = Counter()
+        self.events = Counter()
+        self.recent = deque(maxlen=keep)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._server = _BrokerServer((host, port), _BrokerRequestHandler)
+        self._server.broker = self
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        """Serves clients on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="mqtt-broker-stub", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and releases the port."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def wait_for(self, count, timeout=5.0):
+        """
+        Waits until ``count`` messages have been received in total.
+        Returns:
+            bool: Whether the count was reached within ``timeout`` seconds.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self.messages >= count, timeout)
+
+    def _record(self, event):
+        with self._condition:
+            self.events[event] += 1
+
+    def _record_publish(self, topic, size):
+        with self._condition:
+            self.messages += 1
+            self.payload_bytes += size
+            self.topics[topic] += 1
+            self.recent.append((topic, size))
+            self._condition.notify_all()
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import struct
+import threading
+import time
+import uuid
+
+# Binary chunk layout: magic, 16-byte transfer id, chunk index, chunk count, data.
+CHUNK_MAGIC = b"EDCC"
+_CHUNK_HEADER = struct.Struct("!4s16sII")
+
+
+def split_message(body, chunk_size, transfer_id=None):
+    """
+    Splits a message body into a manifest and fixed-size numbered chunks.
+
+    Args:
+        body (bytes | str): Serialized message (e.g. the JSON payload).
+        chunk_size (int): Maximum number of data bytes per chunk.
+        transfer_id (str | None): Hex transfer id; a random one is generated if None.
+
+    Returns:
+        tuple[bytes, list[bytes]]: JSON manifest and the binary chunk messages.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    transfer = uuid.UUID(hex=transfer_id) if transfer_id else uuid.uuid4()
+    chunk_count = max(1, -(-len(body) // chunk_size))
+
+    manifest = {
+        "type": "manifest",
+        "transfer_id": transfer.hex,
+        "total_size": len(body),
+        "chunk_size": chunk_size,
+        "chunk_count": chunk_count,
+        "sha256": hashlib.sha256(body).hexdigest(),
+    }
+    view = memoryview(body)
+    chunks = [
+        _CHUNK_HEADER.pack(CHUNK_MAGIC, transfer.bytes, index, chunk_count)
+        + view[index * chunk_size:(index + 1) * chunk_size].tobytes()
+        for index in range(chunk_count)
+    ]
+    return json.dumps(manifest).encode("utf-8"), chunks
+
+
+class ChecksumMismatch(ValueError):
+    """Raised when a reassembled message does not match its manifest checksum."""
+
+
+class _Transfer:
+    def __init__(self, chunk_count=None):
+        self.manifest = None
+        self.chunk_count = chunk_count
+        self.chunks = {}
+        self.first_seen = time.monotonic()
+
+    @property
+    def complete(self):
+        return self.manifest is not None and len(self.chunks) == self.chunk_count
+
+    def missing(self):
+        if self.chunk_count is None:
+            return []
+        return [index for index in range(self.chunk_count) if index not in self.chunks]
+
+
+class ChunkReassembler:
+    """Receiver-side reassembly of messages sent with ``split_message``.
+
+    Feed every message from the chunk topic to ``add``; manifests and chunks may
+    arrive in any order and interleaved with other transfers. Transfers that are
+    not complete within ``timeout`` seconds are dropped by ``expire``, which
+    reports the chunks that never arrived.
+
+    Example::
+
+        reassembler = ChunkReassembler(timeout=30)
+
+        def on_message(client, userdata, msg):
+            body = reassembler.add(msg.payload)
+            if body is not None:
+                handle(json.loads(body))
+    """
+
+    def __init__(self, timeout=30.0, max_transfers=64):
+        """
+        Args:
+            timeout (float): Seconds a transfer may stay incomplete.
+            max_transfers (int): Maximum concurrently tracked transfers; the
+                oldest is dropped when exceeded.
+        """
+        self.timeout = timeout
+        self.max_transfers = max_transfers
+        self.completed = 0
+        self.expired = 0
+        self.corrupted = 0
+        self._transfers = {}
+        self._lock = threading.Lock()
+
+    def add(self, message):
+        """
+        Adds a manifest or chunk message.
+
+        Args:
+            message (bytes): Raw MQTT payload from the chunk topic.
+
+        Returns:
+            bytes | None: The reassembled body once the transfer is complete.
+
+        Raises:
+            ChecksumMismatch: If the reassembled body fails the checksum.
+            ValueError: If the message is neither a manifest nor a chunk, or its
+                chunk index or count does not match the transfer.
+        """
+        if message[:len(CHUNK_MAGIC)] == CHUNK_MAGIC:
+            magic, transfer_bytes, index, chunk_count = _CHUNK_HEADER.unpack_from(message)
+            transfer_id = uuid.UUID(bytes=transfer_bytes).hex
+            if index >= chunk_count:
+                raise ValueError(f"Chunk index {index} out of range for {chunk_count} chunks")
+            with self._lock:
+                transfer = self._get_transfer(transfer_id, chunk_count)
+                self._check_chunk_count(transfer_id, transfer, chunk_count)
+                transfer.chunks[index] = bytes(message[_CHUNK_HEADER.size:])
+                return self._finish_if_complete(transfer_id, transfer)
+
+        manifest = json.loads(message)
+        if manifest.get("type") != "manifest":
+            raise ValueError("Message is not a chunk manifest")
+        with self._lock:
+            transfer = self._get_transfer(manifest["transfer_id"], manifest["chunk_count"])
+            self._check_chunk_count(manifest["transfer_id"], transfer, manifest["chunk_count"])
+            transfer.manifest = manifest
+            return self._finish_if_complete(manifest["transfer_id"], transfer)
+
+    def missing(self, transfer_id):
+        """
+        Args:
+            transfer_id (str): Transfer id from the manifest.
+
+        Returns:
+            list[int]: Indexes of chunks not yet received.
+        """
+        with self._lock:
+            transfer = self._transfers.get(transfer_id)
+            return transfer.missing() if transfer else []
+
+    def pending(self):
+        """
+        Returns:
+            dict[str, list[int]]: Missing chunk indexes per incomplete transfer.
+        """
+        with self._lock:
+            return {transfer_id: transfer.missing() for transfer_id, transfer in self._transfers.items()}
+
+    def expire(self, now=None):
+        """
+        Drops transfers that exceeded the timeout.
+
+        Args:
+            now (float | None): ``time.monotonic()`` value to compare against.
+
+        Returns:
+            dict[str, list[int]]: Missing chunk indexes of each expired transfer.
+        """
+        now = time.monotonic() if now is None else now
+        expired = {}
+        with self._lock:
+            for transfer_id, transfer in list(self._transfers.items()):
+                if now - transfer.first_seen > self.timeout:
+                    expired[transfer_id] = transfer.missing()
+                    del self._transfers[transfer_id]
+            self.expired += len(expired)
+        return expired
+
+    def _get_transfer(self, transfer_id, chunk_count):
+        transfer = self._transfers.get(transfer_id)
+        if transfer is None:
+            if len(self._transfers) >= self.max_transfers:
+                oldest = min(self._transfers, key=lambda key: self._transfers[key].first_seen)
+                del self._transfers[oldest]
+                self.expired += 1
+            transfer = self._transfers[transfer_id] = _Transfer(chunk_count)
+        return transfer
+
+    def _check_chunk_count(self, transfer_id, transfer, chunk_count):
+        if chunk_count != transfer.chunk_count:
+            raise ValueError(
+                f"Transfer {transfer_id} has {transfer.chunk_count} chunks, message claims {chunk_count}"
+            )
+
+    def _finish_if_complete(self, transfer_id, transfer):
+        if not transfer.complete:
+            return None
+        del self._transfers[transfer_id]
+        body = b"".join(transfer.chunks[index] for index in range(transfer.chunk_count))
+        if len(body) != transfer.manifest["total_size"] or \
+                hashlib.sha256(body).hexdigest() != transfer.manifest["sha256"]:
+            self.corrupted += 1
+            raise ChecksumMismatch(f"Checksum mismatch for transfer {transfer_id}")
+        self.completed += 1
+        return body
@@ -0,0 +1,178 @@
+import re
+import struct
+import threading
+import zlib
+from collections import Counter
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:  # zlib with a preset dictionary is used instead
+    ZSTD_AVAILABLE = False
+
+# Compressed message layout: magic, codec, dictionary id (0 = none), compressed body.
+# Uncompressed JSON messages start with "{", so consumers can tell them apart.
+COMPRESSION_MAGIC = b"EDCZ"
+_COMPRESSION_HEADER = struct.Struct("!4sBI")
+CODECS = {"zlib": 1, "zstd": 2}
+_CODEC_NAMES = {value: name for name, value in CODECS.items()}
+
+# "key": value pairs and bare keys of JSON payloads, used to build zlib dictionaries.
+_JSON_PAIR = re.compile(rb'"[^"\\]{1,64}": ?(?:"[^"\\]{0,64}"|-?[0-9.eE+-]{1,24}|true|false|null)')
+_JSON_KEY = re.compile(rb'"[^"\\]{1,64}": ?')
+
+
+def dictionary_id(dictionary):
+    """
+    Args:
+        dictionary (bytes | None): Compression dictionary.
+    Returns:
+        int: Identifier carried in the message header (0 for no dictionary).
+    """
+    if not dictionary:
+        return 0
+    return zlib.crc32(dictionary) or 1
+
+
+def load_dictionary(path):
+    """Reads a dictionary written by ``train_compression_dictionary.py``."""
+    with open(path, "rb") as dictionary_file:
+        return dictionary_file.read()
+
+
+def _require_codec(codec):
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported compression codec: {codec}")
+    if codec == "zstd" and not ZSTD_AVAILABLE:
+        raise ValueError("zstd compression requires the 'zstandard' package")
+
+
+class PayloadCompressor:
+    """Compresses small JSON messages with a shared pre-trained dictionary.
+
+    Metadata and sensor messages are a few hundred bytes of mostly repeated keys
+    and values, which generic compression cannot exploit within one message. A
+    dictionary trained on captured payloads supplies that shared context. Each
+    compressed message starts with a header naming the codec and dictionary, so
+    consumers can decode compressed and plain messages on the same topic with
+    ``decompress_payload``.
+    """
+
+    def __init__(self, codec="zlib", dictionary=None, level=6, min_size=64):
+        """
+        Args:
+            codec (str): ``"zlib"`` or ``"zstd"`` (needs ``zstandard``).
+            dictionary (bytes | None): Pre-trained dictionary shared with consumers.
+            level (int): Compression level.
+            min_size (int): Messages smaller than this are sent uncompressed.
+        """
+        _require_codec(codec)
+        self.codec = codec
+        self.dictionary = dictionary or None
+        self.level = level
+        self.min_size = min_size
+        self._header = _COMPRESSION_HEADER.pack(COMPRESSION_MAGIC, CODECS[codec], dictionary_id(self.dictionary))
+        self._lock = threading.Lock()
+        if codec == "zstd":
+            zstd_dict = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+            self._zstd = zstandard.ZstdCompressor(level=level, dict_data=zstd_dict, write_checksum=False)
+
+    def compress(self, body):
+        """
+        Args:
+            body (bytes | str): Serialized message.
+        Returns:
+            bytes: Header plus compressed body, or the original body when
+            compression does not make it smaller.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if len(body) < self.min_size:
+            return body
+        if self.codec == "zstd":
+            with self._lock:
+                compressed = self._zstd.compress(body)
+        else:
+            # Raw deflate: the header already identifies codec and dictionary.
+            if self.dictionary:
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=self.dictionary)
+            else:
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+            compressed = compressor.compress(body) + compressor.flush()
+        message = self._header + compressed
+        return message if len(message) < len(body) else body
+
+
+def decompress_payload(message, dictionaries=()):
+    """
+    Returns the original body of a message sent by ``PayloadCompressor``.
+
+    Args:
+        message (bytes): Raw MQTT payload; uncompressed messages are returned as is.
+        dictionaries (iterable[bytes]): Dictionaries the sender may have used.
+    Returns:
+        bytes: Decompressed message body.
+    Raises:
+        ValueError: If the codec or dictionary is unknown.
+    """
+    if message[:len(COMPRESSION_MAGIC)] != COMPRESSION_MAGIC:
+        return message
+    _, codec_id, dict_id = _COMPRESSION_HEADER.unpack_from(message)
+    codec = _CODEC_NAMES.get(codec_id)
+    if codec is None:
+        raise ValueError(f"Unknown compression codec id: {codec_id}")
+    _require_codec(codec)
+    dictionary = None
+    if dict_id:
+        dictionary = next((d for d in dictionaries if dictionary_id(d) == dict_id), None)
+        if dictionary is None:
+            raise ValueError(f"Message compressed with unknown dictionary {dict_id:#010x}")
+
+    body = message[_COMPRESSION_HEADER.size:]
+    if codec == "zstd":
+        zstd_dict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=zstd_dict).decompressobj().decompress(body)
+    decompressor = zlib.decompressobj(-15, zdict=dictionary) if dictionary else zlib.decompressobj(-15)
+    return decompressor.decompress(body) + decompressor.flush()
+
+
+def train_dictionary(samples, size=16 * 1024, codec="zlib"):
+    """
+    Builds a compression dictionary from captured message bodies.
+
+    With zstd the library's trainer is used. For zlib, the JSON keys and
+    ``"key": value`` pairs that recur across samples are ranked by the bytes
+    they would save and packed into the dictionary, most valuable last, since
+    deflate reaches the end of the dictionary with the shortest distances.
+    Args:
+        samples (iterable[bytes | str]): Serialized messages (without image data).
+        size (int): Maximum dictionary size in bytes (zlib uses at most 32 KiB).
+        codec (str): Codec the dictionary is trained for.
+    Returns:
+        bytes: Dictionary.
+    """
+    _require_codec(codec)
+    samples = [sample.encode("utf-8") if isinstance(sample, str) else bytes(sample) for sample in samples]
+    if not samples:
+        raise ValueError("At least one sample is required")
+    if codec == "zstd":
+        try:
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Could not train zstd dictionary: {e}") from e
+
+    size = min(size, 32 * 1024)
+    counts = Counter()
+    for sample in samples:
+        counts.update(set(_JSON_PAIR.findall(sample)) | set(_JSON_KEY.findall(sample)))
+    recurring = [fragment for fragment, count in counts.items() if count > 1 or len(samples) == 1]
+    recurring.sort(key=lambda fragment: counts[fragment] * len(fragment), reverse=True)
+
+    chosen = []
+    total = 0
+    for fragment in recurring:
+        if total + len(fragment) + 2 > size:
+            continue
+        chosen.append(fragment)
+        total += len(fragment) + 2
+    return b", ".join(reversed(chosen))
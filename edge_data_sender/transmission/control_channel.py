@@ -0,0 +1,197 @@
+import json
+import logging
+import math
+import threading
+import time
+
+# Set up logging for error handling
+logger = logging.getLogger(__name__)
+
+
+def finite_number(value):
+    """Validator for any finite number (JSON also allows NaN and Infinity)."""
+    if isinstance(value, bool):
+        raise ValueError("must be a number")
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError("must be a finite number")
+    return value
+
+
+def positive_number(value):
+    """Validator for intervals and other strictly positive numbers."""
+    value = finite_number(value)
+    if value <= 0:
+        raise ValueError("must be greater than zero")
+    return value
+
+
+def jpeg_quality(value):
+    """Validator for a JPEG quality (1-100), or None for the default."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or finite_number(value) != value or int(value) != value or not 1 <= int(value) <= 100:
+        raise ValueError("must be an integer between 1 and 100")
+    return int(value)
+
+
+def resolution(value):
+    """Validator for a ``[width, height]`` bound, or None for full resolution."""
+    if value is None:
+        return None
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError("must be [width, height]")
+    width, height = (int(finite_number(side)) for side in value)
+    if width < 1 or height < 1 or (width, height) != tuple(value):
+        raise ValueError("width and height must be positive integers")
+    return (width, height)
+
+
+def topic_name(value):
+    """Validator for a publish topic (no wildcards)."""
+    if not isinstance(value, str) or not value or "+" in value or "#" in value:
+        raise ValueError("must be a non-empty topic without wildcards")
+    return value
+
+
+def one_of(*choices):
+    """Returns a validator accepting only the given values."""
+    def validate(value):
+        if value not in choices:
+            raise ValueError(f"must be one of {', '.join(map(str, choices))}")
+        return value
+    return validate
+
+
+class RuntimeSettings:
+    """Thread-safe set of settings that can be changed while the collector runs.
+
+    ``apply`` validates every requested change first and only then updates all
+    of them under one lock, so readers of ``snapshot`` see either none or all of
+    a command's changes. Listeners are called afterwards to push changes into
+    components that hold their own copy (camera intervals, publish topic).
+    """
+
+    def __init__(self, initial, validators):
+        """
+        Args:
+            initial (dict): Setting name -> initial value.
+            validators (dict): Setting name -> callable returning the normalised
+                value or raising ``ValueError``/``TypeError``. Only settings with
+                a validator can be changed at runtime.
+        """
+        self.validators = dict(validators)
+        self.revision = 0
+        self._values = dict(initial)
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Copy of the current settings.
+        """
+        with self._lock:
+            return dict(self._values)
+
+    def get(self, name, default=None):
+        with self._lock:
+            return self._values.get(name, default)
+
+    def add_listener(self, callback):
+        """Registers ``callback(changes, snapshot)``, called after each applied change."""
+        self._listeners.append(callback)
+
+    def apply(self, changes):
+        """
+        Validates and applies a set of changes atomically.
+        Args:
+            changes (dict): Setting name -> requested value.
+        Returns:
+            dict: The normalised values that were applied.
+        Raises:
+            ValueError: If any change is invalid; nothing is applied then.
+        """
+        if not isinstance(changes, dict) or not changes:
+            raise ValueError("no settings given")
+        validated = {}
+        errors = []
+        for name, value in changes.items():
+            validator = self.validators.get(name)
+            if validator is None:
+                errors.append(f"{name}: unknown setting")
+                continue
+            try:
+                validated[name] = validator(value)
+            except (TypeError, ValueError, OverflowError) as e:
+                errors.append(f"{name}: {e}")
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        with self._lock:
+            self._values.update(validated)
+            self.revision += 1
+            snapshot = dict(self._values)
+        for listener in self._listeners:
+            try:
+                listener(validated, snapshot)
+            except Exception as e:
+                logger.error("Failed to apply runtime setting change: %s", e)
+        return validated
+
+
+class ControlChannel:
+    """Applies configuration commands received on an MQTT control topic.
+
+    Commands are JSON messages::
+
+        {"command_id": "c-17", "set": {"interval": 10, "quality": 75}}
+
+    Every command is acknowledged on the ack topic with its ``command_id``, a
+    ``status`` of ``"applied"`` or ``"rejected"``, the applied values or the
+    validation errors, the settings ``revision`` and an ``ack_ts`` timestamp.
+    """
+
+    def __init__(self, mqtt_handler, settings, command_topic, ack_topic):
+        """
+        Args:
+            mqtt_handler (MqttHandler): Handler to subscribe and acknowledge with.
+            settings (RuntimeSettings): Settings the commands change.
+            command_topic (str): Topic commands arrive on.
+            ack_topic (str): Topic acknowledgements are published to.
+        """
+        self.mqtt_handler = mqtt_handler
+        self.settings = settings
+        self.command_topic = command_topic
+        self.ack_topic = ack_topic
+
+    def start(self):
+        """Subscribes to the command topic."""
+        self.mqtt_handler.subscribe(self.command_topic, self.handle_command, qos=1)
+
+    def handle_command(self, payload, topic=None):
+        """
+        Applies one command and publishes its acknowledgement.
+        Args:
+            payload (bytes | str): JSON command.
+            topic (str | None): Topic the command arrived on.
+        Returns:
+            dict: The acknowledgement that was published.
+        """
+        command_id = None
+        try:
+            command = json.loads(payload)
+            if not isinstance(command, dict):
+                raise ValueError("command must be a JSON object")
+            command_id = command.get("command_id")
+            applied = self.settings.apply(command.get("set"))
+            ack = {"command_id": command_id, "status": "applied", "applied": applied, "errors": []}
+            logger.info("Applied control command %s: %s", command_id, applied)
+        except ValueError as e:
+            ack = {"command_id": command_id, "status": "rejected", "applied": {}, "errors": [str(e)]}
+            logger.error("Rejected control command %s: %s", command_id, e)
+
+        ack["revision"] = self.settings.revision
+        ack["ack_ts"] = time.time()
+        self.mqtt_handler.publish(ack, topic=self.ack_topic, qos=1)
+        return ack
@@ -0,0 +1,145 @@
+import json
+import logging
+import math
+import threading
+import time
+
+# Set up logging for error handling
+logger = logging.getLogger(__name__)
+
+
+class FeedbackController:
+    """Adapts capture rate and image size to what consumers report they can handle.
+
+    Consumers publish small JSON messages on the feedback topic::
+
+        {"consumer_id": "jetson-1", "queue_depth": 7}
+        {"consumer_id": "jetson-2", "desired_interval": 10.0}   # or "desired_rate" in frames/s
+
+    Each consumer's queue depth is mapped to a pressure between 0 (queue at or
+    below ``queue_depth_bounds[0]``) and 1 (at or above ``queue_depth_bounds[1]``).
+    The slowest consumer governs; its pressure is smoothed and moves the capture
+    interval, JPEG quality and resolution scale linearly within their bounds. A
+    desired interval or rate from any consumer further lengthens the interval.
+    Feedback older than ``stale_after`` seconds is ignored, so a consumer that
+    disappears no longer throttles the collector.
+    """
+
+    def __init__(self, interval_bounds=(5.0, 30.0), quality_bounds=(50, 90), scale_bounds=(0.5, 1.0),
+                 queue_depth_bounds=(2, 10), smoothing=0.5, stale_after=60.0, clock=time.monotonic):
+        """
+        Args:
+            interval_bounds (tuple[float, float]): Capture interval range in seconds.
+            quality_bounds (tuple[int, int]): JPEG quality range.
+            scale_bounds (tuple[float, float]): Resolution scale range.
+            queue_depth_bounds (tuple[int, int]): Consumer queue depths mapped to
+                no pressure and full pressure.
+            smoothing (float): Weight of a new pressure sample (1 = no smoothing).
+            stale_after (float): Seconds after which a consumer's feedback expires.
+            clock (callable): Monotonic time source.
+        """
+        if interval_bounds[0] > interval_bounds[1] or quality_bounds[0] > quality_bounds[1] \
+                or scale_bounds[0] > scale_bounds[1]:
+            raise ValueError("Bounds must be given as (minimum, maximum)")
+        if queue_depth_bounds[0] >= queue_depth_bounds[1]:
+            raise ValueError("queue_depth_bounds must be increasing")
+        self.interval_bounds = interval_bounds
+        self.quality_bounds = quality_bounds
+        self.scale_bounds = scale_bounds
+        self.queue_depth_bounds = queue_depth_bounds
+        self.smoothing = smoothing
+        self.stale_after = stale_after
+        self.clock = clock
+
+        # consumer_id -> (received at, pressure, desired interval | None)
+        self._consumers = {}
+        self._pressure = 0.0
+        self._lock = threading.Lock()
+
+    def handle_feedback(self, payload, topic=None):
+        """
+        Applies one feedback message. Malformed messages are logged and ignored.
+        Args:
+            payload (bytes | str | dict): Feedback message.
+            topic (str | None): Topic the message arrived on (unused).
+        """
+        try:
+            message = json.loads(payload) if isinstance(payload, (bytes, str)) else dict(payload)
+            consumer_id = str(message.get("consumer_id", "default"))
+            pressure = self._queue_pressure(message.get("queue_depth"))
+            desired_interval = self._desired_interval(message)
+        except (TypeError, ValueError) as e:
+            logger.error("Ignoring malformed feedback message: %s", e)
+            return
+
+        with self._lock:
+            self._consumers[consumer_id] = (self.clock(), pressure, desired_interval)
+            live = self._live_consumers()
+            target = max(entry[1] for entry in live)
+            self._pressure += self.smoothing * (target - self._pressure)
+
+    def adjustments(self):
+        """
+        Returns:
+            dict | None: Current ``interval``, ``quality``, ``scale`` and
+            ``pressure`` plus the number of ``consumers`` reporting, or None when
+            no consumer has sent recent feedback.
+        """
+        with self._lock:
+            live = self._live_consumers()
+            if not live:
+                self._pressure = 0.0
+                return None
+            pressure = self._pressure
+            desired = [entry[2] for entry in live if entry[2] is not None]
+
+        interval = _lerp(self.interval_bounds, pressure)
+        if desired:
+            interval = max(interval, max(desired))
+        interval = min(max(interval, self.interval_bounds[0]), self.interval_bounds[1])
+        return {
+            "interval": round(interval, 3),
+            "quality": int(round(_lerp(self.quality_bounds[::-1], pressure))),
+            "scale": round(_lerp(self.scale_bounds[::-1], pressure), 3),
+            "pressure": round(pressure, 3),
+            "consumers": len(live),
+        }
+
+    def _live_consumers(self):
+        cutoff = self.clock() - self.stale_after
+        for consumer_id in [key for key, entry in self._consumers.items() if entry[0] < cutoff]:
+            del self._consumers[consumer_id]
+        return list(self._consumers.values())
+
+    def _queue_pressure(self, queue_depth):
+        if queue_depth is None:
+            return 0.0
+        low, high = self.queue_depth_bounds
+        return min(max((_finite(queue_depth, "queue_depth") - low) / (high - low), 0.0), 1.0)
+
+    @staticmethod
+    def _desired_interval(message):
+        if message.get("desired_interval") is not None:
+            interval = _finite(message["desired_interval"], "desired_interval")
+        elif message.get("desired_rate") is not None:
+            rate = _finite(message["desired_rate"], "desired_rate")
+            if rate <= 0:
+                raise ValueError("desired_rate must be positive")
+            interval = 1.0 / rate
+        else:
+            return None
+        if interval <= 0:
+            raise ValueError("desired_interval must be positive")
+        return interval
+
+
+def _finite(value, name):
+    # json.loads accepts NaN and Infinity, which would poison the smoothed pressure.
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+
+def _lerp(bounds, fraction):
+    return bounds[0] + (bounds[1] - bounds[0]) * fraction
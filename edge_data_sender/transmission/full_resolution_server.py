@@ -0,0 +1,84 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Set up logging for error handling
+logger = logging.getLogger(__name__)
+
+
+class FullResolutionServer:
+    """Serves full-resolution frames on request over MQTT.
+
+    The Processing Pi publishes a request such as
+    ``{"frame_id": "camera_01-1738929600123", "request_id": "abc"}`` on the
+    request topic. The server looks the frame up and answers on the response
+    topic (or on ``response_topic`` if the request names one) with::
+
+        {"frame_id": ..., "request_id": ..., "found": true,
+         "image_data": "<base64-jpeg>", "metadata": {...}}
+
+    Unknown or evicted frames are answered with ``"found": false``. Lookups and
+    encoding run on a worker thread so the MQTT network loop is never blocked
+    by a full-resolution encode.
+    """
+
+    def __init__(self, mqtt_handler, frame_lookup, request_topic, response_topic):
+        """
+        Args:
+            mqtt_handler (MqttHandler): Connected handler used to subscribe and reply.
+            frame_lookup (callable): ``frame_lookup(frame_id)`` returning a dict with
+                ``image_data`` (Base64 string) and ``metadata``, or None.
+            request_topic (str): Topic on which frame requests arrive.
+            response_topic (str): Default topic for responses.
+        """
+        self.mqtt_handler = mqtt_handler
+        self.frame_lookup = frame_lookup
+        self.request_topic = request_topic
+        self.response_topic = response_topic
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="full-res")
+
+    def start(self):
+        """Subscribes to the request topic."""
+        self.mqtt_handler.subscribe(self.request_topic, self.handle_request)
+
+    def stop(self):
+        """Stops the worker thread once pending requests are answered."""
+        self._executor.shutdown(wait=True)
+
+    def handle_request(self, payload, topic=None):
+        """
+        Parses a request message and schedules the response.
+        Args:
+            payload (bytes | str): Raw JSON request body.
+            topic (str | None): Topic the request arrived on.
+        """
+        try:
+            request = json.loads(payload)
+            frame_id = request["frame_id"]
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error("Ignoring malformed full-resolution request: %s", e)
+            return
+        self._executor.submit(self._respond, frame_id, request)
+
+    def _respond(self, frame_id, request):
+        response = {
+            "frame_id": frame_id,
+            "request_id": request.get("request_id"),
+        }
+        try:
+            frame = self.frame_lookup(frame_id)
+        except Exception as e:
+            logger.error("Failed to load frame %s: %s", frame_id, e)
+            frame = None
+
+        if frame is None:
+            response["found"] = False
+        else:
+            response["found"] = True
+            response["image_data"] = frame["image_data"]
+            response["metadata"] = dict(frame.get("metadata") or {})
+
+        self.mqtt_handler.publish(
+            response,
+            topic=request.get("response_topic") or self.response_topic,
+        )
@@ -1,68 +1,501 @@
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
 import json
 import time
 import logging
+import threading
+from collections import Counter, deque, namedtuple
+from concurrent.futures import Future
+
+from ..monitoring.metrics import REGISTRY, weak_callback
+from .chunking import split_message
+from .partitioning import partition_topic
 
 # Set up logging for error handling
 logger = logging.getLogger(__name__)
 
+# Result of an acknowledged publish: latency is the time from the publish call
+# until the message left the socket (QoS 0) or the broker acknowledged it (QoS 1/2).
+PublishAck = namedtuple("PublishAck", ["mid", "topic", "qos", "size", "latency"])
+
+# Seconds an early acknowledgement waits for its publish() call to register it
+EARLY_ACK_TTL = 10.0
+
+MQTT_SENT = REGISTRY.counter("mqtt_messages_sent_total", "Messages sent or acknowledged", ("client_id",))
+MQTT_SENT_BYTES = REGISTRY.counter("mqtt_sent_bytes_total", "Bytes of sent messages", ("client_id",))
+MQTT_DROPPED = REGISTRY.counter("mqtt_messages_dropped_total", "Messages known not to be sent", ("client_id", "reason"))
+MQTT_PUBLISH_SECONDS = REGISTRY.histogram(
+    "mqtt_publish_seconds", "Time from publish call to socket write (QoS 0) or broker ack", ("client_id",)
+)
+MQTT_INFLIGHT = REGISTRY.gauge("mqtt_inflight_messages", "Messages published but not yet sent/acknowledged", ("client_id",))
+MQTT_CONNECTED = REGISTRY.gauge("mqtt_connected", "1 while connected to the broker", ("client_id",))
+
+
 class MqttHandler:
-    def __init__(self, broker_address, port, topic):
+    def __init__(self, broker_address, port, topic, qos=0, max_inflight=10, client_id="flood-detection-collector",
+                 chunk_size=None, chunk_threshold=None, protocol="3.1.1", message_expiry=None,
+                 user_property_keys=("camera_id", "motion", "sample_id", "frame_id"), partitions=0,
+                 partition_key="camera_id", compressor=None):
         """
         Initializes the MQTT handler.
         Args:
             broker_address (str): IP address of the MQTT broker.
             port (int): Port number for the MQTT broker.
             topic (str): Topic to publish messages.
+            qos (int): Default QoS level for published messages.
+            max_inflight (int): Maximum number of messages ``publish_async`` keeps
+                in flight (queued in paho or awaiting acknowledgement).
+            client_id (str): MQTT client id; must be unique per connection.
+            chunk_size (int | None): Enables chunked transfer: messages larger
+                than ``chunk_threshold`` bytes are sent (by ``publish`` and
+                ``publish_async``) as a manifest plus chunks of this size on
+                ``<topic>/chunked``.
+            chunk_threshold (int | None): Size above which messages are chunked;
+                defaults to ``chunk_size``.
+            protocol (str): ``"3.1.1"`` or ``"5"``. MQTT v5 enables topic aliases
+                (when the broker allows them), user properties and message expiry.
+            message_expiry (int | None): MQTT v5 message expiry in seconds; the
+                broker discards messages not delivered within this time.
+            user_property_keys (tuple[str, ...]): Metadata keys copied into MQTT v5
+                user properties so brokers and consumers can route without
+                parsing the JSON body.
+            partitions (int): When greater than zero, messages for the default
+                topic are published on ``<topic>/<partition>``, where the
+                partition is a stable hash of ``metadata[partition_key]``. All
+                messages of one camera share a sub-topic and therefore stay in
+                order.
+            partition_key (str): Metadata key used for partitioning.
+            compressor (PayloadCompressor | None): Compresses messages without
+                ``image_data`` (telemetry, acknowledgements); image messages are
+                sent as plain JSON.
         """
         self.broker_address = broker_address
         self.port = port
         self.topic = topic
-        # Fixed client ID and clean session enabled
-        self.client = mqtt.Client(
-            client_id="flood-detection-collector",
-            clean_session=True
-        )
-        # Limit internal buffer to prevent memory buildup
-        self.client.max_queued_messages_set(10)
+        self.qos = qos
+        self.max_inflight = max_inflight
+        self.chunk_size = chunk_size
+        self.chunk_threshold = chunk_threshold or chunk_size
+        if protocol not in ("3.1.1", "5"):
+            raise ValueError(f"Unsupported MQTT protocol version: {protocol}")
+        self.use_v5 = protocol == "5"
+        self.message_expiry = message_expiry
+        self.user_property_keys = tuple(user_property_keys)
+        self.partitions = partitions
+        self.partition_key = partition_key
+        self.compressor = compressor
+        if self.use_v5:
+            # Clean start is requested in connect(); v5 has no clean_session flag.
+            self.client = mqtt.Client(client_id=client_id, protocol=mqtt.MQTTv5)
+        else:
+            # Fixed client ID and clean session enabled
+            self.client = mqtt.Client(
+                client_id=client_id,
+                clean_session=True
+            )
+        # Limit internal buffer to prevent memory buildup; the in-flight window
+        # keeps publish_async below this limit.
+        self.client.max_queued_messages_set(max(10, max_inflight))
+        self.client.max_inflight_messages_set(max_inflight)
+        # Topic filter -> (callback, qos) for inbound request/control topics
+        self._subscriptions = {}
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+        self.client.on_publish = self._on_publish
+        self.client.on_disconnect = self._on_disconnect
+
+        # mid -> (future | None, start time, topic, qos, size, holds window slot)
+        self._pending = {}
+        # mid -> arrival time of acks that beat their publish() call; aged out,
+        # because mids wrap at 65535 and a stale one could match a later publish.
+        self._early_acks = {}
+        self._pending_lock = threading.Lock()
+        self._window = threading.BoundedSemaphore(max_inflight)
+        self._latencies = deque(maxlen=1000)
+        # Messages this handler knows it failed to send, by reason
+        self._drops = Counter()
+        self._drops_lock = threading.Lock()
+        self.client_id = client_id
+        self._inflight_gauge = weak_callback(self, lambda handler: handler.inflight)
+        MQTT_INFLIGHT.set_function(self._inflight_gauge, client_id=client_id)
+        MQTT_CONNECTED.set(0, client_id=client_id)
+
+        # MQTT v5 topic aliases granted by the broker for the current connection
+        self._topic_alias_maximum = 0
+        self._topic_aliases = {}
+        self._alias_lock = threading.Lock()
 
     def connect(self):
         """Connects to the MQTT broker with keep-alive interval."""
         try:
             # Connect with 60 second keep-alive interval
-            self.client.connect(self.broker_address, self.port, keepalive=60)
+            if self.use_v5:
+                self.client.connect(self.broker_address, self.port, keepalive=60, clean_start=True)
+            else:
+                self.client.connect(self.broker_address, self.port, keepalive=60)
             # Start non-blocking background loop
             self.client.loop_start()
         except Exception as e:
-            logger.error(f"Failed to connect to MQTT broker: {e}")
+            logger.error("Failed to connect to MQTT broker: %s", e)
             raise
 
-    def publish(self, payload):
+    def close(self):
+        """Disconnects, stops the network loop and removes this handler's gauges."""
+        try:
+            self.client.disconnect()
+            self.client.loop_stop()
+        except Exception as e:
+            logger.error("Error while closing MQTT connection: %s", e)
+        MQTT_INFLIGHT.remove(self._inflight_gauge, client_id=self.client_id)
+        MQTT_CONNECTED.remove(client_id=self.client_id)
+
+    def subscribe(self, topic, callback, qos=0):
+        """
+        Registers a callback for messages arriving on a topic.
+
+        Subscriptions are re-established automatically after a reconnect.
+        Callbacks run on the paho network thread and receive the raw message
+        payload (bytes) and the topic it arrived on, so they should hand off any
+        heavy work instead of blocking.
+        Args:
+            topic (str): Topic filter to subscribe to (wildcards allowed).
+            callback (callable): Called as ``callback(payload, topic)``.
+            qos (int): QoS level for the subscription.
+        """
+        self._subscriptions[topic] = (callback, qos)
+        if self.client.is_connected():
+            self.client.subscribe(topic, qos=qos)
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
+        if rc != 0:
+            reason = str(rc) if self.use_v5 else mqtt.connack_string(rc)
+            logger.error("MQTT connection refused: %s", reason)
+            return
+        MQTT_CONNECTED.set(1, client_id=self.client_id)
+        with self._alias_lock:
+            # Aliases are scoped to a single network connection.
+            self._topic_aliases = {}
+            self._topic_alias_maximum = getattr(properties, "TopicAliasMaximum", 0) if self.use_v5 else 0
+        for topic, (_, qos) in self._subscriptions.items():
+            client.subscribe(topic, qos=qos)
+
+    def _on_message(self, client, userdata, message):
+        for topic, (callback, _) in list(self._subscriptions.items()):
+            if mqtt.topic_matches_sub(topic, message.topic):
+                try:
+                    callback(message.payload, message.topic)
+                except Exception as e:
+                    logger.error("Error handling message on %s: %s", message.topic, e)
+
+    @property
+    def inflight(self):
+        """Number of published messages not yet sent/acknowledged."""
+        with self._pending_lock:
+            return len(self._pending)
+
+    @property
+    def queued_messages(self):
+        """
+        Number of tracked messages not yet handed to the broker: QoS 0 messages
+        not yet written, plus QoS 1/2 messages beyond paho's in-flight limit
+        (``max_inflight``), which paho holds back until earlier ones are acknowledged.
+        """
+        with self._pending_lock:
+            unsent = sum(1 for entry in self._pending.values() if entry[3] == 0)
+            awaiting_ack = len(self._pending) - unsent
+        return unsent + max(0, awaiting_ack - self.max_inflight)
+
+    def drop_counts(self):
+        """
+        Counts the messages this handler knows were not sent.
+        Returns:
+            dict[str, int]: ``queue_full`` (paho queue at its limit),
+            ``rc_error`` (other publish return codes), ``window_full`` (no
+            in-flight slot within the timeout), ``disconnect`` (QoS 0 messages
+            lost with the connection) and ``error`` (serialization or client
+            exceptions).
+        """
+        with self._drops_lock:
+            return dict(self._drops)
+
+    def _count_drop(self, reason, count=1):
+        with self._drops_lock:
+            self._drops[reason] += count
+        MQTT_DROPPED.inc(count, client_id=self.client_id, reason=reason)
+
+    def latency_stats(self):
+        """
+        Summarises recent send latencies.
+        Returns:
+            dict: ``count``, ``p50``, ``p99`` and ``max`` in seconds (None when empty).
+        """
+        latencies = sorted(self._latencies)
+        if not latencies:
+            return {"count": 0, "p50": None, "p99": None, "max": None}
+        return {
+            "count": len(latencies),
+            "p50": latencies[int(0.5 * (len(latencies) - 1))],
+            "p99": latencies[int(0.99 * (len(latencies) - 1))],
+            "max": latencies[-1],
+        }
+
+    def publish(self, payload, topic=None, qos=None):
         """
-        Publishes a message to the MQTT topic with QoS 0 (fire-and-forget).
+        Publishes a message to the MQTT topic (QoS 0 by default: fire-and-forget).
+
+        Messages above the chunk threshold are chunked as in ``publish_async``;
+        the chunks take in-flight slots, so the call blocks while the window is
+        full instead of overflowing paho's queue.
         Args:
             payload (dict): JSON-serializable data to be sent.
+            topic (str | None): Topic override; defaults to the handler's topic
+                (or its partition sub-topic).
+            qos (int | None): QoS override; defaults to the handler's QoS.
+        Returns:
+            mqtt.MQTTMessageInfo | None: Publish handle (can be waited on until the
+            message has left the socket; for chunked messages, the last chunk),
+            or None if publishing raised.
         """
         try:
-            metadata = payload.setdefault("metadata", {})
-            capture_ts = metadata.get("collector_capture_ts")
-            if capture_ts is not None:
-                metadata["collector_capture_ts"] = float(capture_ts)
-
-            metadata["collector_publish_ts"] = time.time()
-            payload["metadata"] = metadata
-
-            # Publish with QoS 0, retain=False (explicit for clarity)
-            result = self.client.publish(
-                self.topic, 
-                json.dumps(payload),
-                qos=0,
-                retain=False
-            )
-            
-            # Log errors but don't block - QoS 0 is fire-and-forget
-            if result.rc != mqtt.MQTT_ERR_SUCCESS:
-                logger.error(f"Failed to publish message: {mqtt.error_string(result.rc)}")
+            topic = self._resolve_topic(payload, topic)
+            body = self._encode(payload)
+            user_properties = self._user_properties(payload)
+            if self._needs_chunking(body):
+                future = Future()
+                future.set_running_or_notify_cancel()
+                return self._publish_chunked(body, topic, qos, future, True, None, user_properties)
+            result, _ = self._publish_body(topic, body, qos, None, False, user_properties)
+            return result
         except Exception as e:
             # Log errors but continue publishing
-            logger.error(f"Error during publish: {e}")
+            logger.error("Error during publish: %s", e)
+            self._count_drop("error")
+            return None
+
+    def publish_async(self, payload, topic=None, qos=None, callback=None, block=True, timeout=None):
+        """
+        Publishes a message and tracks it until paho reports it sent.
+
+        At most ``max_inflight`` messages are tracked at once. When the window is
+        full the call blocks (or fails immediately with ``block=False``), which
+        gives callers backpressure based on the real transmit state. Messages
+        above the chunk threshold are split into chunks that each take a window
+        slot, so other traffic can interleave with a large frame.
+        Args:
+            payload (dict): JSON-serializable data to be sent.
+            topic (str | None): Topic override; defaults to the handler's topic
+                (or its partition sub-topic).
+            qos (int | None): QoS override; defaults to the handler's QoS.
+            callback (callable | None): Called with the resolved future.
+            block (bool): Wait for a free in-flight slot.
+            timeout (float | None): Maximum seconds to wait for a slot.
+        Returns:
+            concurrent.futures.Future: Resolves to a ``PublishAck``, or fails with
+            ``RuntimeError`` if the message was rejected or lost on disconnect.
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        topic = self._resolve_topic(payload, topic)
+        try:
+            body = self._encode(payload)
+        except Exception as e:
+            logger.error("Error during publish: %s", e)
+            self._count_drop("error")
+            future.set_exception(e)
+            return future
+
+        user_properties = self._user_properties(payload)
+        if self._needs_chunking(body):
+            self._publish_chunked(body, topic, qos, future, block, timeout, user_properties)
+        else:
+            self._publish_tracked(topic, body, qos, future, block, timeout, user_properties)
+        return future
+
+    def _needs_chunking(self, body):
+        return bool(self.chunk_size) and len(body) > self.chunk_threshold
+
+    def _publish_tracked(self, topic, body, qos, future, block, timeout, user_properties=None):
+        """Returns the paho publish handle, or None if nothing was published."""
+        acquired = self._window.acquire(timeout=timeout) if block else self._window.acquire(blocking=False)
+        if not acquired:
+            self._count_drop("window_full")
+            future.set_exception(RuntimeError("In-flight window full"))
+            return None
+        try:
+            result, _ = self._publish_body(
+                topic, body, qos, future=future, holds_slot=True, user_properties=user_properties
+            )
+            return result
+        except Exception as e:
+            logger.error("Error during publish: %s", e)
+            self._count_drop("error")
+            self._window.release()
+            if not future.done():
+                future.set_exception(e)
+            return None
+
+    def _publish_chunked(self, body, topic, qos, future, block, timeout, user_properties=None):
+        """Returns the publish handle of the last piece sent (None if none was)."""
+        manifest, chunks = split_message(body, self.chunk_size)
+        chunk_topic = f"{topic}/chunked"
+        started = time.monotonic()
+        remaining = [len(chunks) + 1]
+        lock = threading.Lock()
+
+        def on_piece(piece):
+            error = piece.exception()
+            with lock:
+                if future.done():
+                    return
+                if error is not None:
+                    future.set_exception(error)
+                    return
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+                ack = piece.result()
+                future.set_result(
+                    PublishAck(ack.mid, chunk_topic, ack.qos, len(body), time.monotonic() - started)
+                )
+
+        result = None
+        for index, piece_body in enumerate([manifest] + chunks):
+            piece = Future()
+            piece.set_running_or_notify_cancel()
+            piece.add_done_callback(on_piece)
+            # Routing properties travel with the manifest only.
+            result = self._publish_tracked(
+                chunk_topic, piece_body, qos, piece, block, timeout, user_properties if index == 0 else None
+            )
+            if future.done():
+                break
+        return result
+
+    def _serialize(self, payload):
+        metadata = payload.setdefault("metadata", {})
+        capture_ts = metadata.get("collector_capture_ts")
+        if capture_ts is not None:
+            metadata["collector_capture_ts"] = float(capture_ts)
+
+        metadata["collector_publish_ts"] = time.time()
+        payload["metadata"] = metadata
+        return json.dumps(payload)
+
+    def _encode(self, payload):
+        body = self._serialize(payload)
+        if self.compressor is not None and payload.get("image_data") is None:
+            return self.compressor.compress(body)
+        return body
+
+    def _resolve_topic(self, payload, topic):
+        if topic:
+            return topic
+        if not self.partitions:
+            return self.topic
+        key = (payload.get("metadata") or {}).get(self.partition_key) or ""
+        return partition_topic(self.topic, key, self.partitions)
+
+    def _user_properties(self, payload):
+        if not self.use_v5:
+            return None
+        metadata = payload.get("metadata") or {}
+        return [(key, str(metadata[key])) for key in self.user_property_keys if metadata.get(key) is not None]
+
+    def _publish_properties(self, topic, qos, user_properties):
+        """Returns the topic string to send and the MQTT v5 PUBLISH properties."""
+        properties = Properties(PacketTypes.PUBLISH)
+        if user_properties:
+            properties.UserProperty = user_properties
+        if self.message_expiry:
+            properties.MessageExpiryInterval = int(self.message_expiry)
+
+        # Only QoS 0 messages use aliases. paho retransmits QoS 1/2 messages from
+        # its stored packets after a reconnect, when both sides have reset their
+        # alias maps, so those always carry the full topic and no alias.
+        if qos != 0:
+            return topic, properties
+        alias = self._topic_aliases.get(topic)
+        if alias is None and len(self._topic_aliases) < self._topic_alias_maximum:
+            alias = self._topic_aliases[topic] = len(self._topic_aliases) + 1
+            properties.TopicAlias = alias
+        elif alias is not None:
+            properties.TopicAlias = alias
+            topic = ""
+        return topic, properties
+
+    def _publish_body(self, topic, body, qos, future, holds_slot, user_properties=None):
+        qos = self.qos if qos is None else qos
+        started = time.monotonic()
+        if self.use_v5:
+            # Alias assignment and enqueueing must happen in the same order.
+            with self._alias_lock:
+                publish_topic, properties = self._publish_properties(topic, qos, user_properties)
+                result = self.client.publish(publish_topic, body, qos=qos, retain=False, properties=properties)
+        else:
+            # retain=False (explicit for clarity)
+            result = self.client.publish(topic, body, qos=qos, retain=False)
+
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            # Log errors but don't block - the caller decides whether to retry
+            logger.error("Failed to publish message: %s", mqtt.error_string(result.rc))
+            self._count_drop("queue_full" if result.rc == mqtt.MQTT_ERR_QUEUE_SIZE else "rc_error")
+            if holds_slot:
+                self._window.release()
+            if future is not None:
+                future.set_exception(RuntimeError(mqtt.error_string(result.rc)))
+            return result, future
+
+        entry = (future, started, topic, qos, len(body), holds_slot)
+        with self._pending_lock:
+            acked_early = self._early_acks.pop(result.mid, None) is not None
+            if not acked_early:
+                self._pending[result.mid] = entry
+        if acked_early:
+            self._complete(result.mid, entry)
+        return result, future
+
+    def _on_publish(self, client, userdata, mid, *args):
+        with self._pending_lock:
+            entry = self._pending.pop(mid, None)
+            if entry is None:
+                # on_publish can fire before publish() has returned the mid.
+                now = time.monotonic()
+                for stale in [key for key, seen in self._early_acks.items() if now - seen > EARLY_ACK_TTL]:
+                    del self._early_acks[stale]
+                self._early_acks[mid] = now
+                return
+        self._complete(mid, entry)
+
+    def _complete(self, mid, entry):
+        future, started, topic, qos, size, holds_slot = entry
+        latency = time.monotonic() - started
+        self._latencies.append(latency)
+        MQTT_SENT.inc(client_id=self.client_id)
+        MQTT_SENT_BYTES.inc(size, client_id=self.client_id)
+        MQTT_PUBLISH_SECONDS.observe(latency, client_id=self.client_id)
+        if holds_slot:
+            self._window.release()
+        if future is not None:
+            future.set_result(PublishAck(mid, topic, qos, size, latency))
+
+    def _on_disconnect(self, client, userdata, rc, *args):
+        MQTT_CONNECTED.set(0, client_id=self.client_id)
+        if rc != 0:
+            reason = str(rc) if self.use_v5 else mqtt.error_string(rc)
+            logger.error("Unexpected MQTT disconnect: %s", reason)
+        # QoS 0 messages still queued are dropped by paho; QoS 1/2 are retried
+        # after reconnecting and stay tracked.
+        with self._pending_lock:
+            lost = [mid for mid, entry in self._pending.items() if entry[3] == 0]
+            entries = [self._pending.pop(mid) for mid in lost]
+        if entries:
+            self._count_drop("disconnect", len(entries))
+        for future, _, _, _, _, holds_slot in entries:
+            if holds_slot:
+                self._window.release()
+            if future is not None and not future.done():
+                future.set_exception(RuntimeError("Connection lost before message was sent"))
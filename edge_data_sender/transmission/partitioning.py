@@ -0,0 +1,65 @@
+import zlib
+
+
+def partition_for(key, partitions):
+    """
+    Maps a routing key (e.g. a camera id) to a partition number.
+
+    Uses CRC32 rather than ``hash()`` so the mapping is identical across
+    processes, restarts and hosts.
+    Args:
+        key (str): Routing key.
+        partitions (int): Number of partitions.
+    Returns:
+        int: Partition in ``range(partitions)``.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    return zlib.crc32(str(key).encode("utf-8")) % partitions
+
+
+def partition_topic(topic, key, partitions):
+    """
+    Returns the partition sub-topic for a routing key.
+    Args:
+        topic (str): Base topic, e.g. ``sensor/data``.
+        key (str): Routing key.
+        partitions (int): Number of partitions.
+    Returns:
+        str: ``<topic>/<partition>``, e.g. ``sensor/data/3``.
+    """
+    return f"{topic}/{partition_for(key, partitions)}"
+
+
+def subscription_filters(topic, partitions, worker_index=0, worker_count=1, share_group=None):
+    """
+    Returns the topic filters a consumer worker should subscribe to.
+
+    Partitions are assigned round-robin to workers, so every camera is read by
+    exactly one worker and its frames stay in order. Each partition yields its
+    topic and its ``/chunked`` sub-topic, where ``MqttHandler`` publishes
+    chunked transfers. With ``share_group`` each
+    filter is wrapped in an MQTT v5 shared subscription
+    (``$share/<group>/<topic>/<partition>``). A broker spreads a shared
+    subscription's messages across all of its connected members, so each
+    filter must have exactly one active subscriber; a second member on the
+    same filter would receive part of the partition and break per-camera order.
+    Args:
+        topic (str): Base topic the collector publishes to.
+        partitions (int): Number of partitions the collector uses.
+        worker_index (int): Index of this worker in ``range(worker_count)``.
+        worker_count (int): Number of workers sharing the partitions.
+        share_group (str | None): Shared subscription group name.
+    Returns:
+        list[str]: Topic filters for this worker.
+    """
+    if not 0 <= worker_index < worker_count:
+        raise ValueError("worker_index must be in range(worker_count)")
+    filters = [
+        topic_filter
+        for partition in range(worker_index, partitions, worker_count)
+        for topic_filter in (f"{topic}/{partition}", f"{topic}/{partition}/chunked")
+    ]
+    if share_group:
+        filters = [f"$share/{share_group}/{topic_filter}" for topic_filter in filters]
+    return filters
@@ -0,0 +1,209 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from ..monitoring.metrics import REGISTRY, weak_callback
+
+# Set up logging for error handling
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = REGISTRY.gauge("publish_queue_depth", "Payloads waiting in the priority publish queue")
+QUEUE_DISCARDED = REGISTRY.counter("publish_queue_discarded_total", "Payloads not queued", ("reason",))
+
+
+class PriorityPublishQueue:
+    """Publishes payloads in order of ``metadata["priority"]``.
+
+    Payloads are queued and drained by a background thread that hands them to
+    ``MqttHandler.publish_async``, which only accepts a new message while its
+    in-flight window has room. On a congested link the queue therefore fills
+    up, and:
+
+    * the highest-priority payload is always sent next;
+    * once ``load_threshold`` payloads are pending, low-priority payloads
+      (below ``low_priority_threshold``) are decimated: only every
+      ``low_priority_keep_every``-th one is accepted;
+    * when ``max_pending`` is reached the lowest-priority pending payload is
+      dropped to make room for a more important one;
+    * a payload the handler fails to send (most often: no in-flight slot
+      within ``publish_timeout``) is counted in ``dropped`` as well.
+
+    With ``order_key`` (e.g. ``"camera_id"``) payloads sharing that metadata
+    value are never reordered: when a high-priority frame is due, the older
+    pending frames of the same camera are sent ahead of it.
+
+    With ``trace_key`` the time a payload spent queued is added as ``queue``
+    (milliseconds) to the dict at ``metadata[trace_key]``, when present.
+    """
+
+    def __init__(self, mqtt_handler, max_pending=20, load_threshold=5, low_priority_threshold=0.3,
+                 low_priority_keep_every=3, publish_timeout=10.0, order_key=None, prepare=None,
+                 trace_key=None, on_published=None, profiler=None):
+        """
+        Args:
+            mqtt_handler (MqttHandler): Handler used to publish payloads.
+            max_pending (int): Maximum number of queued payloads.
+            load_threshold (int): Queue depth at which low-priority payloads are decimated.
+            low_priority_threshold (float): Priorities below this value are "low".
+            low_priority_keep_every (int): Keep one in this many low-priority payloads under load.
+            publish_timeout (float): Seconds to wait for a free in-flight slot.
+            order_key (str | None): Metadata key whose payloads keep their
+                submission order.
+            prepare (callable | None): Applied to each payload right before it is
+                published, after decimation and drops (e.g. sensor delta encoding,
+                which must only see payloads that are actually sent).
+            trace_key (str | None): Metadata key of a per-sample stage trace
+                that receives the queueing time.
+            on_published (callable | None): Called as ``on_published(payload, ack)``
+                with the ``PublishAck`` of every payload that was sent.
+            profiler (SamplingProfiler | None): Samples the publish call
+                (serialisation and hand-off to paho) as stage ``publish``.
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.mqtt_handler = mqtt_handler
+        self.max_pending = max_pending
+        self.load_threshold = load_threshold
+        self.low_priority_threshold = low_priority_threshold
+        self.low_priority_keep_every = max(1, low_priority_keep_every)
+        self.publish_timeout = publish_timeout
+        self.order_key = order_key
+        self.prepare = prepare
+        self.trace_key = trace_key
+        self.on_published = on_published
+        self.profiler = profiler
+
+        self.dropped = 0
+        self.decimated = 0
+        self._depth_gauge = weak_callback(self, len)
+        QUEUE_DEPTH.set_function(self._depth_gauge)
+        self._heap = []
+        self._counter = itertools.count()
+        self._low_priority_seen = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Starts the background publishing thread."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="priority-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self, drain=True, timeout=None):
+        """
+        Stops the background thread.
+        Args:
+            drain (bool): Publish the payloads still queued before stopping.
+            timeout (float | None): Maximum seconds to wait for the thread.
+        """
+        with self._condition:
+            if not drain:
+                self._heap.clear()
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        QUEUE_DEPTH.remove(self._depth_gauge)
+
+    def __len__(self):
+        with self._condition:
+            return len(self._heap)
+
+    def submit(self, payload, priority=None):
+        """
+        Queues a payload for publishing.
+        Args:
+            payload (dict): Formatted payload.
+            priority (float | None): Overrides ``payload["metadata"]["priority"]``.
+        Returns:
+            bool: False if the payload was decimated or dropped.
+        """
+        if priority is None:
+            priority = (payload.get("metadata") or {}).get("priority")
+        priority = 0.5 if priority is None else float(priority)
+
+        with self._condition:
+            if len(self._heap) >= self.load_threshold and priority < self.low_priority_threshold:
+                self._low_priority_seen += 1
+                if self._low_priority_seen % self.low_priority_keep_every != 0:
+                    self.decimated += 1
+                    QUEUE_DISCARDED.inc(reason="decimated")
+                    return False
+
+            if len(self._heap) >= self.max_pending:
+                lowest = max(self._heap)  # largest key == lowest priority, newest
+                if -lowest[0] >= priority:
+                    self.dropped += 1
+                    QUEUE_DISCARDED.inc(reason="queue_full")
+                    return False
+                self._heap.remove(lowest)
+                heapq.heapify(self._heap)
+                self.dropped += 1
+                QUEUE_DISCARDED.inc(reason="queue_full")
+
+            heapq.heappush(self._heap, (-priority, next(self._counter), payload, time.perf_counter()))
+            self._condition.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._heap:
+                    self._condition.wait()
+                if not self._heap:
+                    return
+                entry = heapq.heappop(self._heap)
+                if self.order_key is not None:
+                    entry = self._oldest_in_order_group(entry)
+                _, _, payload, submitted = entry
+
+            if self.trace_key is not None:
+                trace = (payload.get("metadata") or {}).get(self.trace_key)
+                if isinstance(trace, dict):
+                    trace["queue"] = round((time.perf_counter() - submitted) * 1000, 1)
+            if self.prepare is not None:
+                payload = self.prepare(payload)
+            # Blocks while the handler's in-flight window is full, so payloads
+            # keep accumulating (and get prioritised) here instead of in paho.
+            if self.profiler is not None:
+                with self.profiler.sample("publish"):
+                    future = self.mqtt_handler.publish_async(payload, block=True, timeout=self.publish_timeout)
+            else:
+                future = self.mqtt_handler.publish_async(payload, block=True, timeout=self.publish_timeout)
+            # ``prepare`` has already run, so a payload that fails is not requeued.
+            future.add_done_callback(self._count_failure)
+            if self.on_published is not None:
+                future.add_done_callback(lambda done, sent=payload: self._notify_published(sent, done))
+
+    def _notify_published(self, payload, future):
+        if future.exception() is None:
+            self.on_published(payload, future.result())
+
+    def _oldest_in_order_group(self, entry):
+        """Swaps ``entry`` for an older pending payload with the same order key."""
+        key = (entry[2].get("metadata") or {}).get(self.order_key)
+        older = [
+            pending for pending in self._heap
+            if pending[1] < entry[1] and (pending[2].get("metadata") or {}).get(self.order_key) == key
+        ]
+        if not older:
+            return entry
+        oldest = min(older, key=lambda pending: pending[1])
+        self._heap.remove(oldest)
+        self._heap.append(entry)
+        heapq.heapify(self._heap)
+        return oldest
+
+    def _count_failure(self, future):
+        error = future.exception()
+        if error is not None:
+            with self._condition:
+                self.dropped += 1
+            QUEUE_DISCARDED.inc(reason="not_sent")
+            logger.error("Message not sent: %s", error)
@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+
+# Set up logging for error handling
+logger = logging.getLogger(__name__)
+
+
+class TelemetryPublisher:
+    """Publishes small sensor telemetry messages on their own topic and cadence.
+
+    Sensor readings are polled every ``interval`` seconds on a background thread
+    and published immediately as a compact message::
+
+        {"sensor_data": {...}, "metadata": {"sample_id": ..., ...}}
+
+    The latest reading and its ``sample_id`` are kept so the image pipeline can
+    attach the same id to its messages, letting consumers join image and
+    telemetry streams. Use an ``MqttHandler`` with its own connection so
+    telemetry never waits behind a multi-megabyte frame on the socket.
+    """
+
+    def __init__(self, mqtt_handler, read_sensor, build_metadata, interval=60.0):
+        """
+        Args:
+            mqtt_handler (MqttHandler): Handler publishing on the telemetry topic.
+            read_sensor (callable): Returns the current sensor reading (dict).
+            build_metadata (callable): ``build_metadata(sample_id, capture_ts)``
+                returning the metadata dict for a telemetry message.
+            interval (float): Seconds between sensor polls.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be greater than zero")
+        self.mqtt_handler = mqtt_handler
+        self.read_sensor = read_sensor
+        self.build_metadata = build_metadata
+        self.interval = interval
+
+        self._latest = (None, None)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._sequence = 0
+
+    def start(self):
+        """Takes a first reading synchronously, then polls in the background."""
+        self.poll()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stops the polling thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def latest(self):
+        """
+        Returns:
+            tuple[dict | None, str | None]: Most recent sensor reading and its sample id.
+        """
+        with self._lock:
+            return self._latest
+
+    def poll(self):
+        """
+        Reads the sensor once and publishes the reading.
+        Returns:
+            str | None: Sample id of the published reading, or None if reading failed.
+        """
+        try:
+            sensor_data = self.read_sensor()
+        except Exception as e:
+            logger.error("Failed to read sensor for telemetry: %s", e)
+            return None
+
+        capture_ts = time.time()
+        self._sequence += 1
+        sample_id = f"telemetry-{int(capture_ts * 1000)}-{self._sequence}"
+        metadata = dict(self.build_metadata(sample_id, capture_ts) or {})
+        metadata["sample_id"] = sample_id
+        with self._lock:
+            self._latest = (sensor_data, sample_id)
+        self.mqtt_handler.publish({"sensor_data": sensor_data, "metadata": metadata})
+        return sample_id
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.poll()
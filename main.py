@@ -1,15 +1,38 @@
-import time
+import contextlib
+import logging
 import os
+import time
 from dotenv import load_dotenv
 
-from edge_data_collector.camera.camera_handler import CameraHandler
+from edge_data_collector.camera.camera_manager import CameraManager
+from edge_data_collector.camera.frame_cache import FrameCache
 from edge_data_collector.sensors.sensor_handler import SensorHandler
+from edge_data_collector.sensors.sensor_delta import SensorDeltaEncoder
+from edge_data_collector.sensors.rolling_stats import RollingSensorStats
 from edge_data_collector.metadata.metadata_handler import MetadataHandler
-from edge_data_collector.formatter.data_formatter import format_data
+from edge_data_collector.metadata.sequencing import StreamSequencer
+from edge_data_collector.metadata.stage_trace import TRACE_KEY, LatencySummary, StageTrace
+from edge_data_collector.preprocessing.frame_preprocessor import FramePreprocessor
+from edge_data_collector.preprocessing.water_prefilter import WaterLikelihoodScorer
+from edge_data_collector.formatter.data_formatter import format_data, format_encoded_data, encode_image
+from edge_data_collector.formatter.parallel_encoder import ParallelEncoder
+from edge_data_sender.monitoring.log_config import configure_logging
+from edge_data_sender.monitoring.profiler import SamplingProfiler
+from edge_data_sender.monitoring.exporter import MetricsHttpServer, StatsPublisher, register_disk_usage
 from edge_data_sender.transmission.mqtt_handler import MqttHandler
+from edge_data_sender.transmission.full_resolution_server import FullResolutionServer
+from edge_data_sender.transmission.priority_queue import PriorityPublishQueue
+from edge_data_sender.transmission.telemetry_publisher import TelemetryPublisher
+from edge_data_sender.transmission.feedback_controller import FeedbackController
+from edge_data_sender.transmission.compression import PayloadCompressor, load_dictionary
+from edge_data_sender.transmission.control_channel import (
+    ControlChannel, RuntimeSettings, positive_number, jpeg_quality, resolution, topic_name, one_of,
+)
 
 import config
 
+logger = logging.getLogger(__name__)
+
 
 def reload_env():
     """Force reload the .env file and clear cached Netatmo variables."""
@@ -20,8 +43,10 @@ def reload_env():
         "NETATMO_PASSWORD",
         "NETATMO_SENSOR_ID_INDOOR",
         "NETATMO_SENSOR_ID_OUTDOOR",
+        "NETATMO_SENSOR_ID_RAIN",
         "NETATMO_ACCESS_TOKEN",
         "NETATMO_REFRESH_TOKEN",
+        "NETATMO_BASE_URL",
     ]
     for key in keys_to_clear:
         os.environ.pop(key, None)
@@ -29,8 +54,243 @@ def reload_env():
     load_dotenv(override=True)
 
 
+def setup_logging():
+    """Install the configured log handler (``LOG_LEVEL`` can be overridden from the environment)."""
+    configure_logging(
+        level=os.getenv("LOG_LEVEL") or config.LOG_LEVEL,
+        fmt=config.LOG_FORMAT,
+        rate=config.LOG_RATE_LIMIT,
+        burst=config.LOG_RATE_BURST,
+        async_queue=config.LOG_ASYNC,
+    )
+
+
+def make_profiler():
+    """Return the configured ``SamplingProfiler``, or None when it cannot be switched on."""
+    if not (config.PROFILER_ENABLED or config.PROFILER_SIGNAL):
+        return None
+    profiler = SamplingProfiler(
+        output_dir=config.PROFILER_OUTPUT_DIR,
+        every=config.PROFILER_EVERY,
+        top=config.PROFILER_TOP,
+        max_reports=config.PROFILER_MAX_REPORTS,
+        enabled=config.PROFILER_ENABLED,
+    )
+    if config.PROFILER_SIGNAL:
+        profiler.install_signal_handler()
+    return profiler
+
+
+def make_full_resolution_lookup(frame_cache):
+    """Return a lookup that encodes cached full-resolution frames on demand."""
+    def lookup(frame_id):
+        entry = frame_cache.get(frame_id)
+        if entry is None:
+            return None
+        image_path, metadata = entry
+        return {"image_data": encode_image(image_path), "metadata": metadata}
+    return lookup
+
+
+def _apply_feedback_quality(quality, adjustments):
+    if adjustments is None:
+        return quality
+    return adjustments["quality"] if quality is None else min(quality, adjustments["quality"])
+
+
+def make_compressor():
+    """Return the configured ``PayloadCompressor``, or None when disabled."""
+    if not config.PAYLOAD_COMPRESSION:
+        return None
+    dictionary = None
+    if config.COMPRESSION_DICTIONARY_PATH:
+        dictionary = load_dictionary(config.COMPRESSION_DICTIONARY_PATH)
+    return PayloadCompressor(codec=config.PAYLOAD_COMPRESSION, dictionary=dictionary)
+
+
+def make_trace_recorder(summary):
+    """Return a ``PriorityPublishQueue`` ``on_published`` hook feeding ``summary``."""
+    def record(payload, ack):
+        trace = (payload.get("metadata") or {}).get(TRACE_KEY)
+        if trace is not None:
+            summary.record(dict(trace, publish=round(ack.latency * 1000, 1)))
+    return record
+
+
+def start_monitoring(mqtt_handler, build_metadata=None, disk_path="edge_data_collector/camera/images"):
+    """
+    Starts the configured metrics exporters.
+    Returns:
+        list: Started exporters; call ``stop()`` on each when shutting down.
+    """
+    register_disk_usage(disk_path)
+    exporters = []
+    if config.METRICS_HTTP_ENABLED:
+        server = MetricsHttpServer(host=config.METRICS_HTTP_HOST, port=config.METRICS_HTTP_PORT).start()
+        logger.info("Serving metrics on port %s", server.port)
+        exporters.append(server)
+    if config.STATS_ENABLED and mqtt_handler is not None:
+        stats = StatsPublisher(
+            mqtt_handler, config.MQTT_STATS_TOPIC, interval=config.STATS_INTERVAL, build_metadata=build_metadata
+        )
+        stats.start()
+        exporters.append(stats)
+    return exporters
+
+
+def sensor_reading_id(sensor_data):
+    """
+    Identifies a Netatmo reading by its indoor module's ``time_utc``, so frames
+    of several cameras do not add one reading to the rolling stats repeatedly.
+    Returns None (always a new reading) when there is no timestamp.
+    """
+    indoor = ((sensor_data or {}).get("modules") or {}).get("indoor") or {}
+    return indoor.get("time_utc")
+
+
+def make_runtime_settings(mqtt_topic):
+    """Settings that can be changed through the control topic while running."""
+    return RuntimeSettings(
+        initial={"interval": None, "quality": None, "resolution": None, "motion": "slow", "topic": mqtt_topic},
+        validators={
+            "interval": positive_number,
+            "quality": jpeg_quality,
+            "resolution": resolution,
+            "motion": one_of("fast", "slow", "stop"),
+            "topic": topic_name,
+        },
+    )
+
+
+def build_payload(image_path, sensor_data, metadata, preprocessor=None, scorer=None, frame_cache=None,
+                  adjustments=None, runtime=None):
+    """
+    Score, cache and format one captured sample.
+
+    Args:
+        image_path (str): Path to the captured image.
+        sensor_data (dict): Sensor reading for the sample.
+        metadata (dict): Metadata including ``frame_id``.
+        preprocessor (FramePreprocessor | None): Preprocessing stage.
+        scorer (WaterLikelihoodScorer | None): Sets ``metadata["priority"]`` and
+            picks the JPEG quality of full-resolution images.
+        frame_cache (FrameCache | None): When given, the full-resolution frame is
+            cached and a thumbnail is published instead.
+        adjustments (dict | None): ``FeedbackController.adjustments()``; caps the
+            JPEG quality, scales the image and is recorded in
+            ``metadata["feedback"]``.
+        runtime (dict | None): ``RuntimeSettings.snapshot()``; a ``quality`` or
+            ``resolution`` set there overrides the configured values.
+
+    Returns:
+        dict: Formatted payload.
+    """
+    runtime = runtime or {}
+    image_quality = None
+    if scorer is not None:
+        metadata["priority"] = scorer.score_image(image_path)
+        if config.PRIORITY_QUALITY_RANGE:
+            image_quality = scorer.quality_for(metadata["priority"], config.PRIORITY_QUALITY_RANGE)
+    if runtime.get("quality") is not None:
+        image_quality = runtime["quality"]
+    scale = None
+    if adjustments is not None:
+        metadata["feedback"] = adjustments
+        image_quality = _apply_feedback_quality(image_quality, adjustments)
+        scale = adjustments["scale"]
+
+    if frame_cache is not None:
+        frame_cache.add(metadata["frame_id"], image_path, metadata)
+        return format_data(
+            image_path,
+            sensor_data,
+            metadata,
+            thumbnail_size=runtime.get("resolution") or config.THUMBNAIL_SIZE,
+            thumbnail_quality=_apply_feedback_quality(
+                runtime.get("quality") or config.THUMBNAIL_QUALITY, adjustments
+            ),
+            preprocessor=preprocessor,
+            scale=scale,
+        )
+    return format_data(
+        image_path, sensor_data, metadata, preprocessor=preprocessor, image_quality=image_quality, scale=scale,
+        max_size=runtime.get("resolution"),
+    )
+
+
+def submit_frame(encoder, publisher, frame, sensor_data, metadata, preprocessor=None, scorer=None,
+                 frame_cache=None, image_folder="edge_data_collector/camera/images", adjustments=None, runtime=None,
+                 trace=None):
+    """
+    Encode a frame array in the encoder processes and queue the payload once
+    the encoded image is ready. Mirrors ``build_payload`` for array captures.
+
+    Args:
+        encoder (ParallelEncoder): Multiprocess encoder.
+        publisher (PriorityPublishQueue): Queue the finished payload is submitted to.
+        frame (numpy.ndarray): Captured RGB frame.
+        sensor_data (dict): Sensor reading for the sample.
+        metadata (dict): Metadata including ``frame_id``.
+        preprocessor (FramePreprocessor | None): Preprocessing stage (applied by
+            the encoder processes; only recorded in metadata here).
+        scorer (WaterLikelihoodScorer | None): Sets ``metadata["priority"]``.
+        frame_cache (FrameCache | None): When given, the encoder also writes the
+            full-resolution JPEG for the cache and a thumbnail is published.
+        image_folder (str): Folder for cached full-resolution frames.
+        adjustments (dict | None): ``FeedbackController.adjustments()``.
+        runtime (dict | None): ``RuntimeSettings.snapshot()``.
+        trace (StageTrace | None): Receives the ``encode`` stage and is attached
+            as ``metadata["trace"]``.
+    """
+    runtime = runtime or {}
+    options = {}
+    if scorer is not None:
+        metadata["priority"] = scorer.score(frame)
+        if config.PRIORITY_QUALITY_RANGE:
+            options["quality"] = scorer.quality_for(metadata["priority"], config.PRIORITY_QUALITY_RANGE)
+    if runtime.get("quality") is not None:
+        options["quality"] = runtime["quality"]
+    if runtime.get("resolution"):
+        options["thumbnail_size"] = runtime["resolution"]
+    if preprocessor is not None and preprocessor.is_active:
+        metadata["preprocessing"] = preprocessor.describe()
+
+    if frame_cache is not None:
+        save_path = os.path.join(image_folder, f"raw_image_{metadata['frame_id']}.jpg")
+        frame_cache.add(metadata["frame_id"], save_path, metadata)
+        metadata["image_variant"] = "thumbnail"
+        options = {
+            "quality": runtime.get("quality") or config.THUMBNAIL_QUALITY,
+            "thumbnail_size": runtime.get("resolution") or config.THUMBNAIL_SIZE,
+            "save_path": save_path,
+        }
+
+    if adjustments is not None:
+        metadata["feedback"] = adjustments
+        options["quality"] = _apply_feedback_quality(options.get("quality"), adjustments)
+        if adjustments["scale"] < 1:
+            bounds = options.get("thumbnail_size") or (frame.shape[1], frame.shape[0])
+            options["thumbnail_size"] = tuple(max(1, int(round(side * adjustments["scale"]))) for side in bounds)
+
+    submitted = time.perf_counter()
+
+    def on_encoded(future):
+        try:
+            encoded_image = future.result()
+        except Exception as e:
+            logger.error("Encoding failed for frame %s: %s", metadata["frame_id"], e)
+            return
+        if trace is not None:
+            trace.add("encode", time.perf_counter() - submitted)
+            metadata[TRACE_KEY] = trace.as_metadata()
+        publisher.submit(format_encoded_data(encoded_image, sensor_data, metadata))
+
+    encoder.submit(frame, **options).add_done_callback(on_encoded)
+
+
 if __name__ == "__main__":
     reload_env()
+    setup_logging()
 
     # Load configuration from config.py
     use_mqtt = config.USE_MQTT
@@ -42,11 +302,17 @@ if __name__ == "__main__":
     client_id = os.getenv("NETATMO_CLIENT_ID")
     client_secret = os.getenv("NETATMO_CLIENT_SECRET")
     sensor_id = os.getenv("NETATMO_SENSOR_ID_INDOOR")
+    outdoor_sensor_id = os.getenv("NETATMO_SENSOR_ID_OUTDOOR")
+    rain_sensor_id = os.getenv("NETATMO_SENSOR_ID_RAIN")
     access_token = os.getenv("NETATMO_ACCESS_TOKEN")
     refresh_token = os.getenv("NETATMO_REFRESH_TOKEN")
 
     # Initialize modules with configuration values
-    camera_handler = CameraHandler(camera_id="camera_01")
+    use_encoder_processes = use_mqtt and config.ENCODER_PROCESSES > 0
+    camera_manager = CameraManager.from_config(config.CAMERAS, capture_arrays=use_encoder_processes)
+    profiler = make_profiler()
+    camera_manager.profiler = profiler
+    sample = profiler.sample if profiler is not None else lambda stage: contextlib.nullcontext()
     sensor_handler = SensorHandler(
         sensor_id=sensor_id,
         client_id=client_id,
@@ -55,36 +321,231 @@ if __name__ == "__main__":
         access_token=access_token,
         refresh_token=refresh_token,
         simulate_sensor=config.SIMULATE_SENSOR_DATA,
+        outdoor_sensor_id=outdoor_sensor_id,
+        rain_sensor_id=rain_sensor_id,
+        base_url=os.getenv("NETATMO_BASE_URL") or config.NETATMO_BASE_URL,
     )
     metadata_handler = MetadataHandler()
+    preprocessor = FramePreprocessor(
+        roi=config.PREPROCESS_ROI,
+        target_size=config.PREPROCESS_TARGET_SIZE,
+        camera_matrix=config.CAMERA_MATRIX,
+        dist_coeffs=config.DIST_COEFFS,
+        remap_cache_path=config.PREPROCESS_REMAP_CACHE,
+    )
+    scorer = WaterLikelihoodScorer() if config.WATER_PREFILTER_ENABLED else None
+    sensor_stats = None
+    if config.SENSOR_STATS_ENABLED:
+        sensor_stats = RollingSensorStats(config.SENSOR_STATS_WINDOWS, capacity=config.SENSOR_STATS_CAPACITY)
+
+    latency_summary = LatencySummary() if config.STAGE_TRACE_ENABLED else None
+    sequencer = StreamSequencer() if config.SEQUENCE_NUMBERS_ENABLED else None
+
+    def stamp_sequence(metadata):
+        return sequencer.stamp(metadata) if sequencer is not None else metadata
 
     if use_mqtt:
-        mqtt_handler = MqttHandler(mqtt_broker, mqtt_port, mqtt_topic)
+        compressor = make_compressor()
+        mqtt_handler = MqttHandler(
+            mqtt_broker,
+            mqtt_port,
+            mqtt_topic,
+            qos=config.MQTT_QOS,
+            max_inflight=config.MQTT_MAX_INFLIGHT,
+            chunk_size=config.CHUNK_SIZE if config.CHUNKED_TRANSFER else None,
+            chunk_threshold=config.CHUNK_THRESHOLD,
+            protocol=config.MQTT_PROTOCOL,
+            message_expiry=config.MQTT_MESSAGE_EXPIRY,
+            user_property_keys=config.MQTT_USER_PROPERTIES,
+            partitions=config.MQTT_PARTITIONS,
+            partition_key=config.MQTT_PARTITION_KEY,
+            compressor=compressor,
+        )
+        frame_cache = None
+        full_res_server = None
+        if config.PUBLISH_THUMBNAILS:
+            frame_cache = FrameCache(max_frames=config.FULL_RES_CACHE_SIZE)
+            full_res_server = FullResolutionServer(
+                mqtt_handler,
+                make_full_resolution_lookup(frame_cache),
+                request_topic=config.MQTT_FULL_RES_REQUEST_TOPIC,
+                response_topic=config.MQTT_FULL_RES_RESPONSE_TOPIC,
+            )
+            full_res_server.start()
+        sensor_encoder = None
+        if config.SENSOR_DELTA_ENCODING:
+            sensor_encoder = SensorDeltaEncoder(
+                epsilon=config.SENSOR_DELTA_EPSILON, keyframe_every=config.SENSOR_KEYFRAME_EVERY
+            )
+        publisher = PriorityPublishQueue(
+            mqtt_handler,
+            max_pending=config.PRIORITY_QUEUE_MAX_PENDING,
+            load_threshold=config.PRIORITY_QUEUE_LOAD_THRESHOLD,
+            low_priority_threshold=config.PRIORITY_LOW_THRESHOLD,
+            low_priority_keep_every=config.PRIORITY_LOW_KEEP_EVERY,
+            order_key=config.MQTT_PARTITION_KEY if config.MQTT_PARTITIONS else None,
+            prepare=sensor_encoder.encode if sensor_encoder is not None else None,
+            trace_key=TRACE_KEY if config.STAGE_TRACE_ENABLED else None,
+            on_published=make_trace_recorder(latency_summary) if config.STAGE_TRACE_ENABLED else None,
+            profiler=profiler,
+        )
+        encoder = None
+        if use_encoder_processes:
+            encoder = ParallelEncoder(
+                workers=config.ENCODER_PROCESSES,
+                frame_shape=config.ENCODER_FRAME_SHAPE,
+                preprocessor=preprocessor if preprocessor.is_active else None,
+            )
+        telemetry = None
+        if config.SEPARATE_TELEMETRY:
+            telemetry_handler = MqttHandler(
+                mqtt_broker,
+                mqtt_port,
+                config.MQTT_TELEMETRY_TOPIC,
+                qos=config.MQTT_QOS,
+                client_id="flood-detection-collector-telemetry",
+                protocol=config.MQTT_PROTOCOL,
+                message_expiry=config.MQTT_MESSAGE_EXPIRY,
+                user_property_keys=config.MQTT_USER_PROPERTIES,
+                compressor=compressor,
+            )
+            telemetry = TelemetryPublisher(
+                telemetry_handler,
+                read_sensor=sensor_handler.read_sensor_data,
+                build_metadata=lambda sample_id, ts: stamp_sequence(metadata_handler.add_metadata(
+                    {"collector_capture_ts": ts}, camera_id=None
+                )),
+                interval=config.TELEMETRY_INTERVAL,
+            )
+            telemetry_handler.connect()
+            telemetry.start()
+        feedback = None
+        if config.FEEDBACK_ENABLED:
+            feedback = FeedbackController(
+                interval_bounds=config.FEEDBACK_INTERVAL_BOUNDS,
+                quality_bounds=config.FEEDBACK_QUALITY_BOUNDS,
+                scale_bounds=config.FEEDBACK_SCALE_BOUNDS,
+                queue_depth_bounds=config.FEEDBACK_QUEUE_DEPTH_BOUNDS,
+                stale_after=config.FEEDBACK_STALE_AFTER,
+            )
+            mqtt_handler.subscribe(config.MQTT_FEEDBACK_TOPIC, feedback.handle_feedback)
+        runtime_settings = make_runtime_settings(mqtt_topic)
+        if config.CONTROL_ENABLED:
+            def apply_runtime_changes(changes, snapshot):
+                if "interval" in changes:
+                    camera_manager.set_interval(changes["interval"])
+                if "topic" in changes:
+                    mqtt_handler.topic = changes["topic"]
+
+            runtime_settings.add_listener(apply_runtime_changes)
+            ControlChannel(
+                mqtt_handler, runtime_settings, config.MQTT_CONTROL_TOPIC, config.MQTT_CONTROL_ACK_TOPIC
+            ).start()
+        exporters = start_monitoring(
+            mqtt_handler,
+            build_metadata=lambda: {"session_id": sequencer.session_id} if sequencer is not None else {},
+        )
         mqtt_handler.connect()
+        publisher.start()
+        camera_manager.start()
+        next_summary = time.monotonic() + config.STAGE_TRACE_SUMMARY_INTERVAL
         try:
             while True:
-                image_path, capture_ts = camera_handler.capture_image()
-                if not image_path:
-                    print("Skipping publish; no image captured.")
+                capture = camera_manager.next_capture(timeout=1.0)
+                if capture is None:
                     continue
-                sensor_data = sensor_handler.read_sensor_data()
-                metadata = metadata_handler.add_metadata({}, camera_id="camera_01")
+                camera_id, image, capture_ts = capture
+                trace = StageTrace()
+                for stage, seconds in (camera_manager.last_timing or {}).items():
+                    trace.add(stage, seconds)
+                runtime = runtime_settings.snapshot()
+                with trace.stage("sensor"):
+                    if telemetry is not None:
+                        sensor_data, sample_id = telemetry.latest()
+                    else:
+                        sensor_data = sensor_handler.read_sensor_data()
+                if telemetry is not None:
+                    metadata = metadata_handler.add_metadata(
+                        {"sample_id": sample_id}, camera_id=camera_id, motion=runtime["motion"]
+                    )
+                else:
+                    metadata = metadata_handler.add_metadata({}, camera_id=camera_id, motion=runtime["motion"])
                 metadata["collector_capture_ts"] = capture_ts
-                formatted_data = format_data(image_path, sensor_data, metadata)
-                mqtt_handler.publish(formatted_data)
-                print('Data Published')
+                metadata["frame_id"] = MetadataHandler.make_frame_id(camera_id, capture_ts)
+                stamp_sequence(metadata)
+                if sensor_stats is not None:
+                    metadata["sensor_stats"] = sensor_stats.update(
+                        sensor_data, capture_ts,
+                        reading_id=sample_id if telemetry is not None else sensor_reading_id(sensor_data),
+                    )
+                adjustments = feedback.adjustments() if feedback is not None else None
+                if feedback is not None:
+                    camera_manager.throttle(adjustments["interval"] if adjustments else None)
+                if latency_summary is not None and time.monotonic() >= next_summary:
+                    logger.info("Stage latency summary:\n%s", latency_summary.format())
+                    next_summary = time.monotonic() + config.STAGE_TRACE_SUMMARY_INTERVAL
+                if encoder is not None:
+                    # Encoding runs in the worker processes; only the hand-off is profiled.
+                    with sample("submit"):
+                        submit_frame(
+                            encoder, publisher, image, sensor_data, metadata, preprocessor, scorer, frame_cache,
+                            adjustments=adjustments, runtime=runtime,
+                            trace=trace if config.STAGE_TRACE_ENABLED else None,
+                        )
+                    continue
+                with trace.stage("format"), sample("encode"):
+                    formatted_data = build_payload(
+                        image, sensor_data, metadata, preprocessor, scorer, frame_cache, adjustments, runtime
+                    )
+                if config.STAGE_TRACE_ENABLED:
+                    formatted_data["metadata"][TRACE_KEY] = trace.as_metadata()
+                if publisher.submit(formatted_data):
+                    logger.debug("Data queued for publishing")
+                else:
+                    logger.debug("Publish skipped; link congested and frame has low priority")
                 # print("Published Data:", formatted_data)
-                time.sleep(5)
         except KeyboardInterrupt:
-            print("Stopping data sender...")
+            logger.info("Stopping data sender...")
+        finally:
+            for exporter in exporters:
+                exporter.stop()
+            camera_manager.stop()
+            if telemetry is not None:
+                telemetry.stop()
+            if encoder is not None:
+                encoder.close()
+            if profiler is not None:
+                profiler.close()
+            publisher.stop(drain=False)
+            if full_res_server is not None:
+                full_res_server.stop()
+            if latency_summary is not None and latency_summary.count:
+                logger.info("Stage latency summary:\n%s", latency_summary.format())
+            logger.info(
+                "Known drops: mqtt %s, publish queue dropped %d decimated %d, camera %s",
+                mqtt_handler.drop_counts(), publisher.dropped, publisher.decimated, camera_manager.stats,
+            )
+            mqtt_handler.close()
     else:
-        image_path, capture_ts = camera_handler.capture_image()
+        camera_handler = camera_manager.cameras[0]
+        trace = StageTrace()
+        with trace.stage("capture"):
+            image_path, capture_ts = camera_handler.capture_image()
+        camera_manager.stop()
         if not image_path:
             raise RuntimeError("Failed to capture image")
-        sensor_data = sensor_handler.read_sensor_data()
-        metadata = metadata_handler.add_metadata({}, camera_id="camera_01")
+        with trace.stage("sensor"):
+            sensor_data = sensor_handler.read_sensor_data()
+        metadata = metadata_handler.add_metadata({}, camera_id=camera_handler.camera_id)
         metadata["collector_capture_ts"] = capture_ts
+        metadata["frame_id"] = MetadataHandler.make_frame_id(camera_handler.camera_id, capture_ts)
+        stamp_sequence(metadata)
+        if sensor_stats is not None:
+            metadata["sensor_stats"] = sensor_stats.update(sensor_data, capture_ts)
         print("Sensor Data:", sensor_data)
-        formatted_data = format_data(image_path, sensor_data, metadata)
+        with trace.stage("format"):
+            formatted_data = build_payload(image_path, sensor_data, metadata, preprocessor, scorer)
+        if config.STAGE_TRACE_ENABLED:
+            formatted_data["metadata"][TRACE_KEY] = trace.as_metadata()
         print("Formatted Data:")
         print(formatted_data)
@@ -1,16 +1,33 @@
 import time
+import contextlib
+import logging
 import os
 import math
 import cv2
 from dotenv import load_dotenv
 
 from edge_data_collector.sensors.sensor_handler import SensorHandler
+from edge_data_collector.sensors.sensor_delta import SensorDeltaEncoder
+from edge_data_collector.sensors.rolling_stats import RollingSensorStats
+from edge_data_collector.sensors.trace_replay import TraceSensorSource
 from edge_data_collector.metadata.metadata_handler import MetadataHandler
+from edge_data_collector.metadata.sequencing import StreamSequencer
+from edge_data_collector.metadata.stage_trace import TRACE_KEY, LatencySummary, StageTrace
+from edge_data_collector.preprocessing.frame_preprocessor import FramePreprocessor
+from edge_data_collector.preprocessing.water_prefilter import WaterLikelihoodScorer
 from edge_data_collector.formatter.data_formatter import format_data
+from edge_data_sender.monitoring.log_config import configure_logging
+from edge_data_sender.monitoring.profiler import SamplingProfiler
+from edge_data_sender.monitoring.exporter import MetricsHttpServer, StatsPublisher
 from edge_data_sender.transmission.mqtt_handler import MqttHandler
+from edge_data_sender.transmission.control_channel import (
+    ControlChannel, RuntimeSettings, finite_number, positive_number, jpeg_quality, resolution, topic_name, one_of,
+)
 
 import config
 
+logger = logging.getLogger(__name__)
+
 
 # ============================================================================
 # CONFIGURATION - Comment/uncomment sections to change settings
@@ -50,6 +67,23 @@ STATIC_PRESSURE    = 995.0 # ΔP =
 # STATIC_HUMIDITY    = 78.0   # ΔRH = 0.0 %
 # STATIC_PRESSURE    = 1016.0 # ΔP = 0.0 hPa
 
+# Recorded sensor trace (CSV or NDJSON, see TraceSensorSource). When set, the
+# readings replay in step with the video timestamp instead of the static values
+# above; SENSOR_TRACE_OFFSET shifts the trace (seconds) relative to the video.
+SENSOR_TRACE_PATH = None
+# SENSOR_TRACE_PATH = "video_gather/traces/flood_video_20251005_150257.csv"
+SENSOR_TRACE_INTERPOLATE = True
+SENSOR_TRACE_OFFSET = 0.0
+
+# Named sensor regimes that can be selected at runtime through the control
+# topic ({"set": {"sensor_regime": "flooding"}}); values mirror the presets above.
+SENSOR_REGIMES = {
+    "real_world": {"temperature": 12.0, "humidity": 88.0, "pressure": 995.0},
+    "flooding": {"temperature": 13.5, "humidity": 96.0, "pressure": 1008.0},
+    "hot_dry": {"temperature": 27.0, "humidity": 45.0, "pressure": 1018.0},
+    "neutral": {"temperature": 17.0, "humidity": 78.0, "pressure": 1016.0},
+}
+
 # Frame processing interval (seconds). The capture aligns to the equivalent
 # timestamp in the video (e.g., 1.0 sends frames from 1s, 2s, 3s...).
 # Must be greater than zero.
@@ -86,8 +120,10 @@ class VideoHandler:
             self.total_frames / self.fps if self.fps not in (0, None) else 0.0
         )
         
-        print(f"Video loaded: {video_path}")
-        print(f"FPS: {self.fps}, Total frames: {self.total_frames}, Duration: {self.duration_seconds:.3f}s")
+        logger.info(
+            "Video loaded: %s (FPS: %s, total frames: %d, duration: %.3fs)",
+            video_path, self.fps, self.total_frames, self.duration_seconds,
+        )
 
     def capture_frame(self, compress=False):
         """
@@ -103,7 +139,7 @@ class VideoHandler:
         ret, frame = self.video_capture.read()
         
         if not ret:
-            print("End of video reached or error reading frame.")
+            logger.info("End of video reached or error reading frame.")
             return None, None
         
         self.current_frame += 1
@@ -115,7 +151,7 @@ class VideoHandler:
         
         # Save the frame as an image
         cv2.imwrite(frame_path, frame)
-        print(f"Frame {self.current_frame}/{self.total_frames} saved to {frame_path}")
+        logger.debug("Frame %d/%d saved to %s", self.current_frame, self.total_frames, frame_path)
         
         return frame_path, capture_time
 
@@ -140,14 +176,14 @@ class VideoHandler:
         )
 
         if frame_index < 0 or frame_index >= self.total_frames:
-            print(f"Requested frame at {time_seconds:.3f}s is outside video duration.")
+            logger.warning("Requested frame at %.3fs is outside video duration.", time_seconds)
             return None, None
 
         self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
         ret, frame = self.video_capture.read()
 
         if not ret or frame is None:
-            print(f"Failed to read frame at {time_seconds:.3f}s (index {frame_index}).")
+            logger.error("Failed to read frame at %.3fs (index %d).", time_seconds, frame_index)
             return None, None
 
         capture_time = time.time()
@@ -157,9 +193,9 @@ class VideoHandler:
         )
         cv2.imwrite(frame_path, frame)
         self.current_frame = frame_index + 1
-        print(
-            f"Aligned frame {sequence_number} (video t={time_seconds:.3f}s, index {frame_index + 1}/{self.total_frames}) "
-            f"saved to {frame_path}"
+        logger.debug(
+            "Aligned frame %d (video t=%.3fs, index %d/%d) saved to %s",
+            sequence_number, time_seconds, frame_index + 1, self.total_frames, frame_path,
         )
 
         return frame_path, capture_time
@@ -168,13 +204,13 @@ class VideoHandler:
         """Reset video to the beginning."""
         self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
         self.current_frame = 0
-        print("Video reset to beginning.")
+        logger.debug("Video reset to beginning.")
     
     def close(self):
         """Release the video capture object."""
         if self.video_capture:
             self.video_capture.release()
-        print("Video handler closed.")
+        logger.info("Video handler closed.")
     
     def has_frames(self):
         """Check if there are more frames to process."""
@@ -198,17 +234,71 @@ class StaticSensorHandler:
             "humidity": humidity,
             "pressure": pressure
         }
-        print(f"Static sensor data initialized: {self.sensor_data}")
+        logger.info("Static sensor data initialized: %s", self.sensor_data)
     
-    def read_sensor_data(self):
+    def read_sensor_data(self, video_time=None):
         """
         Return the static sensor data.
-        
+
+        Args:
+            video_time (float | None): Unused; accepted so the static values and
+                a TraceSensorSource can be used interchangeably.
+
         Returns:
             dict: Dictionary containing temperature, humidity, and pressure
         """
         return self.sensor_data.copy()
 
+    def set_values(self, temperature, humidity, pressure):
+        """
+        Replace the static sensor values (e.g. when switching regime at runtime).
+
+        Args:
+            temperature (float): Temperature in Celsius
+            humidity (float): Humidity percentage
+            pressure (float): Pressure in hPa
+        """
+        self.sensor_data = {
+            "temperature": temperature,
+            "humidity": humidity,
+            "pressure": pressure
+        }
+        logger.info("Static sensor data changed: %s", self.sensor_data)
+
+
+def sensor_regime(value):
+    """Validator for a regime name from SENSOR_REGIMES or explicit sensor values."""
+    if isinstance(value, str):
+        if value not in SENSOR_REGIMES:
+            raise ValueError(f"must be one of {', '.join(SENSOR_REGIMES)} or explicit values")
+        return dict(SENSOR_REGIMES[value])
+    if not isinstance(value, dict) or set(value) != {"temperature", "humidity", "pressure"}:
+        raise ValueError("must give temperature, humidity and pressure")
+    return {key: finite_number(reading) for key, reading in value.items()}
+
+
+def make_runtime_settings(mqtt_topic, sensor_handler):
+    """Settings that can be changed through the control topic during replay."""
+    initial = {
+        "interval": FRAME_INTERVAL,
+        "quality": None,
+        "resolution": None,
+        "motion": MOTION,
+        "topic": mqtt_topic,
+    }
+    validators = {
+        "interval": positive_number,
+        "quality": jpeg_quality,
+        "resolution": resolution,
+        "motion": one_of("fast", "slow", "stop"),
+        "topic": topic_name,
+    }
+    if isinstance(sensor_handler, StaticSensorHandler):
+        # A recorded trace drives the readings itself; regimes only apply to static values.
+        initial["sensor_regime"] = sensor_handler.read_sensor_data()
+        validators["sensor_regime"] = sensor_regime
+    return RuntimeSettings(initial=initial, validators=validators)
+
 
 def reload_env():
     """Force reload the .env file and clear cached Netatmo variables."""
@@ -219,8 +309,10 @@ def reload_env():
         "NETATMO_PASSWORD",
         "NETATMO_SENSOR_ID_INDOOR",
         "NETATMO_SENSOR_ID_OUTDOOR",
+        "NETATMO_SENSOR_ID_RAIN",
         "NETATMO_ACCESS_TOKEN",
         "NETATMO_REFRESH_TOKEN",
+        "NETATMO_BASE_URL",
     ]
     for key in keys_to_clear:
         os.environ.pop(key, None)
@@ -230,6 +322,13 @@ def reload_env():
 
 if __name__ == "__main__":
     reload_env()
+    configure_logging(
+        level=os.getenv("LOG_LEVEL") or config.LOG_LEVEL,
+        fmt=config.LOG_FORMAT,
+        rate=config.LOG_RATE_LIMIT,
+        burst=config.LOG_RATE_BURST,
+        async_queue=config.LOG_ASYNC,
+    )
 
     # Load MQTT configuration from config.py
     use_mqtt = config.USE_MQTT
@@ -244,36 +343,100 @@ if __name__ == "__main__":
             camera_id=CAMERA_ID
         )
     except ValueError as e:
-        print(f"Error: {e}")
-        print(f"Please update VIDEO_PATH in main_video.py to point to a valid video file.")
+        logger.error("%s. Please update VIDEO_PATH in main_video.py to point to a valid video file.", e)
         exit(1)
     
-    sensor_handler = StaticSensorHandler(
-        temperature=STATIC_TEMPERATURE,
-        humidity=STATIC_HUMIDITY,
-        pressure=STATIC_PRESSURE
-    )
+    if SENSOR_TRACE_PATH:
+        sensor_handler = TraceSensorSource(
+            SENSOR_TRACE_PATH,
+            interpolate=SENSOR_TRACE_INTERPOLATE,
+            offset=SENSOR_TRACE_OFFSET,
+        )
+    else:
+        sensor_handler = StaticSensorHandler(
+            temperature=STATIC_TEMPERATURE,
+            humidity=STATIC_HUMIDITY,
+            pressure=STATIC_PRESSURE
+        )
     
     metadata_handler = MetadataHandler()
+    preprocessor = FramePreprocessor(
+        roi=config.PREPROCESS_ROI,
+        target_size=config.PREPROCESS_TARGET_SIZE,
+        camera_matrix=config.CAMERA_MATRIX,
+        dist_coeffs=config.DIST_COEFFS,
+        remap_cache_path=config.PREPROCESS_REMAP_CACHE,
+    )
+    scorer = WaterLikelihoodScorer() if config.WATER_PREFILTER_ENABLED else None
+    sensor_stats = None
+    if config.SENSOR_STATS_ENABLED:
+        sensor_stats = RollingSensorStats(config.SENSOR_STATS_WINDOWS, capacity=config.SENSOR_STATS_CAPACITY)
 
     if use_mqtt:
         if FRAME_INTERVAL <= 0:
             raise ValueError("FRAME_INTERVAL must be greater than zero for aligned capture.")
 
         if video_handler.duration_seconds <= 0:
-            print("Video duration is zero; nothing to process.")
+            logger.warning("Video duration is zero; nothing to process.")
         else:
             mqtt_handler = MqttHandler(mqtt_broker, mqtt_port, mqtt_topic)
+            sensor_encoder = None
+            if config.SENSOR_DELTA_ENCODING:
+                sensor_encoder = SensorDeltaEncoder(
+                    epsilon=config.SENSOR_DELTA_EPSILON, keyframe_every=config.SENSOR_KEYFRAME_EVERY
+                )
+            runtime_settings = make_runtime_settings(mqtt_topic, sensor_handler)
+            if config.CONTROL_ENABLED:
+                def apply_runtime_changes(changes, snapshot):
+                    if "topic" in changes:
+                        mqtt_handler.topic = changes["topic"]
+                    if "sensor_regime" in changes:
+                        sensor_handler.set_values(**changes["sensor_regime"])
+
+                runtime_settings.add_listener(apply_runtime_changes)
+                ControlChannel(
+                    mqtt_handler, runtime_settings, config.MQTT_CONTROL_TOPIC, config.MQTT_CONTROL_ACK_TOPIC
+                ).start()
             mqtt_handler.connect()
+            latency_summary = LatencySummary() if config.STAGE_TRACE_ENABLED else None
+            sequencer = StreamSequencer() if config.SEQUENCE_NUMBERS_ENABLED else None
+            profiler = None
+            if config.PROFILER_ENABLED or config.PROFILER_SIGNAL:
+                profiler = SamplingProfiler(
+                    output_dir=config.PROFILER_OUTPUT_DIR,
+                    every=config.PROFILER_EVERY,
+                    top=config.PROFILER_TOP,
+                    max_reports=config.PROFILER_MAX_REPORTS,
+                    enabled=config.PROFILER_ENABLED,
+                )
+                if config.PROFILER_SIGNAL:
+                    profiler.install_signal_handler()
+            sample = profiler.sample if profiler is not None else lambda stage: contextlib.nullcontext()
+            metrics_server = None
+            if config.METRICS_HTTP_ENABLED:
+                metrics_server = MetricsHttpServer(host=config.METRICS_HTTP_HOST, port=config.METRICS_HTTP_PORT).start()
+            stats = None
+            if config.STATS_ENABLED:
+                stats = StatsPublisher(
+                    mqtt_handler,
+                    config.MQTT_STATS_TOPIC,
+                    interval=config.STATS_INTERVAL,
+                    build_metadata=lambda: {"session_id": sequencer.session_id} if sequencer is not None else {},
+                )
+                stats.start()
+            next_summary = time.monotonic() + config.STAGE_TRACE_SUMMARY_INTERVAL
             start_time = time.time()
             sample_index = 1
+            # Advanced by the current interval after each sample, so an interval
+            # changed at runtime applies from the next frame on.
+            target_video_time = FRAME_INTERVAL
 
             try:
                 while True:
-                    target_video_time = sample_index * FRAME_INTERVAL
+                    runtime = runtime_settings.snapshot()
 
                     if target_video_time > video_handler.duration_seconds:
-                        print("Reached end of video based on configured interval.")
+                        logger.info("Reached end of video based on configured interval.")
                         break
 
                     # Wait until the scheduled wall-clock time before sending
@@ -282,37 +445,74 @@ if __name__ == "__main__":
                     if sleep_duration > 0:
                         time.sleep(sleep_duration)
 
-                    frame_path, capture_ts = video_handler.capture_frame_at(
-                        time_seconds=target_video_time,
-                        sequence_number=sample_index
-                    )
+                    trace = StageTrace()
+                    with trace.stage("capture"), sample("capture"):
+                        frame_path, capture_ts = video_handler.capture_frame_at(
+                            time_seconds=target_video_time,
+                            sequence_number=sample_index
+                        )
 
                     if not frame_path:
-                        print("Failed to capture aligned frame; stopping.")
+                        logger.error("Failed to capture aligned frame; stopping.")
                         break
 
-                    sensor_data = sensor_handler.read_sensor_data()
-                    metadata = metadata_handler.add_metadata({}, camera_id=CAMERA_ID, motion=MOTION)
+                    with trace.stage("sensor"):
+                        sensor_data = sensor_handler.read_sensor_data(target_video_time)
+                    metadata = metadata_handler.add_metadata({}, camera_id=CAMERA_ID, motion=runtime["motion"])
                     metadata["collector_capture_ts"] = capture_ts
                     metadata["video_timestamp_sec"] = round(target_video_time, 3)
                     metadata["video_file"] = os.path.basename(VIDEO_PATH)
-                    formatted_data = format_data(frame_path, sensor_data, metadata)
-                    mqtt_handler.publish(formatted_data)
-                    print(f"Data Published (interval index {sample_index}, video t={target_video_time:.3f}s)")
+                    if sequencer is not None:
+                        sequencer.stamp(metadata)
+                    if sensor_stats is not None:
+                        metadata["sensor_stats"] = sensor_stats.update(sensor_data, capture_ts)
+                    if scorer is not None:
+                        metadata["priority"] = scorer.score_image(frame_path)
+                    with trace.stage("format"), sample("encode"):
+                        formatted_data = format_data(
+                            frame_path,
+                            sensor_data,
+                            metadata,
+                            preprocessor=preprocessor,
+                            image_quality=runtime["quality"],
+                            max_size=runtime["resolution"],
+                        )
+                    if sensor_encoder is not None:
+                        sensor_encoder.encode(formatted_data)
+                    if latency_summary is not None:
+                        formatted_data["metadata"][TRACE_KEY] = trace.as_metadata()
+                    with trace.stage("publish"), sample("publish"):
+                        mqtt_handler.publish(formatted_data)
+                    if latency_summary is not None:
+                        latency_summary.record(trace.as_metadata())
+                        if time.monotonic() >= next_summary:
+                            logger.info("Stage latency summary:\n%s", latency_summary.format())
+                            next_summary = time.monotonic() + config.STAGE_TRACE_SUMMARY_INTERVAL
+                    logger.debug("Data published (interval index %d, video t=%.3fs)", sample_index, target_video_time)
 
                     sample_index += 1
+                    target_video_time += runtime_settings.get("interval")
 
             except KeyboardInterrupt:
-                print("\nStopping video processing...")
+                logger.info("Stopping video processing...")
             finally:
+                if profiler is not None:
+                    profiler.close()
+                if stats is not None:
+                    stats.stop()
+                if metrics_server is not None:
+                    metrics_server.stop()
                 video_handler.close()
-                print("Video processing completed.")
+                if latency_summary is not None and latency_summary.count:
+                    logger.info("Stage latency summary:\n%s", latency_summary.format())
+                logger.info("Known drops: mqtt %s", mqtt_handler.drop_counts())
+                mqtt_handler.close()
+                logger.info("Video processing completed.")
     else:
         # Process a single frame without MQTT
         frame_path, capture_ts = video_handler.capture_frame()
         
         if frame_path:
-            sensor_data = sensor_handler.read_sensor_data()
             metadata = metadata_handler.add_metadata({}, camera_id=CAMERA_ID, motion=MOTION)
             metadata["collector_capture_ts"] = capture_ts
             if video_handler.fps not in (0, None):
@@ -320,9 +520,12 @@ if __name__ == "__main__":
                 metadata["video_timestamp_sec"] = round(frame_index / video_handler.fps, 3)
             else:
                 metadata["video_timestamp_sec"] = None
+            sensor_data = sensor_handler.read_sensor_data(metadata["video_timestamp_sec"] or 0.0)
             metadata["video_file"] = os.path.basename(VIDEO_PATH)
+            if scorer is not None:
+                metadata["priority"] = scorer.score_image(frame_path)
             print("Sensor Data:", sensor_data)
-            formatted_data = format_data(frame_path, sensor_data, metadata)
+            formatted_data = format_data(frame_path, sensor_data, metadata, preprocessor=preprocessor)
             print("Formatted Data:")
             print(formatted_data)
         else:
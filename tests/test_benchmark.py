@@ -0,0 +1,62 @@
+import unittest
+
+import benchmark
+
+
+class BenchmarkCaseTests(unittest.TestCase):
+    def test_cases_expand_only_over_relevant_parameters(self):
+        cases = benchmark.build_cases(
+            ["encode_image", "mqtt_publish", "video_seek"], [(640, 480), (1280, 720)], [50, 85], [0, 1]
+        )
+        ids = [benchmark.case_id(case) for case in cases]
+
+        self.assertEqual(len(ids), 4 + 4 + 2)
+        self.assertIn("encode_image[1280x720,q85]", ids)
+        self.assertIn("mqtt_publish[640x480,qos1]", ids)
+        self.assertIn("video_seek[640x480]", ids)
+
+    def test_keyword_filters_cases(self):
+        cases = benchmark.build_cases(["encode_image"], [(640, 480), (1280, 720)], [85], [0], keyword="1280")
+        self.assertEqual([benchmark.case_id(case) for case in cases], ["encode_image[1280x720,q85]"])
+
+    def test_parse_resolution(self):
+        self.assertEqual(benchmark.parse_resolution("1920x1080"), (1920, 1080))
+        with self.assertRaises(Exception):
+            benchmark.parse_resolution("1080p")
+
+    def test_percentile_is_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(benchmark.percentile(values, 0.5), 50.0)
+        self.assertEqual(benchmark.percentile(values, 0.99), 99.0)
+        self.assertEqual(benchmark.percentile([3.0], 0.99), 3.0)
+
+
+class BenchmarkRunTests(unittest.TestCase):
+    def test_run_case_reports_throughput_latency_and_rss(self):
+        case = {"benchmark": "encode_image", "resolution": (64, 48), "quality": 75}
+        result = benchmark.run_case(case, iterations=5, warmup=1)
+
+        self.assertEqual(result["case"], "encode_image[64x48,q75]")
+        self.assertGreater(result["ops_per_sec"], 0)
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertGreater(result["peak_rss_mib"], 0)
+
+
+class BaselineTests(unittest.TestCase):
+    BASE = {"case": "c", "ops_per_sec": 100.0, "p50_ms": 10.0, "p99_ms": 12.0, "peak_rss_mib": 100.0}
+
+    def test_within_tolerance_is_not_a_regression(self):
+        result = dict(self.BASE, p50_ms=11.0, ops_per_sec=91.0, peak_rss_mib=110.0)
+        self.assertEqual(benchmark.compare(result, self.BASE, tolerance=0.15, rss_tolerance=0.2), [])
+
+    def test_slower_and_larger_cases_are_flagged(self):
+        result = dict(self.BASE, p50_ms=13.0, ops_per_sec=80.0, peak_rss_mib=130.0)
+        regressions = benchmark.compare(result, self.BASE, tolerance=0.15, rss_tolerance=0.2)
+        self.assertEqual(len(regressions), 3)
+
+    def test_missing_baseline_never_regresses(self):
+        self.assertEqual(benchmark.compare(self.BASE, None, tolerance=0.0, rss_tolerance=0.0), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from edge_data_collector.camera.camera_handler import CameraHandler
+from edge_data_collector.camera.camera_manager import CameraManager, SharedClock
+from edge_data_collector.camera.frame_cache import FrameCache
+from edge_data_collector.camera.synthetic import PROFILES, SyntheticFrameSource, synthetic_frame_source
+
+
+class FrameCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _make_file(self, name):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "wb") as f:
+            f.write(b"jpeg")
+        return path
+
+    def test_get_returns_path_and_metadata(self):
+        cache = FrameCache(max_frames=2)
+        path = self._make_file("a.jpg")
+        cache.add("cam-1", path, {"camera_id": "cam"})
+
+        image_path, metadata = cache.get("cam-1")
+        self.assertEqual(image_path, path)
+        self.assertEqual(metadata["camera_id"], "cam")
+        self.assertIsNone(cache.get("missing"))
+
+    def test_oldest_frame_is_evicted_and_deleted(self):
+        cache = FrameCache(max_frames=2)
+        paths = [self._make_file(f"{i}.jpg") for i in range(3)]
+        for i, path in enumerate(paths):
+            cache.add(f"cam-{i}", path)
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("cam-0", cache)
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[2]))
+
+    def test_recently_read_frame_survives_eviction(self):
+        cache = FrameCache(max_frames=2, delete_evicted=False)
+        cache.add("cam-0", self._make_file("0.jpg"))
+        cache.add("cam-1", self._make_file("1.jpg"))
+        cache.get("cam-0")
+        cache.add("cam-2", self._make_file("2.jpg"))
+
+        self.assertIn("cam-0", cache)
+        self.assertNotIn("cam-1", cache)
+
+
+class SyntheticFrameSourceTests(unittest.TestCase):
+    def test_profiles_produce_decodable_jpegs(self):
+        for profile in PROFILES:
+            with self.subTest(profile=profile):
+                source = SyntheticFrameSource(resolution=(160, 96), profile=profile, pool_size=3)
+                frames = [source.next_jpeg() for _ in range(4)]
+                with Image.open(io.BytesIO(frames[0])) as img:
+                    self.assertEqual((img.format, img.size), ("JPEG", (160, 96)))
+                self.assertEqual(len({id(frame) for frame in frames}), 3)  # pool repeats
+                self.assertIs(frames[3], frames[0])
+
+    def test_water_frames_change_across_pool(self):
+        source = SyntheticFrameSource(resolution=(128, 96), profile="water", pool_size=4)
+        first, second = source.next_array(), source.next_array()
+        lower = slice(96 // 2, None)
+        self.assertEqual(first.shape, (96, 128, 3))
+        self.assertGreater(abs(first[lower].astype(int) - second[lower].astype(int)).mean(), 2)
+
+    def test_arrays_are_decoded_once_per_pool_frame(self):
+        source = SyntheticFrameSource(resolution=(64, 48), profile="moving", pool_size=2)
+        with mock.patch("edge_data_collector.camera.synthetic.Image.open", wraps=Image.open) as opened:
+            frames = [source.next_array() for _ in range(5)]
+        self.assertEqual(opened.call_count, 2)
+        self.assertIs(frames[2], frames[0])
+        self.assertFalse(frames[0].flags.writeable)
+
+    def test_invalid_profile_is_rejected(self):
+        with self.assertRaises(ValueError):
+            SyntheticFrameSource(profile="snow")
+
+    def test_simulated_capture_writes_pool_frames(self):
+        with tempfile.TemporaryDirectory() as folder, \
+                mock.patch.multiple("config", SIMULATE_IMAGE_CREATION=True, SIMULATED_IMAGE_RESOLUTION=(64, 48),
+                                    SIMULATED_IMAGE_POOL_SIZE=2):
+            camera = CameraHandler("cam", image_folder=folder)
+            self.assertIs(camera.frame_source, synthetic_frame_source((64, 48), "water", 2, 85))
+            path, _ = camera.capture_image()
+            with Image.open(path) as img:
+                self.assertEqual(img.size, (64, 48))
+
+
+class FakeCamera:
+    def __init__(self, camera_id, fail=False):
+        self.camera_id = camera_id
+        self.fail = fail
+        self.clock = SharedClock()
+        self.count = 0
+        self.closed = False
+
+    def capture_image(self):
+        if self.fail:
+            raise RuntimeError("camera unplugged")
+        self.count += 1
+        return f"{self.camera_id}_{self.count}.jpg", self.clock()
+
+    def close_camera(self):
+        self.closed = True
+
+
+class CameraManagerTests(unittest.TestCase):
+    def _drain(self, manager, count):
+        captures = []
+        for _ in range(count):
+            capture = manager.next_capture(timeout=2.0)
+            self.assertIsNotNone(capture)
+            captures.append(capture)
+        return captures
+
+    def test_frames_are_interleaved_round_robin(self):
+        fast, slow = FakeCamera("fast"), FakeCamera("slow")
+        manager = CameraManager([(fast, 0.01), (slow, 0.05)], max_pending_per_camera=50)
+        manager.start()
+        time.sleep(0.2)
+        captures = self._drain(manager, 4)
+        manager.stop()
+
+        self.assertEqual([c[0] for c in captures], ["fast", "slow", "fast", "slow"])
+        self.assertTrue(fast.closed and slow.closed)
+        self.assertEqual(set(manager.last_timing), {"capture", "wait"})
+        self.assertGreaterEqual(manager.last_timing["wait"], 0.0)
+
+    def test_failing_camera_does_not_block_others(self):
+        broken, working = FakeCamera("broken", fail=True), FakeCamera("working")
+        manager = CameraManager([(broken, 0.01), (working, 0.01)], retry_delay=0.05)
+        manager.start()
+        captures = self._drain(manager, 3)
+        manager.stop()
+
+        self.assertEqual({c[0] for c in captures}, {"working"})
+        self.assertGreater(manager.stats["broken"]["failed"], 0)
+
+    def test_throttle_only_lengthens_intervals(self):
+        manager = CameraManager([(FakeCamera("a"), 5.0), (FakeCamera("b"), 20.0)])
+        manager.throttle(10.0)
+        self.assertEqual((manager.interval_for("a"), manager.interval_for("b")), (10.0, 20.0))
+        manager.throttle(None)
+        self.assertEqual(manager.interval_for("a"), 5.0)
+
+        manager.set_interval(2.0, camera_id="b")
+        self.assertEqual(manager.interval_for("b"), 2.0)
+        with self.assertRaises(ValueError):
+            manager.set_interval(0)
+
+    def test_from_config_skips_cameras_that_fail_to_initialize(self):
+        def make_handler(camera_id, **kwargs):
+            if camera_id == "broken":
+                raise RuntimeError("no camera at index 1")
+            return FakeCamera(camera_id)
+
+        configs = [{"camera_id": "working", "interval": 2.0}, {"camera_id": "broken"}]
+        with mock.patch("edge_data_collector.camera.camera_handler.CameraHandler", side_effect=make_handler):
+            manager = CameraManager.from_config(configs)
+            self.assertEqual([handler.camera_id for handler in manager.cameras], ["working"])
+            self.assertEqual(manager.interval_for("working"), 2.0)
+
+            with self.assertRaises(RuntimeError):
+                CameraManager.from_config(configs[1:])
+
+    def test_duplicate_camera_ids_are_rejected(self):
+        with self.assertRaises(ValueError):
+            CameraManager([(FakeCamera("a"), 1.0), (FakeCamera("a"), 1.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
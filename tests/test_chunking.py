@@ -0,0 +1,76 @@
+import json
+import os
+import struct
+import unittest
+
+from edge_data_sender.transmission.chunking import ChecksumMismatch, ChunkReassembler, split_message
+
+
+class ChunkingTests(unittest.TestCase):
+    def setUp(self):
+        self.body = os.urandom(10_000)
+
+    def test_round_trip_in_order(self):
+        manifest, chunks = split_message(self.body, 4096)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(json.loads(manifest)["chunk_count"], 3)
+
+        reassembler = ChunkReassembler()
+        self.assertIsNone(reassembler.add(manifest))
+        self.assertIsNone(reassembler.add(chunks[0]))
+        self.assertIsNone(reassembler.add(chunks[1]))
+        self.assertEqual(reassembler.add(chunks[2]), self.body)
+        self.assertEqual(reassembler.completed, 1)
+
+    def test_interleaved_transfers_out_of_order(self):
+        other = b"x" * 5000
+        manifest_a, chunks_a = split_message(self.body, 4096)
+        manifest_b, chunks_b = split_message(other, 4096)
+        reassembler = ChunkReassembler()
+
+        results = [
+            reassembler.add(message)
+            for message in (chunks_a[2], chunks_b[1], manifest_b, chunks_a[0], chunks_b[0], chunks_a[1], manifest_a)
+        ]
+        self.assertEqual([r for r in results if r is not None], [other, self.body])
+
+    def test_missing_chunks_are_reported_and_expired(self):
+        manifest, chunks = split_message(self.body, 4096)
+        transfer_id = json.loads(manifest)["transfer_id"]
+        reassembler = ChunkReassembler(timeout=10)
+        reassembler.add(manifest)
+        reassembler.add(chunks[1])
+
+        self.assertEqual(reassembler.missing(transfer_id), [0, 2])
+        self.assertEqual(reassembler.expire(now=0), {})
+        self.assertEqual(reassembler.expire(now=float("inf")), {transfer_id: [0, 2]})
+        self.assertEqual(reassembler.pending(), {})
+
+    def test_corrupted_chunk_fails_checksum(self):
+        manifest, chunks = split_message(self.body, 8192)
+        reassembler = ChunkReassembler()
+        reassembler.add(manifest)
+        reassembler.add(chunks[0])
+        tampered = chunks[1][:-1] + bytes([chunks[1][-1] ^ 0xFF])
+        with self.assertRaises(ChecksumMismatch):
+            reassembler.add(tampered)
+
+    def test_chunk_index_outside_manifest_is_rejected(self):
+        manifest, chunks = split_message(self.body, 4096)
+        reassembler = ChunkReassembler()
+        reassembler.add(manifest)
+        header = struct.Struct("!4s16sII")
+        magic, transfer, _, count = header.unpack_from(chunks[0])
+        out_of_range = header.pack(magic, transfer, count, count) + b"junk"
+        wrong_count = header.pack(magic, transfer, 3, count + 1) + b"junk"
+
+        for message in (out_of_range, wrong_count):
+            with self.assertRaises(ValueError):
+                reassembler.add(message)
+        for chunk in chunks:
+            result = reassembler.add(chunk)
+        self.assertEqual(result, self.body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import json
+import unittest
+
+from edge_data_sender.transmission.compression import (
+    COMPRESSION_MAGIC, PayloadCompressor, decompress_payload, train_dictionary,
+)
+
+
+def _telemetry(index):
+    return json.dumps({
+        "sensor_data": {"temperature": 12.0 + index % 3, "humidity": 88.0, "pressure": 995.0},
+        "metadata": {
+            "location": "50.8503,4.3517",
+            "camera_id": "camera_01",
+            "motion": "slow",
+            "resource_constrained": False,
+            "sample_id": f"telemetry-{index}",
+        },
+    }).encode()
+
+
+class CompressionTests(unittest.TestCase):
+    def test_dictionary_round_trip_is_smaller(self):
+        samples = [_telemetry(i) for i in range(50)]
+        dictionary = train_dictionary(samples)
+        plain = PayloadCompressor()
+        trained = PayloadCompressor(dictionary=dictionary)
+
+        message = trained.compress(_telemetry(99))
+        self.assertTrue(message.startswith(COMPRESSION_MAGIC))
+        self.assertLess(len(message), len(plain.compress(_telemetry(99))))
+        self.assertEqual(decompress_payload(message, [dictionary]), _telemetry(99))
+
+    def test_plain_messages_pass_through(self):
+        self.assertEqual(decompress_payload(b'{"a": 1}'), b'{"a": 1}')
+        self.assertEqual(PayloadCompressor(min_size=64).compress(b'{"a": 1}'), b'{"a": 1}')
+
+    def test_unknown_dictionary_is_rejected(self):
+        message = PayloadCompressor(dictionary=b'"camera_id": "camera_01"').compress(_telemetry(1))
+        with self.assertRaises(ValueError):
+            decompress_payload(message)
+
+    def test_unknown_codec_is_rejected(self):
+        with self.assertRaises(ValueError):
+            PayloadCompressor(codec="brotli")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import unittest
+from unittest import mock
+
+from edge_data_sender.transmission.control_channel import (
+    ControlChannel, RuntimeSettings, jpeg_quality, one_of, positive_number, resolution, topic_name,
+)
+
+
+def _settings():
+    return RuntimeSettings(
+        initial={"interval": 5.0, "quality": None, "resolution": None, "motion": "slow", "topic": "sensor/data"},
+        validators={
+            "interval": positive_number,
+            "quality": jpeg_quality,
+            "resolution": resolution,
+            "motion": one_of("fast", "slow", "stop"),
+            "topic": topic_name,
+        },
+    )
+
+
+class RuntimeSettingsTests(unittest.TestCase):
+    def test_valid_changes_are_applied_and_listeners_notified(self):
+        settings = _settings()
+        listener = mock.Mock()
+        settings.add_listener(listener)
+
+        applied = settings.apply({"interval": "10", "resolution": [640, 360]})
+
+        self.assertEqual(applied, {"interval": 10.0, "resolution": (640, 360)})
+        self.assertEqual(settings.snapshot()["interval"], 10.0)
+        self.assertEqual(settings.revision, 1)
+        listener.assert_called_once_with(applied, settings.snapshot())
+
+    def test_one_invalid_change_rejects_the_whole_command(self):
+        settings = _settings()
+        with self.assertRaises(ValueError) as raised:
+            settings.apply({"interval": 2.0, "quality": 150, "topic": "sensor/#", "bogus": 1})
+
+        message = str(raised.exception)
+        for name in ("quality", "topic", "bogus"):
+            self.assertIn(name, message)
+        self.assertEqual(settings.snapshot()["interval"], 5.0)
+        self.assertEqual(settings.revision, 0)
+
+    def test_non_finite_numbers_are_rejected(self):
+        for value in (float("nan"), float("inf"), "-inf", "1e400"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                positive_number(value)
+        for validator, value in ((jpeg_quality, float("inf")), (jpeg_quality, float("nan")),
+                                 (resolution, [float("inf"), 480]), (resolution, [640, float("nan")])):
+            with self.subTest(validator=validator.__name__, value=value), self.assertRaises(ValueError):
+                validator(value)
+        self.assertEqual(jpeg_quality(75.0), 75)
+
+    def test_non_finite_sensor_regime_is_rejected(self):
+        from main_video import sensor_regime
+
+        for reading in (float("nan"), float("inf")):
+            with self.subTest(reading=reading), self.assertRaises(ValueError):
+                sensor_regime({"temperature": reading, "humidity": 80.0, "pressure": 1000.0})
+        self.assertEqual(sensor_regime({"temperature": 12, "humidity": 80, "pressure": 1000})["temperature"], 12.0)
+
+
+class ControlChannelTests(unittest.TestCase):
+    def test_commands_are_acknowledged_with_timestamp(self):
+        handler = mock.Mock()
+        channel = ControlChannel(handler, _settings(), "sensor/control", "sensor/control/ack")
+        channel.start()
+        handler.subscribe.assert_called_once_with("sensor/control", channel.handle_command, qos=1)
+
+        ack = channel.handle_command(json.dumps({"command_id": "c1", "set": {"motion": "fast"}}).encode())
+        self.assertEqual(ack["status"], "applied")
+        self.assertEqual(ack["applied"], {"motion": "fast"})
+        self.assertIn("ack_ts", ack)
+        handler.publish.assert_called_with(ack, topic="sensor/control/ack", qos=1)
+
+        rejected = channel.handle_command(b'{"command_id": "c2", "set": {"motion": "sideways"}}')
+        self.assertEqual(rejected["status"], "rejected")
+        self.assertEqual(rejected["revision"], 1)
+
+    def test_malformed_command_is_rejected(self):
+        channel = ControlChannel(mock.Mock(), _settings(), "sensor/control", "sensor/control/ack")
+        self.assertEqual(channel.handle_command(b"not json")["status"], "rejected")
+        self.assertEqual(channel.handle_command(b'{"command_id": "c3"}')["status"], "rejected")
+
+    def test_non_finite_interval_is_rejected(self):
+        settings = _settings()
+        channel = ControlChannel(mock.Mock(), settings, "sensor/control", "sensor/control/ack")
+        for payload in (b'{"set": {"interval": NaN}}', b'{"set": {"interval": Infinity}}',
+                        b'{"set": {"interval": 1e400}}', b'{"set": {"quality": Infinity}}',
+                        b'{"set": {"resolution": [Infinity, 480]}}'):
+            with self.subTest(payload=payload):
+                self.assertEqual(channel.handle_command(payload)["status"], "rejected")
+        self.assertEqual(settings.snapshot()["interval"], 5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,15 @@
+import base64
+import io
+import os
+import tempfile
 import unittest
 from unittest import mock
 
+import numpy as np
+from PIL import Image
+
 from edge_data_collector.formatter.data_formatter import format_data
+from edge_data_collector.formatter.parallel_encoder import ParallelEncoder
 
 
 class FormatDataTests(unittest.TestCase):
@@ -47,6 +55,86 @@ class FormatDataTests(unittest.TestCase):
         self.assertEqual(meta["motion"], "slow")
         self.assertFalse(meta["resource_constrained"])
 
+    def test_thumbnail_variant_is_downscaled(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            image_path = os.path.join(tmpdir, "frame.jpg")
+            Image.new("RGB", (1920, 1080), (10, 120, 200)).save(image_path, "JPEG")
+
+            payload = format_data(
+                image_path, {"temperature": 25}, {}, thumbnail_size=(320, 180)
+            )
+
+        self.assertEqual(payload["metadata"]["image_variant"], "thumbnail")
+        thumbnail = Image.open(io.BytesIO(base64.b64decode(payload["image_data"])))
+        self.assertEqual(thumbnail.size, (320, 180))
+
+    def test_scale_reduces_resolution(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            image_path = os.path.join(tmpdir, "frame.jpg")
+            Image.new("RGB", (640, 360), (10, 120, 200)).save(image_path, "JPEG")
+
+            payload = format_data(image_path, {}, {}, scale=0.5)
+
+        image = Image.open(io.BytesIO(base64.b64decode(payload["image_data"])))
+        self.assertEqual(image.size, (320, 180))
+
+
+class ParallelEncoderTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.encoder = ParallelEncoder(workers=2, frame_shape=(120, 160, 3))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.encoder.close()
+
+    def test_frames_round_trip_through_shared_memory(self):
+        frames = [np.full((120, 160, 3), value, dtype=np.uint8) for value in (0, 100, 200, 250, 30)]
+        futures = [self.encoder.submit(frame, quality=95) for frame in frames]
+
+        for frame, future in zip(frames, futures):
+            decoded = np.asarray(Image.open(io.BytesIO(base64.b64decode(future.result(timeout=30)))))
+            self.assertEqual(decoded.shape, frame.shape)
+            self.assertLess(abs(int(decoded.mean()) - int(frame.mean())), 3)
+
+    def test_thumbnail_and_full_resolution_copy(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            save_path = os.path.join(tmpdir, "full.jpg")
+            encoded = self.encoder.encode(
+                np.zeros((120, 160, 3), dtype=np.uint8), thumbnail_size=(40, 30), save_path=save_path
+            )
+            self.assertEqual(Image.open(save_path).size, (160, 120))
+        self.assertEqual(Image.open(io.BytesIO(base64.b64decode(encoded))).size, (40, 30))
+
+    def test_oversized_frame_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.encoder.submit(np.zeros((240, 320, 3), dtype=np.uint8))
+
+
+class _ExitOnWhiteFrame:
+    """Preprocessor that kills its worker process, like an OOM kill mid-encode."""
+
+    def process(self, frame):
+        if frame.min() == 255:
+            os._exit(1)
+        return frame
+
+
+class ParallelEncoderWorkerDeathTests(unittest.TestCase):
+    def test_dead_worker_fails_its_frames_and_is_restarted(self):
+        encoder = ParallelEncoder(
+            workers=1, frame_shape=(60, 80, 3), slots=1, preprocessor=_ExitOnWhiteFrame(), health_check_interval=0.1
+        )
+        try:
+            doomed = encoder.submit(np.full((60, 80, 3), 255, dtype=np.uint8))
+            self.assertIsInstance(doomed.exception(timeout=30), RuntimeError)
+            # The slot was returned and the worker replaced, so encoding continues.
+            encoded = encoder.submit(np.zeros((60, 80, 3), dtype=np.uint8)).result(timeout=30)
+            self.assertEqual(Image.open(io.BytesIO(base64.b64decode(encoded))).size, (80, 60))
+            self.assertEqual(encoder.restarts, 1)
+        finally:
+            encoder.close()
+
 
 if __name__ == "__main__":
     unittest.main()
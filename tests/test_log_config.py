@@ -0,0 +1,108 @@
+import io
+import json
+import logging
+import unittest
+
+from edge_data_sender.monitoring.log_config import (
+    RateLimitFilter,
+    StructuredFormatter,
+    configure_logging,
+    shutdown_logging,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _record(msg, *args, level=logging.INFO, **fields):
+    record = logging.LogRecord("edge.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(fields)
+    return record
+
+
+class StructuredFormatterTests(unittest.TestCase):
+    def test_text_appends_extra_fields(self):
+        line = StructuredFormatter("text").format(_record("Frame %s captured", 7, camera_id="camera_01"))
+        self.assertTrue(line.endswith("INFO edge.test: Frame 7 captured camera_id=camera_01"))
+
+    def test_json_is_one_object_with_fields(self):
+        entry = json.loads(StructuredFormatter("json").format(_record("Frame %s captured", 7, camera_id="camera_01")))
+        self.assertEqual(entry["msg"], "Frame 7 captured")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["camera_id"], "camera_01")
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StructuredFormatter("xml")
+
+
+class RateLimitFilterTests(unittest.TestCase):
+    def test_burst_then_rate_per_template(self):
+        clock = FakeClock()
+        limit = RateLimitFilter(rate=1.0, burst=2, clock=clock)
+
+        passed = [limit.filter(_record("Failed to capture image: %s", i)) for i in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        # Another call site is not affected.
+        self.assertTrue(limit.filter(_record("Camera closed.")))
+
+        clock.now += 1.0
+        record = _record("Failed to capture image: %s", 5)
+        self.assertTrue(limit.filter(record))
+        self.assertEqual(record.suppressed, 3)
+        self.assertIn("(3 similar messages suppressed)", StructuredFormatter().format(record))
+
+    def test_exempt_level_always_passes(self):
+        limit = RateLimitFilter(rate=1.0, burst=1, exempt_level=logging.ERROR, clock=FakeClock())
+        self.assertTrue(all(limit.filter(_record("Broker down", level=logging.ERROR)) for _ in range(5)))
+
+
+class ConfigureLoggingTests(unittest.TestCase):
+    def setUp(self):
+        root = logging.getLogger()
+        saved = (root.level, list(root.handlers))
+
+        def restore():
+            shutdown_logging()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.setLevel(saved[0])
+            for handler in saved[1]:
+                root.addHandler(handler)
+
+        self.addCleanup(restore)
+
+    def test_debug_arguments_are_not_formatted_at_info(self):
+        class Expensive:
+            calls = 0
+
+            def __str__(self):
+                Expensive.calls += 1
+                return "expensive"
+
+        stream = io.StringIO()
+        configure_logging("INFO", stream=stream)
+        logging.getLogger("edge.test").debug("Payload %s", Expensive())
+        logging.getLogger("edge.test").info("Payload %s", Expensive())
+
+        self.assertEqual(Expensive.calls, 1)
+        self.assertEqual(stream.getvalue().count("Payload expensive"), 1)
+
+    def test_async_queue_writes_from_listener(self):
+        stream = io.StringIO()
+        configure_logging("DEBUG", fmt="json", async_queue=True, stream=stream)
+        logging.getLogger("edge.test").debug("Frame %s captured", 3, extra={"camera_id": "camera_01"})
+        shutdown_logging()
+
+        entry = json.loads(stream.getvalue())
+        self.assertEqual(entry["msg"], "Frame 3 captured")
+        self.assertEqual(entry["camera_id"], "camera_01")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import gc
+import json
+import unittest
+import urllib.request
+from unittest import mock
+
+from edge_data_sender.monitoring.exporter import MetricsHttpServer, StatsPublisher, register_disk_usage
+from edge_data_sender.monitoring.metrics import MetricsRegistry, weak_callback
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_counts_per_label_set(self):
+        captures = self.registry.counter("captures_total", "Captures", ("camera_id", "result"))
+        captures.inc(camera_id="camera_01", result="ok")
+        captures.inc(2, camera_id="camera_01", result="ok")
+        captures.inc(camera_id="camera_01", result="error")
+
+        self.assertEqual(captures.value(camera_id="camera_01", result="ok"), 3)
+        self.assertEqual(captures.value(camera_id="camera_02", result="ok"), 0)
+        with self.assertRaises(ValueError):
+            captures.inc(-1, camera_id="camera_01", result="ok")
+        with self.assertRaises(ValueError):
+            captures.inc(camera_id="camera_01")
+
+    def test_declaring_again_returns_same_metric(self):
+        first = self.registry.counter("frames_total", "Frames")
+        self.assertIs(self.registry.counter("frames_total", "Frames"), first)
+        with self.assertRaises(ValueError):
+            self.registry.gauge("frames_total", "Frames")
+
+    def test_gauge_function_is_read_on_collection(self):
+        depth = [3]
+        gauge = self.registry.gauge("queue_depth", "Depth")
+        gauge.set_function(lambda: depth[0])
+        depth[0] = 5
+
+        self.assertEqual(gauge.value(), 5)
+        self.assertEqual(self.registry.snapshot(), {"queue_depth": 5})
+
+    def test_gauge_without_value_is_omitted(self):
+        self.registry.gauge("sensor_age_seconds", "Age").set_function(lambda: None)
+        self.assertEqual(self.registry.snapshot(), {})
+        self.assertNotIn("\nsensor_age_seconds ", self.registry.render())
+
+    def test_render_uses_prometheus_text_format(self):
+        self.registry.counter("published_total", "Published", ("client_id",)).inc(client_id="a\"b")
+        latency = self.registry.histogram("publish_seconds", "Latency", buckets=(0.1, 1.0))
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(3.0)
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE published_total counter\n", text)
+        self.assertIn('published_total{client_id="a\\"b"} 1\n', text)
+        self.assertIn("# TYPE publish_seconds histogram\n", text)
+        self.assertIn('publish_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn('publish_seconds_bucket{le="1"} 2\n', text)
+        self.assertIn('publish_seconds_bucket{le="+Inf"} 3\n', text)
+        self.assertIn("publish_seconds_sum 3.55\n", text)
+        self.assertIn("publish_seconds_count 3\n", text)
+
+    def test_snapshot_is_compact(self):
+        self.registry.counter("reads_total", "Reads", ("result",)).inc(result="ok")
+        latency = self.registry.histogram("read_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.05, 0.5):
+            latency.observe(value)
+
+        snapshot = self.registry.snapshot()
+
+        self.assertEqual(snapshot["reads_total"], {"ok": 1})
+        self.assertEqual(snapshot["read_seconds"], {"count": 3, "mean": 0.2, "p95": 1.0})
+        json.dumps(snapshot)
+
+    def test_p95_above_top_bucket_reports_top_bound(self):
+        latency = self.registry.histogram("ack_seconds", "Latency", buckets=(0.1, 1.0))
+        latency.observe(0.05)
+        latency.observe(30.0)
+        self.assertEqual(self.registry.snapshot()["ack_seconds"]["p95"], 1.0)
+
+    def test_weak_gauge_does_not_keep_owner_alive(self):
+        class Owner:
+            depth = 4
+
+        owner = Owner()
+        gauge = self.registry.gauge("owner_depth", "Depth")
+        gauge.set_function(weak_callback(owner, lambda o: o.depth))
+        self.assertEqual(gauge.value(), 4)
+        del owner
+        gc.collect()
+        self.assertIsNone(gauge.value())
+
+    def test_remove_keeps_series_replaced_by_newer_function(self):
+        gauge = self.registry.gauge("inflight", "Inflight", ("client_id",))
+        old, new = (lambda: 1), (lambda: 2)
+        gauge.set_function(old, client_id="a")
+        gauge.set_function(new, client_id="a")
+        gauge.remove(old, client_id="a")
+        self.assertEqual(gauge.value(client_id="a"), 2)
+        gauge.remove(new, client_id="a")
+        self.assertIsNone(gauge.value(client_id="a"))
+
+    def test_histogram_time_observes_block(self):
+        latency = self.registry.histogram("encode_seconds", "Latency")
+        with self.assertRaises(RuntimeError):
+            with latency.time():
+                raise RuntimeError("encode failed")
+        self.assertEqual(self.registry.snapshot()["encode_seconds"]["count"], 1)
+
+    def test_disk_usage_gauges(self):
+        register_disk_usage(".", registry=self.registry)
+        snapshot = self.registry.snapshot()
+        self.assertGreater(snapshot["disk_free_bytes"]["."] + snapshot["disk_used_bytes"]["."], 0)
+
+
+class ExporterTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.counter("captures_total", "Captures").inc()
+
+    def test_http_endpoint_serves_metrics(self):
+        server = MetricsHttpServer(self.registry, host="127.0.0.1", port=0).start()
+        self.addCleanup(server.stop)
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+            content_type = response.headers["Content-Type"]
+
+        self.assertIn("captures_total 1\n", body)
+        self.assertTrue(content_type.startswith("text/plain; version=0.0.4"))
+
+    def test_stats_publisher_publishes_snapshot_on_its_topic(self):
+        handler = mock.Mock()
+        stats = StatsPublisher(
+            handler, "sensor/stats", registry=self.registry, build_metadata=lambda: {"session_id": "abc"}
+        )
+
+        stats.publish()
+
+        payload = handler.publish.call_args.args[0]
+        self.assertEqual(handler.publish.call_args.kwargs, {"topic": "sensor/stats"})
+        self.assertEqual(payload["stats"], {"captures_total": 1})
+        self.assertEqual(payload["metadata"]["session_id"], "abc")
+        self.assertIn("stats_ts", payload["metadata"])
+
+    def test_stats_publisher_survives_publish_errors(self):
+        handler = mock.Mock()
+        handler.publish.side_effect = RuntimeError("not connected")
+        StatsPublisher(handler, "sensor/stats", registry=self.registry).publish()
+
+
+if __name__ == "__main__":
+    unittest.main()
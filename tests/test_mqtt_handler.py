@@ -0,0 +1,475 @@
+import json
+import time
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+import paho.mqtt.client as mqtt
+
+from edge_data_sender.transmission.broker_stub import MqttBrokerStub
+from edge_data_sender.transmission.compression import PayloadCompressor, decompress_payload
+from edge_data_sender.transmission.feedback_controller import FeedbackController
+from edge_data_sender.transmission.full_resolution_server import FullResolutionServer
+from edge_data_sender.transmission.mqtt_handler import MQTT_DROPPED, MQTT_INFLIGHT, MQTT_SENT, MqttHandler
+from edge_data_sender.transmission.partitioning import partition_topic
+from edge_data_sender.transmission.priority_queue import QUEUE_DEPTH, PriorityPublishQueue
+from edge_data_sender.transmission.telemetry_publisher import TelemetryPublisher
+
+
+class FullResolutionServerTests(unittest.TestCase):
+    def _serve(self, request, frames):
+        handler = mock.Mock()
+        server = FullResolutionServer(
+            handler, frames.get, "sensor/full_res/request", "sensor/full_res/response"
+        )
+        server.handle_request(json.dumps(request).encode())
+        server.stop()
+        return handler
+
+    def test_cached_frame_is_returned(self):
+        frames = {"cam-1": {"image_data": "abc", "metadata": {"camera_id": "cam"}}}
+        handler = self._serve({"frame_id": "cam-1", "request_id": "r1"}, frames)
+
+        response = handler.publish.call_args.args[0]
+        self.assertTrue(response["found"])
+        self.assertEqual(response["image_data"], "abc")
+        self.assertEqual(response["request_id"], "r1")
+        self.assertEqual(handler.publish.call_args.kwargs["topic"], "sensor/full_res/response")
+
+    def test_missing_frame_uses_requested_response_topic(self):
+        handler = self._serve({"frame_id": "gone", "response_topic": "worker/1"}, {})
+
+        response = handler.publish.call_args.args[0]
+        self.assertFalse(response["found"])
+        self.assertEqual(handler.publish.call_args.kwargs["topic"], "worker/1")
+
+    def test_malformed_request_is_ignored(self):
+        handler = mock.Mock()
+        server = FullResolutionServer(handler, {}.get, "req", "resp")
+        server.handle_request(b"not json")
+        server.stop()
+        handler.publish.assert_not_called()
+
+
+def _payload(name, priority):
+    return {"name": name, "metadata": {"priority": priority}}
+
+
+class PriorityPublishQueueTests(unittest.TestCase):
+    def test_highest_priority_is_published_first(self):
+        handler = mock.Mock()
+        queue = PriorityPublishQueue(handler)
+        for name, priority in (("dry", 0.1), ("flood", 0.9), ("maybe", 0.5)):
+            queue.submit(_payload(name, priority))
+        queue.start()
+        queue.stop(drain=True)
+
+        published = [c.args[0]["name"] for c in handler.publish_async.call_args_list]
+        self.assertEqual(published, ["flood", "maybe", "dry"])
+
+    def test_low_priority_is_decimated_under_load(self):
+        queue = PriorityPublishQueue(
+            mock.Mock(), max_pending=50, load_threshold=2, low_priority_keep_every=3
+        )
+        queue.submit(_payload("a", 0.9))
+        queue.submit(_payload("b", 0.9))
+        accepted = [queue.submit(_payload(f"low{i}", 0.1)) for i in range(6)]
+
+        self.assertEqual(accepted.count(True), 2)
+        self.assertEqual(queue.decimated, 4)
+
+    def test_full_queue_evicts_lowest_priority(self):
+        queue = PriorityPublishQueue(mock.Mock(), max_pending=2, load_threshold=10)
+        queue.submit(_payload("low", 0.2))
+        queue.submit(_payload("mid", 0.5))
+
+        self.assertTrue(queue.submit(_payload("high", 0.9)))
+        self.assertFalse(queue.submit(_payload("lower", 0.1)))
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.dropped, 2)
+
+    def test_order_key_keeps_camera_order(self):
+        handler = mock.Mock()
+        queue = PriorityPublishQueue(handler, order_key="camera_id")
+        for name, camera_id, priority in (("a1", "a", 0.1), ("b1", "b", 0.5), ("a2", "a", 0.9)):
+            queue.submit({"name": name, "metadata": {"camera_id": camera_id, "priority": priority}})
+        queue.start()
+        queue.stop(drain=True)
+
+        published = [c.args[0]["name"] for c in handler.publish_async.call_args_list]
+        self.assertEqual(published, ["a1", "a2", "b1"])
+
+    def test_prepare_runs_only_on_published_payloads(self):
+        handler = mock.Mock()
+        prepare = mock.Mock(side_effect=lambda payload: dict(payload, prepared=True))
+        queue = PriorityPublishQueue(handler, max_pending=1, load_threshold=10, prepare=prepare)
+        queue.submit(_payload("kept", 0.9))
+        queue.submit(_payload("dropped", 0.1))
+        queue.start()
+        queue.stop(drain=True)
+
+        prepare.assert_called_once()
+        self.assertTrue(handler.publish_async.call_args.args[0]["prepared"])
+
+    def test_payload_without_window_slot_is_counted_as_dropped(self):
+        handler = _handler_with_fake_client(max_inflight=1)
+        queue = PriorityPublishQueue(handler, publish_timeout=0.01)
+        queue.submit(_payload("sent", 0.9))
+        queue.submit(_payload("stuck", 0.5))
+        queue.start()
+        queue.stop(drain=True)
+
+        self.assertEqual(handler.client.publish.call_count, 1)
+        self.assertEqual(queue.dropped, 1)
+
+    def test_stop_removes_depth_gauge(self):
+        queue = PriorityPublishQueue(mock.Mock())
+        queue.submit(_payload("pending", 0.5))
+        self.assertEqual(QUEUE_DEPTH.value(), 1)
+        queue.stop(drain=False)
+        self.assertIsNone(QUEUE_DEPTH.value())
+
+    def test_queue_time_and_ack_are_reported_for_traced_payloads(self):
+        ack = Future()
+        ack.set_result(mock.Mock(latency=0.02))
+        handler = mock.Mock()
+        handler.publish_async.return_value = ack
+        published = mock.Mock()
+        queue = PriorityPublishQueue(handler, trace_key="trace", on_published=published)
+        payload = _payload("a", 0.5)
+        payload["metadata"]["trace"] = {"format": 12.0}
+        queue.submit(payload)
+        queue.start()
+        queue.stop(drain=True)
+
+        sent, reported_ack = published.call_args.args
+        self.assertIs(reported_ack, ack.result())
+        self.assertEqual(list(sent["metadata"]["trace"]), ["format", "queue"])
+        self.assertGreaterEqual(sent["metadata"]["trace"]["queue"], 0.0)
+
+
+class FakeMessageInfo:
+    def __init__(self, mid, rc=mqtt.MQTT_ERR_SUCCESS):
+        self.mid = mid
+        self.rc = rc
+
+
+def _handler_with_fake_client(**kwargs):
+    handler = MqttHandler("localhost", 1883, "sensor/data", **kwargs)
+    mids = iter(range(1, 1000))
+    handler.client = mock.Mock()
+    handler.client.publish.side_effect = lambda *args, **kw: FakeMessageInfo(next(mids))
+    return handler
+
+
+class MqttHandlerPublishTests(unittest.TestCase):
+    def test_future_resolves_on_publish_callback(self):
+        handler = _handler_with_fake_client()
+        callback = mock.Mock()
+        future = handler.publish_async({"metadata": {}}, callback=callback)
+
+        self.assertFalse(future.done())
+        self.assertEqual(handler.inflight, 1)
+        handler._on_publish(handler.client, None, 1)
+
+        ack = future.result(timeout=1)
+        self.assertEqual(ack.mid, 1)
+        self.assertEqual(ack.topic, "sensor/data")
+        self.assertGreaterEqual(ack.latency, 0)
+        callback.assert_called_once_with(future)
+        self.assertEqual(handler.inflight, 0)
+        self.assertEqual(handler.latency_stats()["count"], 1)
+
+    def test_ack_arriving_before_publish_returns(self):
+        handler = _handler_with_fake_client()
+        handler._on_publish(handler.client, None, 1)
+        future = handler.publish_async({"metadata": {}})
+        self.assertTrue(future.done())
+        self.assertEqual(handler.inflight, 0)
+
+    def test_stale_early_ack_expires(self):
+        handler = _handler_with_fake_client()
+        with mock.patch("edge_data_sender.transmission.mqtt_handler.time.monotonic", return_value=0.0):
+            handler._on_publish(handler.client, None, 1)
+        with mock.patch("edge_data_sender.transmission.mqtt_handler.time.monotonic", return_value=100.0):
+            handler._on_publish(handler.client, None, 7)
+        future = handler.publish_async({"metadata": {}})  # reuses mid 1
+        self.assertFalse(future.done())
+        self.assertEqual(handler.inflight, 1)
+
+    def test_window_limits_messages_in_flight(self):
+        handler = _handler_with_fake_client(max_inflight=2)
+        handler.publish_async({"metadata": {}})
+        handler.publish_async({"metadata": {}})
+
+        rejected = handler.publish_async({"metadata": {}}, block=False)
+        self.assertIsInstance(rejected.exception(timeout=1), RuntimeError)
+
+        handler._on_publish(handler.client, None, 1)
+        accepted = handler.publish_async({"metadata": {}}, block=False)
+        self.assertFalse(accepted.done())
+
+    def test_rejected_publish_fails_future_and_frees_slot(self):
+        handler = _handler_with_fake_client(max_inflight=1)
+        handler.client.publish.side_effect = lambda *a, **kw: FakeMessageInfo(1, mqtt.MQTT_ERR_QUEUE_SIZE)
+        future = handler.publish_async({"metadata": {}}, block=False)
+
+        self.assertIsInstance(future.exception(timeout=1), RuntimeError)
+        self.assertEqual(handler.inflight, 0)
+        self.assertTrue(handler._window.acquire(blocking=False))
+        self.assertEqual(handler.drop_counts(), {"queue_full": 1})
+
+    def test_full_window_and_disconnect_losses_are_counted(self):
+        handler = _handler_with_fake_client(max_inflight=1)
+        handler.publish_async({"metadata": {}}, block=False)
+        handler.publish_async({"metadata": {}}, block=False)
+        handler._on_disconnect(handler.client, None, 1)
+
+        self.assertEqual(handler.drop_counts(), {"window_full": 1, "disconnect": 1})
+
+    def test_sent_and_dropped_messages_update_metrics(self):
+        handler = _handler_with_fake_client(max_inflight=1, client_id="metrics-test")
+        handler.publish_async({"metadata": {}}, block=False)
+        handler.publish_async({"metadata": {}}, block=False)
+        handler._on_publish(handler.client, None, 1)
+
+        self.assertEqual(MQTT_SENT.value(client_id="metrics-test"), 1)
+        self.assertEqual(MQTT_DROPPED.value(client_id="metrics-test", reason="window_full"), 1)
+
+    def test_close_disconnects_and_removes_gauges(self):
+        handler = _handler_with_fake_client(client_id="close-test")
+        handler.publish_async({"metadata": {}})
+        self.assertEqual(MQTT_INFLIGHT.value(client_id="close-test"), 1)
+        handler.close()
+
+        handler.client.disconnect.assert_called_once()
+        handler.client.loop_stop.assert_called_once()
+        self.assertIsNone(MQTT_INFLIGHT.value(client_id="close-test"))
+
+    def test_large_message_is_chunked(self):
+        handler = _handler_with_fake_client(chunk_size=1000)
+        future = handler.publish_async({"image_data": "x" * 2500, "metadata": {}})
+
+        topics = [c.args[0] for c in handler.client.publish.call_args_list]
+        self.assertEqual(topics, ["sensor/data/chunked"] * 4)
+        for mid in range(1, 4):
+            handler._on_publish(handler.client, None, mid)
+        self.assertFalse(future.done())
+        handler._on_publish(handler.client, None, 4)
+        self.assertEqual(future.result(timeout=1).topic, "sensor/data/chunked")
+
+    def test_publish_chunks_large_messages(self):
+        handler = _handler_with_fake_client(chunk_size=1000)
+        result = handler.publish({"image_data": "x" * 2500, "metadata": {}})
+
+        topics = [c.args[0] for c in handler.client.publish.call_args_list]
+        self.assertEqual(topics, ["sensor/data/chunked"] * 4)
+        self.assertEqual(result.mid, 4)
+        self.assertEqual(handler.inflight, 4)
+        handler.publish({"metadata": {}})
+        self.assertEqual(handler.client.publish.call_args.args[0], "sensor/data")
+
+    def test_queued_messages_from_pending_bookkeeping(self):
+        handler = _handler_with_fake_client(max_inflight=2)
+        handler.publish({"metadata": {}})
+        for _ in range(3):
+            handler.publish({"metadata": {}}, qos=1)
+        self.assertEqual(handler.queued_messages, 2)
+
+        handler._on_publish(handler.client, None, 1)
+        handler._on_publish(handler.client, None, 2)
+        self.assertEqual(handler.queued_messages, 0)
+
+    def test_disconnect_fails_pending_qos0_messages(self):
+        handler = _handler_with_fake_client()
+        qos0 = handler.publish_async({"metadata": {}})
+        qos1 = handler.publish_async({"metadata": {}}, qos=1)
+        handler._on_disconnect(handler.client, None, 1)
+
+        self.assertIsInstance(qos0.exception(timeout=1), RuntimeError)
+        self.assertFalse(qos1.done())
+        self.assertEqual(handler.inflight, 1)
+
+    def test_compressor_skips_image_payloads(self):
+        handler = _handler_with_fake_client(compressor=PayloadCompressor(min_size=0))
+        handler.publish({"sensor_data": {"temperature": 12.0}, "metadata": {"camera_id": "camera_01"}})
+        handler.publish({"image_data": "abc", "metadata": {}})
+
+        telemetry, image = [call.args[1] for call in handler.client.publish.call_args_list]
+        self.assertEqual(json.loads(decompress_payload(telemetry))["sensor_data"], {"temperature": 12.0})
+        self.assertEqual(json.loads(image)["image_data"], "abc")
+
+    def test_partitioned_topics(self):
+        handler = _handler_with_fake_client(partitions=4)
+        handler.publish({"metadata": {"camera_id": "camera_01"}})
+        handler.publish_async({"metadata": {"camera_id": "camera_01"}})
+        handler.publish({"metadata": {"camera_id": "camera_01"}}, topic="sensor/other")
+
+        topics = [call.args[0] for call in handler.client.publish.call_args_list]
+        expected = partition_topic("sensor/data", "camera_01", 4)
+        self.assertEqual(topics, [expected, expected, "sensor/other"])
+
+
+class MqttV5Tests(unittest.TestCase):
+    def _connected_handler(self, alias_maximum, **kwargs):
+        handler = _handler_with_fake_client(protocol="5", **kwargs)
+        handler._on_connect(handler.client, None, {}, 0, mock.Mock(TopicAliasMaximum=alias_maximum))
+        return handler
+
+    def test_topic_alias_replaces_topic_after_first_message(self):
+        handler = self._connected_handler(alias_maximum=2)
+        handler.publish({"metadata": {}})
+        handler.publish({"metadata": {}})
+
+        first, second = handler.client.publish.call_args_list
+        self.assertEqual(first.args[0], "sensor/data")
+        self.assertEqual(second.args[0], "")
+        self.assertEqual(first.kwargs["properties"].TopicAlias, 1)
+        self.assertEqual(second.kwargs["properties"].TopicAlias, 1)
+
+    def test_qos1_gets_no_alias_and_aliases_are_limited(self):
+        handler = self._connected_handler(alias_maximum=1)
+        handler.publish({"metadata": {}}, qos=1)
+        handler.publish({"metadata": {}}, qos=1)
+        handler.publish({"metadata": {}}, topic="sensor/other")
+
+        handler.publish({"metadata": {}}, topic="sensor/third")
+
+        calls = handler.client.publish.call_args_list
+        self.assertEqual([call.args[0] for call in calls],
+                         ["sensor/data", "sensor/data", "sensor/other", "sensor/third"])
+        self.assertFalse(hasattr(calls[0].kwargs["properties"], "TopicAlias"))
+        self.assertFalse(hasattr(calls[1].kwargs["properties"], "TopicAlias"))
+        self.assertEqual(calls[2].kwargs["properties"].TopicAlias, 1)
+        self.assertFalse(hasattr(calls[3].kwargs["properties"], "TopicAlias"))
+
+    def test_metadata_and_expiry_in_properties(self):
+        handler = self._connected_handler(alias_maximum=0, message_expiry=30)
+        handler.publish({"metadata": {"camera_id": "camera_01", "motion": "slow", "sample_id": None}})
+
+        properties = handler.client.publish.call_args.kwargs["properties"]
+        self.assertEqual(properties.UserProperty, [("camera_id", "camera_01"), ("motion", "slow")])
+        self.assertEqual(properties.MessageExpiryInterval, 30)
+
+    def test_unknown_protocol_is_rejected(self):
+        with self.assertRaises(ValueError):
+            MqttHandler("localhost", 1883, "sensor/data", protocol="4")
+
+
+class FeedbackControllerTests(unittest.TestCase):
+    def _controller(self, now):
+        return FeedbackController(
+            interval_bounds=(5.0, 25.0), quality_bounds=(50, 90), scale_bounds=(0.5, 1.0),
+            queue_depth_bounds=(0, 10), smoothing=1.0, stale_after=60.0, clock=lambda: now[0],
+        )
+
+    def test_no_feedback_means_no_adjustment(self):
+        self.assertIsNone(self._controller([0.0]).adjustments())
+
+    def test_slowest_consumer_governs_within_bounds(self):
+        controller = self._controller([0.0])
+        controller.handle_feedback(b'{"consumer_id": "a", "queue_depth": 1}')
+        controller.handle_feedback(b'{"consumer_id": "b", "queue_depth": 5}')
+
+        adjustments = controller.adjustments()
+        self.assertEqual(adjustments["interval"], 15.0)
+        self.assertEqual(adjustments["quality"], 70)
+        self.assertEqual(adjustments["scale"], 0.75)
+        self.assertEqual(adjustments["consumers"], 2)
+
+        controller.handle_feedback(b'{"consumer_id": "b", "queue_depth": 500}')
+        self.assertEqual(controller.adjustments()["interval"], 25.0)
+
+    def test_desired_rate_and_stale_feedback(self):
+        now = [0.0]
+        controller = self._controller(now)
+        controller.handle_feedback({"consumer_id": "a", "desired_rate": 0.1})
+        self.assertEqual(controller.adjustments()["interval"], 10.0)
+
+        now[0] = 61.0
+        self.assertIsNone(controller.adjustments())
+
+    def test_malformed_feedback_is_ignored(self):
+        controller = self._controller([0.0])
+        controller.handle_feedback(b"not json")
+        controller.handle_feedback(b'{"desired_rate": 0}')
+        self.assertIsNone(controller.adjustments())
+
+    def test_non_finite_feedback_is_ignored(self):
+        controller = self._controller([0.0])
+        controller.handle_feedback(b'{"consumer_id": "a", "queue_depth": 5}')
+        for payload in (b'{"consumer_id": "a", "queue_depth": NaN}', b'{"consumer_id": "b", "queue_depth": Infinity}',
+                        b'{"desired_interval": Infinity}', b'{"desired_rate": NaN}'):
+            controller.handle_feedback(payload)
+
+        adjustments = controller.adjustments()
+        self.assertEqual(adjustments["quality"], 70)
+        self.assertEqual(adjustments["consumers"], 1)
+
+
+class TelemetryPublisherTests(unittest.TestCase):
+    def test_poll_publishes_reading_with_sample_id(self):
+        handler = mock.Mock()
+        telemetry = TelemetryPublisher(
+            handler,
+            read_sensor=lambda: {"temperature": 12.0},
+            build_metadata=lambda sample_id, ts: {"location": "here"},
+        )
+        sample_id = telemetry.poll()
+
+        message = handler.publish.call_args.args[0]
+        self.assertEqual(message["sensor_data"], {"temperature": 12.0})
+        self.assertEqual(message["metadata"]["sample_id"], sample_id)
+        self.assertEqual(message["metadata"]["location"], "here")
+        self.assertEqual(telemetry.latest(), ({"temperature": 12.0}, sample_id))
+
+    def test_failed_read_keeps_previous_reading(self):
+        readings = iter([{"temperature": 1.0}])
+
+        def read_sensor():
+            return next(readings)
+
+        telemetry = TelemetryPublisher(mock.Mock(), read_sensor, lambda sample_id, ts: {})
+        first = telemetry.poll()
+        self.assertIsNone(telemetry.poll())
+        self.assertEqual(telemetry.latest()[1], first)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class MqttBrokerStubTests(unittest.TestCase):
+    def _connected_handler(self, broker, **kwargs):
+        handler = MqttHandler(broker.host, broker.port, "sensor/data", **kwargs)
+        handler.connect()
+        self.addCleanup(handler.client.loop_stop)
+        self.addCleanup(handler.client.disconnect)
+        for _ in range(500):
+            if handler.client.is_connected():
+                break
+            time.sleep(0.01)
+        self.assertTrue(handler.client.is_connected())
+        return handler
+
+    def test_publishes_are_acknowledged_at_each_qos(self):
+        for protocol in ("3.1.1", "5"):
+            with self.subTest(protocol=protocol), MqttBrokerStub() as broker:
+                handler = self._connected_handler(broker, protocol=protocol, client_id=f"stub-{protocol}")
+                for qos in (0, 1, 2):
+                    ack = handler.publish_async({"image_data": "x" * 50_000, "metadata": {}}, qos=qos).result(5)
+                    self.assertEqual(ack.qos, qos)
+
+                self.assertTrue(broker.wait_for(3))
+                self.assertEqual(broker.topics["sensor/data"], 3)
+                self.assertGreater(broker.payload_bytes, 150_000)
+
+    def test_subscribe_is_answered(self):
+        with MqttBrokerStub() as broker:
+            handler = self._connected_handler(broker, client_id="stub-subscriber")
+            handler.subscribe("sensor/control", lambda payload, topic: None, qos=1)
+            for _ in range(500):
+                if broker.events["subscribe"]:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(broker.events["subscribe"], 1)
@@ -0,0 +1,40 @@
+import unittest
+
+import paho.mqtt.client as mqtt
+
+from edge_data_sender.transmission.partitioning import partition_for, partition_topic, subscription_filters
+
+
+class PartitioningTests(unittest.TestCase):
+    def test_partition_is_stable_and_in_range(self):
+        partitions = [partition_for(f"camera_{i:02d}", 4) for i in range(20)]
+        self.assertTrue(all(0 <= p < 4 for p in partitions))
+        self.assertEqual(partitions, [partition_for(f"camera_{i:02d}", 4) for i in range(20)])
+        self.assertEqual(partition_topic("sensor/data", "camera_01", 4),
+                         f"sensor/data/{partition_for('camera_01', 4)}")
+
+    def test_workers_cover_each_partition_once(self):
+        filters = subscription_filters("sensor/data", 5, 0, 2) + subscription_filters("sensor/data", 5, 1, 2)
+        self.assertEqual(
+            sorted(filters), sorted(f"sensor/data/{p}{suffix}" for p in range(5) for suffix in ("", "/chunked"))
+        )
+
+    def test_filters_match_chunked_partition_topics(self):
+        topic = partition_topic("sensor/data", "camera_01", 3)
+        filters = [f for index in range(3) for f in subscription_filters("sensor/data", 3, index, 3)]
+        for published in (topic, f"{topic}/chunked"):
+            matching = [f for f in filters if mqtt.topic_matches_sub(f, published)]
+            self.assertEqual(len(matching), 1, published)
+
+    def test_share_group_prefix(self):
+        self.assertEqual(
+            subscription_filters("sensor/data", 2, share_group="jetson"),
+            ["$share/jetson/sensor/data/0", "$share/jetson/sensor/data/0/chunked",
+             "$share/jetson/sensor/data/1", "$share/jetson/sensor/data/1/chunked"],
+        )
+        with self.assertRaises(ValueError):
+            subscription_filters("sensor/data", 2, worker_index=2, worker_count=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from edge_data_collector.preprocessing import frame_preprocessor
+from edge_data_collector.preprocessing.frame_preprocessor import FramePreprocessor
+from edge_data_collector.preprocessing.water_prefilter import WaterLikelihoodScorer
+
+
+def _gradient_frame(width=64, height=48):
+    xs = np.arange(width, dtype=np.uint8)[None, :, None]
+    ys = np.arange(height, dtype=np.uint8)[:, None, None]
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[..., 0:1] = xs
+    frame[..., 1:2] = ys
+    return frame
+
+
+class FramePreprocessorTests(unittest.TestCase):
+    def test_inactive_when_nothing_configured(self):
+        self.assertFalse(FramePreprocessor().is_active)
+
+    def test_crop_then_resize(self):
+        frame = _gradient_frame()
+        preprocessor = FramePreprocessor(roi=(8, 4, 32, 16), target_size=(16, 8))
+
+        cropped = FramePreprocessor(roi=(8, 4, 32, 16)).process(frame)
+        self.assertEqual(cropped[0, 0, 0], 8)
+        self.assertEqual(cropped[0, 0, 1], 4)
+        self.assertEqual(preprocessor.process(frame).shape, (8, 16, 3))
+
+    def test_roi_is_clipped_to_frame(self):
+        frame = _gradient_frame()
+        result = FramePreprocessor(roi=(60, 40, 100, 100)).process(frame)
+        self.assertEqual(result.shape, (8, 4, 3))
+
+    def test_zero_distortion_is_identity_within_roi(self):
+        frame = _gradient_frame()
+        matrix = [[50.0, 0.0, 32.0], [0.0, 50.0, 24.0], [0.0, 0.0, 1.0]]
+        for cv2_available in (True, False):
+            with self.subTest(cv2_available=cv2_available), \
+                    mock.patch.object(frame_preprocessor, "CV2_AVAILABLE", cv2_available and frame_preprocessor.CV2_AVAILABLE):
+                preprocessor = FramePreprocessor(
+                    roi=(4, 4, 40, 30), camera_matrix=matrix, dist_coeffs=[0, 0, 0, 0]
+                )
+                result = preprocessor.process(frame)
+                np.testing.assert_array_equal(result, frame[4:34, 4:44])
+
+    def test_remap_tables_are_persisted(self):
+        matrix = [[50.0, 0.0, 32.0], [0.0, 50.0, 24.0], [0.0, 0.0, 1.0]]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_path = os.path.join(tmpdir, "remap.npz")
+            FramePreprocessor(
+                camera_matrix=matrix, dist_coeffs=[-0.2, 0.05, 0, 0], remap_cache_path=cache_path
+            ).process(_gradient_frame())
+            self.assertTrue(os.path.exists(cache_path))
+
+            reloaded = FramePreprocessor(
+                camera_matrix=matrix, dist_coeffs=[-0.2, 0.05, 0, 0], remap_cache_path=cache_path
+            )
+            with mock.patch.object(reloaded, "_compute_undistort_maps") as compute:
+                reloaded.process(_gradient_frame())
+            compute.assert_not_called()
+
+
+class WaterLikelihoodScorerTests(unittest.TestCase):
+    def test_smooth_water_scores_above_textured_ground(self):
+        rng = np.random.default_rng(0)
+        water = np.full((360, 640, 3), (110, 105, 95), dtype=np.uint8)
+        water[250:270, 100:300] = 235  # sky reflection
+        textured = rng.integers(0, 255, size=(360, 640, 3), dtype=np.uint8)
+        textured[..., 1] = np.maximum(textured[..., 1], 120)  # grass-like green
+
+        scorer = WaterLikelihoodScorer()
+        self.assertGreater(scorer.score(water), 0.6)
+        self.assertLess(scorer.score(textured), 0.3)
+
+    def test_score_is_bounded(self):
+        scorer = WaterLikelihoodScorer()
+        for value in (0, 128, 255):
+            score = scorer.score(np.full((90, 160, 3), value, dtype=np.uint8))
+            self.assertGreaterEqual(score, 0.0)
+            self.assertLessEqual(score, 1.0)
+
+    def test_quality_interpolates_range(self):
+        self.assertEqual(WaterLikelihoodScorer.quality_for(0.0, (60, 90)), 60)
+        self.assertEqual(WaterLikelihoodScorer.quality_for(1.0, (60, 90)), 90)
+        self.assertEqual(WaterLikelihoodScorer.quality_for(None, (60, 90)), 75)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import glob
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import tracemalloc
+import unittest
+
+from edge_data_sender.monitoring.profiler import SamplingProfiler
+
+
+def _work():
+    payload = {"image_data": "x" * 200_000, "metadata": {"seq": 1}}
+    return json.dumps(payload)
+
+
+class SamplingProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+
+    def _profiler(self, **kwargs):
+        profiler = SamplingProfiler(output_dir=self.output_dir, **kwargs)
+        self.addCleanup(profiler.close)
+        return profiler
+
+    def _reports(self):
+        return sorted(glob.glob(os.path.join(self.output_dir, "profile_*.txt")))
+
+    def test_disabled_profiler_writes_nothing(self):
+        profiler = self._profiler(every=1)
+        with profiler.sample("encode"):
+            _work()
+        self.assertEqual(self._reports(), [])
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_every_nth_call_per_stage_is_profiled(self):
+        profiler = self._profiler(every=2, enabled=True)
+        for _ in range(4):
+            with profiler.sample("encode"):
+                _work()
+        with profiler.sample("publish"):
+            _work()
+
+        reports = self._reports()
+        self.assertEqual(len(reports), 2)
+        self.assertTrue(all("_encode_" in report for report in reports))
+        with open(reports[-1]) as f:
+            text = f.read()
+        self.assertIn("stage: encode  call: 4", text)
+        self.assertIn("Hot functions (cumulative)", text)
+        self.assertIn("Top allocators", text)
+        self.assertIn("Growth since the previous encode sample", text)
+        self.assertTrue(os.path.exists(reports[-1][:-len(".txt")] + ".prof"))
+
+    def test_concurrent_calls_are_all_counted(self):
+        profiler = self._profiler(every=1_000_000, enabled=True)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+        def capture():
+            for _ in range(5_000):
+                with profiler.sample("capture"):
+                    pass
+
+        threads = [threading.Thread(target=capture) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(profiler._counts["capture"], 20_000)
+
+    def test_old_reports_are_rotated(self):
+        profiler = self._profiler(every=1, max_reports=2, enabled=True)
+        for _ in range(4):
+            with profiler.sample("capture"):
+                _work()
+
+        self.assertEqual(profiler.reports_written, 4)
+        self.assertEqual(len(self._reports()), 2)
+        self.assertEqual(len(glob.glob(os.path.join(self.output_dir, "*.prof"))), 2)
+
+    def test_disabling_stops_tracemalloc(self):
+        profiler = self._profiler(every=1, enabled=True)
+        with profiler.sample("encode"):
+            _work()
+        self.assertTrue(tracemalloc.is_tracing())
+
+        profiler.disable()
+        with profiler.sample("encode"):
+            _work()
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @unittest.skipUnless(hasattr(signal, "SIGUSR1"), "SIGUSR1 not available")
+    def test_signal_toggles_profiler(self):
+        previous = signal.getsignal(signal.SIGUSR1)
+        self.addCleanup(signal.signal, signal.SIGUSR1, previous)
+        profiler = self._profiler()
+        self.assertTrue(profiler.install_signal_handler())
+
+        os.kill(os.getpid(), signal.SIGUSR1)
+        self.assertTrue(profiler.enabled)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        self.assertFalse(profiler.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from edge_data_collector.sensors.netatmo_stub import STATIONS_PATH, TOKEN_PATH, NetatmoStub
+from edge_data_collector.sensors.rolling_stats import RollingSensorStats
+from edge_data_collector.sensors.sensor_delta import SensorDeltaEncoder, SensorStateTracker
+from edge_data_collector.sensors.sensor_handler import SensorHandler
+from edge_data_collector.sensors.trace_replay import TraceSensorSource
+
+
+def _payload(temperature, camera_id="camera_01"):
+    return {
+        "sensor_data": {"temperature": temperature, "humidity": 88.0, "pressure": 995.0},
+        "metadata": {"camera_id": camera_id},
+    }
+
+
+class SensorDeltaEncoderTests(unittest.TestCase):
+    def test_unchanged_readings_are_omitted_until_keyframe(self):
+        encoder = SensorDeltaEncoder(epsilon={"temperature": 0.2}, keyframe_every=3)
+        encoded = [encoder.encode(_payload(t)) for t in (12.0, 12.1, 12.05, 12.1, 12.5)]
+
+        self.assertEqual([("sensor_data" in p) for p in encoded], [True, False, False, True, True])
+        self.assertEqual([p["metadata"]["sensor_revision"] for p in encoded], [1, 1, 1, 1, 2])
+        self.assertTrue(encoded[3]["metadata"]["sensor_keyframe"])
+
+    def test_streams_are_encoded_independently(self):
+        encoder = SensorDeltaEncoder()
+        encoder.encode(_payload(12.0, "a"))
+        self.assertIn("sensor_data", encoder.encode(_payload(12.0, "b")))
+        self.assertNotIn("sensor_data", encoder.encode(_payload(12.0, "a")))
+
+
+class SensorStateTrackerTests(unittest.TestCase):
+    def test_tracker_restores_readings(self):
+        encoder = SensorDeltaEncoder(keyframe_every=10)
+        tracker = SensorStateTracker()
+        first = tracker.update(encoder.encode(_payload(12.0)))
+        second = tracker.update(encoder.encode(_payload(12.0)))
+
+        self.assertEqual(first, second)
+        self.assertEqual(tracker.current("camera_01")["temperature"], 12.0)
+
+    def test_missed_change_is_unknown_until_keyframe(self):
+        encoder = SensorDeltaEncoder(keyframe_every=2)
+        tracker = SensorStateTracker()
+        tracker.update(encoder.encode(_payload(12.0)))
+        encoder.encode(_payload(14.0))  # lost in transit
+
+        self.assertIsNone(tracker.update(encoder.encode(_payload(14.0))))
+        self.assertEqual(tracker.update(encoder.encode(_payload(14.0)))["temperature"], 14.0)
+
+
+class RollingSensorStatsTests(unittest.TestCase):
+    def test_window_baseline_and_delta(self):
+        stats = RollingSensorStats({"short": 20, "long": 1000})
+        for second, temperature in enumerate((17.0, 17.0, 17.0, 13.0)):
+            features = stats.update({"temperature": temperature, "humidity": 78.0}, second * 10.0)
+
+        self.assertEqual(features["long"]["samples"], 4)
+        self.assertEqual(features["long"]["baseline"]["temperature"], 16.0)
+        self.assertEqual(features["long"]["delta"]["temperature"], -3.0)
+        self.assertEqual(features["short"]["samples"], 3)
+        self.assertEqual(features["short"]["span_sec"], 20.0)
+        self.assertIsNone(features["short"]["baseline"]["pressure"])
+
+    def test_capacity_evicts_oldest_reading(self):
+        stats = RollingSensorStats({"all": 1e9}, capacity=3)
+        for index, pressure in enumerate((1000.0, 990.0, 990.0, 990.0)):
+            features = stats.update({"pressure": pressure}, float(index))
+
+        self.assertEqual(features["all"]["samples"], 3)
+        self.assertEqual(features["all"]["baseline"]["pressure"], 990.0)
+
+    def test_repeated_reading_and_non_finite_values_are_not_stored(self):
+        stats = RollingSensorStats({"all": 1e9})
+        stats.update({"temperature": 10.0}, 0.0, reading_id="s1")
+        stats.update({"temperature": 10.0}, 1.0, reading_id="s1")
+        stats.update({"temperature": float("inf"), "humidity": 80.0}, 2.0, reading_id="s2")
+        features = stats.update({"temperature": 14.0}, 3.0, reading_id="s3")
+
+        self.assertEqual(features["all"]["samples"], 3)
+        self.assertEqual(features["all"]["baseline"]["temperature"], 12.0)
+        self.assertEqual(features["all"]["baseline"]["humidity"], 80.0)
+
+
+STATIONS = [
+    {"_id": "70:ee:50:00:00:01", "type": "NAMain", "dashboard_data": {"Temperature": 30.0}, "modules": []},
+    {
+        "_id": "70:ee:50:b9:07:c2",
+        "type": "NAMain",
+        "dashboard_data": {"Temperature": 21.5, "Humidity": 55, "Pressure": 1012.4, "CO2": 600, "time_utc": 100},
+        "modules": [
+            {"_id": "02:00:00:b9:1c:18", "type": "NAModule1",
+             "dashboard_data": {"Temperature": 9.8, "Humidity": 91, "time_utc": 90}},
+            {"_id": "05:00:00:00:00:01", "type": "NAModule3",
+             "dashboard_data": {"Rain": 0.2, "sum_rain_1": 1.1, "sum_rain_24": 14.0, "time_utc": 95}},
+        ],
+    },
+]
+
+
+def _response(devices, status_code=200):
+    response = mock.Mock(status_code=status_code, text="")
+    response.json.return_value = {"body": {"devices": devices}}
+    return response
+
+
+class SensorHandlerTests(unittest.TestCase):
+    def _handler(self, **kwargs):
+        return SensorHandler(
+            sensor_id=kwargs.pop("sensor_id", "70:ee:50:b9:07:c2"), client_id="id", client_secret="secret",
+            redirect_uri="https://example.com", access_token="token", simulate_sensor=False, **kwargs
+        )
+
+    @mock.patch("edge_data_collector.sensors.sensor_handler.config.SIMULATE_SENSOR_DATA", False)
+    @mock.patch("edge_data_collector.sensors.sensor_handler.requests.get")
+    def test_configured_station_modules_are_read_in_one_call(self, get):
+        get.return_value = _response(STATIONS)
+        handler = self._handler()
+        reading = handler.read_sensor_data()
+
+        self.assertEqual(reading["temperature"], 21.5)
+        self.assertEqual(reading["modules"]["outdoor"]["temperature"], 9.8)
+        self.assertEqual(reading["modules"]["rain"]["rain_24h"], 14.0)
+        self.assertEqual(get.call_count, 1)
+
+        handler.read_sensor_data()
+        self.assertEqual(get.call_args.kwargs["params"], {"device_id": "70:ee:50:b9:07:c2"})
+
+    def test_unknown_module_is_rejected(self):
+        handler = self._handler(outdoor_sensor_id="02:00:00:ff:ff:ff")
+        with self.assertRaises(ValueError):
+            handler.resolve_modules(STATIONS)
+
+    def test_offline_module_is_reported_as_none(self):
+        handler = self._handler(sensor_id="02:00:00:b9:1c:18")
+        devices = [dict(STATIONS[1], modules=[dict(STATIONS[1]["modules"][0], dashboard_data=None)])]
+        module_map = handler.resolve_modules(devices)
+
+        self.assertEqual(module_map["station"], "70:ee:50:b9:07:c2")
+        self.assertIsNone(module_map["rain"])
+        self.assertIsNone(SensorHandler.parse_reading(devices, module_map)["modules"]["outdoor"])
+
+
+@mock.patch("edge_data_collector.sensors.sensor_handler.set_key")
+@mock.patch("edge_data_collector.sensors.sensor_handler.config.SIMULATE_SENSOR_DATA", False)
+class NetatmoStubTests(unittest.TestCase):
+    def _stub(self, **kwargs):
+        stub = NetatmoStub(**kwargs).start()
+        self.addCleanup(stub.stop)
+        return stub
+
+    def _handler(self, stub):
+        return SensorHandler(
+            sensor_id="70:ee:50:b9:07:c2", client_id="id", client_secret="secret",
+            redirect_uri="https://example.com", access_token=stub.access_token,
+            refresh_token=stub.refresh_token, base_url=stub.url + "/", request_timeout=5.0,
+        )
+
+    def test_reads_station_over_http(self, set_key):
+        stub = self._stub()
+        handler = self._handler(stub)
+
+        self.assertEqual(handler.read_sensor_data()["modules"]["outdoor"]["temperature"], 9.8)
+        self.assertEqual(handler.read_sensor_data()["modules"]["rain"]["rain_24h"], 14.0)
+        self.assertEqual(stub.counts[(STATIONS_PATH, 200)], 2)
+
+    def test_expired_token_is_refreshed_and_request_retried(self, set_key):
+        stub = self._stub()
+        handler = self._handler(stub)
+        stub.expire_tokens()
+
+        self.assertEqual(handler.read_sensor_data()["temperature"], 21.5)
+        self.assertEqual([status for _, _, status in stub.requests], [403, 200, 200])
+        self.assertEqual(handler.access_token, "stub-access-1")
+        self.assertEqual(handler.refresh_token, stub.refresh_token)
+
+    def test_response_body_is_logged_once_and_only_at_debug(self, set_key):
+        stub = self._stub()
+        handler = self._handler(stub)
+        stub.expire_tokens()
+
+        with self.assertLogs("edge_data_collector.sensors.sensor_handler", "DEBUG") as logs:
+            handler.read_sensor_data()
+        bodies = [line for line in logs.output if "Sensor data response" in line]
+        self.assertEqual(len(bodies), 1)
+        self.assertTrue(bodies[0].startswith("DEBUG:"))
+
+    def test_scripted_401_and_rate_limit(self, set_key):
+        stub = self._stub(rate_limit=3, rate_window=60.0)
+        handler = self._handler(stub)
+        stub.fail_next(STATIONS_PATH, 401)
+
+        handler.read_sensor_data()  # 401, refresh, retry
+        self.assertEqual(stub.counts[(TOKEN_PATH, 200)], 1)
+        with self.assertRaises(Exception):
+            handler.read_sensor_data()
+        self.assertEqual(stub.counts[(STATIONS_PATH, 429)], 1)
+
+    def test_revoked_refresh_token_requires_reauthentication(self, set_key):
+        stub = self._stub()
+        handler = self._handler(stub)
+        handler.access_token = None
+        handler.refresh_token = "revoked"
+
+        with mock.patch.object(handler, "reauthenticate") as reauthenticate:
+            handler.refresh_access_token()
+        reauthenticate.assert_called_once()
+        self.assertEqual(stub.counts[(TOKEN_PATH, 400)], 1)
+
+
+class TraceSensorSourceTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as trace:
+            trace.write(content)
+        return path
+
+    def _csv(self):
+        return self._write("trace.csv", "timestamp,temperature,humidity,pressure\n"
+                                        "1000,10.0,80,1000\n"
+                                        "1010,12.0,,1002\n"
+                                        "1005,11.0,90,1001\n")
+
+    def test_interpolates_between_sorted_readings(self):
+        source = TraceSensorSource(self._csv())
+
+        self.assertEqual(source.duration, 10.0)
+        self.assertEqual(source.read_sensor_data(2.5), {"temperature": 10.5, "humidity": 85.0, "pressure": 1000.5})
+        # The humidity gap holds the previous value.
+        self.assertEqual(source.read_sensor_data(7.5)["humidity"], 90.0)
+
+    def test_hold_mode_and_clamping(self):
+        source = TraceSensorSource(self._csv(), interpolate=False, offset=1.0)
+
+        self.assertEqual(source.read_sensor_data(3.5)["temperature"], 10.0)
+        self.assertEqual(source.read_sensor_data(-5.0)["temperature"], 10.0)
+        self.assertEqual(source.read_sensor_data(60.0), {"temperature": 12.0, "humidity": None, "pressure": 1002.0})
+
+    def test_reads_captured_payloads_from_ndjson(self):
+        lines = [
+            {"sensor_data": {"temperature": 14.0}, "metadata": {"collector_capture_ts": 1700000000.0}},
+            "not json",
+            {"sensor_data": {"temperature": 16.0}, "metadata": {"collector_capture_ts": 1700000004.0}},
+        ]
+        path = self._write("trace.ndjson", "\n".join(
+            line if isinstance(line, str) else json.dumps(line) for line in lines))
+        source = TraceSensorSource(path)
+
+        self.assertEqual(source.read_sensor_data(1.0), {"temperature": 14.5, "humidity": None, "pressure": None})
+
+    def test_empty_trace_is_rejected(self):
+        with self.assertRaises(ValueError):
+            TraceSensorSource(self._write("empty.ndjson", "\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
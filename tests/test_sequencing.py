@@ -0,0 +1,68 @@
+import unittest
+
+from edge_data_collector.metadata.sequencing import SequenceLossTracker, StreamSequencer
+
+
+def _payload(seq, camera_id="cam", session_id="s1"):
+    return {"metadata": {"seq": seq, "camera_id": camera_id, "session_id": session_id}}
+
+
+class StreamSequencerTests(unittest.TestCase):
+    def test_each_camera_counts_from_one(self):
+        sequencer = StreamSequencer(session_id="boot")
+        stamped = [sequencer.stamp({"camera_id": camera}) for camera in ("a", "b", "a", "a")]
+
+        self.assertEqual([m["seq"] for m in stamped], [1, 1, 2, 3])
+        self.assertEqual({m["session_id"] for m in stamped}, {"boot"})
+
+    def test_sessions_differ_between_runs(self):
+        self.assertNotEqual(StreamSequencer().session_id, StreamSequencer().session_id)
+
+
+class SequenceLossTrackerTests(unittest.TestCase):
+    def test_loss_reorder_and_gaps(self):
+        tracker = SequenceLossTracker()
+        results = [tracker.update(_payload(seq)) for seq in (1, 2, 5, 4, 6, 6, 10)]
+
+        self.assertEqual(results, ["new", "in_order", "gap", "reordered", "in_order", "duplicate", "gap"])
+        report = tracker.report()["s1/cam"]
+        self.assertEqual(report["expected"], 10)
+        self.assertEqual(report["received"], 6)
+        self.assertEqual(report["lost"], 4)  # 3, 7, 8, 9
+        self.assertEqual(report["loss_rate"], 0.4)
+        self.assertEqual(report["reordered"], 1)
+        self.assertEqual(report["duplicates"], 1)
+        self.assertEqual(report["gaps"], {2: 1, 3: 1})
+        self.assertEqual(report["max_gap"], 3)
+
+    def test_new_session_starts_a_new_stream(self):
+        tracker = SequenceLossTracker()
+        tracker.update(_payload(40))
+        self.assertEqual(tracker.update(_payload(1, session_id="s2")), "new")
+        tracker.update({"metadata": {}})
+
+        self.assertEqual(set(tracker.report()), {"s1/cam", "s2/cam"})
+        self.assertEqual(tracker.unsequenced, 1)
+
+    def test_old_gaps_expire_as_lost(self):
+        tracker = SequenceLossTracker(reorder_window=5)
+        for seq in (1, 3, 20):
+            tracker.update(_payload(seq))
+
+        self.assertEqual(tracker.update(_payload(2)), "late")
+        self.assertEqual(tracker.report()["s1/cam"]["lost"], 17)
+        self.assertEqual(tracker.report()["s1/cam"]["late"], 1)
+
+    def test_large_jump_keeps_memory_bounded(self):
+        tracker = SequenceLossTracker(reorder_window=100)
+        tracker.update(_payload(1))
+        self.assertEqual(tracker.update(_payload(10_000_000)), "gap")
+
+        self.assertEqual(len(tracker._streams[("s1", "cam")].missing), 100)
+        self.assertEqual(tracker.report()["s1/cam"]["lost"], 10_000_000 - 2)
+        self.assertEqual(tracker.update(_payload(9_999_950)), "reordered")
+        self.assertEqual(tracker.update(_payload(5)), "late")
+
+
+if __name__ == "__main__":
+    unittest.main()
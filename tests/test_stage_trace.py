@@ -0,0 +1,57 @@
+import unittest
+
+from edge_data_collector.metadata.stage_trace import LatencySummary, StageTrace
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StageTraceTests(unittest.TestCase):
+    def test_stages_are_reported_in_ms_in_order(self):
+        clock = FakeClock()
+        trace = StageTrace(clock=clock)
+        trace.add("capture", 0.0412)
+        with trace.stage("sensor"):
+            clock.now += 0.18
+        with trace.stage("sensor"):
+            clock.now += 0.02
+
+        self.assertEqual(trace.as_metadata(), {"capture": 41.2, "sensor": 200.0})
+
+    def test_stage_is_recorded_when_block_raises(self):
+        trace = StageTrace()
+        with self.assertRaises(RuntimeError):
+            with trace.stage("format"):
+                raise RuntimeError("encode failed")
+        self.assertIn("format", trace.stages)
+
+
+class LatencySummaryTests(unittest.TestCase):
+    def test_percentiles_per_stage_and_total(self):
+        summary = LatencySummary(window=100)
+        for value in range(1, 101):
+            summary.record({"capture": float(value), "publish": 1.0})
+
+        stats = summary.summary()
+        self.assertEqual(stats["capture"]["count"], 100)
+        self.assertEqual(stats["capture"]["p50"], 50.5)
+        self.assertEqual(stats["capture"]["max"], 100.0)
+        self.assertEqual(stats["total"]["max"], 101.0)
+        self.assertIn("publish", summary.format())
+
+    def test_window_keeps_latest_samples(self):
+        summary = LatencySummary(window=2)
+        for value in (100.0, 1.0, 2.0):
+            summary.record({"sensor": value})
+
+        self.assertEqual(summary.count, 3)
+        self.assertEqual(summary.summary()["sensor"]["max"], 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Train the shared dictionary used to compress non-image MQTT payloads.
+
+Input archives are captured messages, e.g. recorded with
+``mosquitto_sub -t 'sensor/#' > capture.jsonl``:
+- *.json             : one message per file
+- *.jsonl / *.ndjson : one message per line (optionally gzip-compressed, *.gz)
+
+Directories are searched recursively. ``image_data`` is removed from every
+message so the dictionary captures the metadata and sensor structure. Point
+COMPRESSION_DICTIONARY_PATH in config.py at the output file and give consumers
+the same file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import statistics
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from edge_data_sender.transmission.compression import PayloadCompressor, train_dictionary
+
+ARCHIVE_SUFFIXES = (".json", ".jsonl", ".ndjson")
+
+
+def archive_files(paths: Iterable[Path]) -> Iterator[Path]:
+    """Yield archive files from the given files and directories."""
+    for path in paths:
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                if child.is_file() and child.name.removesuffix(".gz").endswith(ARCHIVE_SUFFIXES):
+                    yield child
+        elif path.is_file():
+            yield path
+        else:
+            print(f"[skip] {path} (missing)")
+
+
+def read_messages(path: Path) -> Iterator[dict]:
+    """Yield the JSON messages stored in one archive file."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as archive:
+        if path.name.removesuffix(".gz").endswith(".json"):
+            yield json.load(archive)
+            return
+        for line in archive:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def collect_samples(paths: Iterable[Path]) -> List[bytes]:
+    """Serialize captured messages without image data, as the sender would."""
+    samples = []
+    for path in archive_files(paths):
+        for message in read_messages(path):
+            if isinstance(message, dict):
+                message.pop("image_data", None)
+                samples.append(json.dumps(message).encode("utf-8"))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Train a compression dictionary from captured MQTT payload archives."
+    )
+    parser.add_argument("inputs", nargs="+", type=Path, help="Archive files or directories.")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Dictionary file to write.")
+    parser.add_argument("--codec", choices=("zlib", "zstd"), default="zlib", help="Target codec.")
+    parser.add_argument("--size", type=int, default=16 * 1024, help="Maximum dictionary size in bytes.")
+    args = parser.parse_args()
+
+    samples = collect_samples(args.inputs)
+    if not samples:
+        parser.error("no messages found in the given inputs")
+
+    dictionary = train_dictionary(samples, size=args.size, codec=args.codec)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_bytes(dictionary)
+
+    plain = PayloadCompressor(codec=args.codec, min_size=0)
+    trained = PayloadCompressor(codec=args.codec, dictionary=dictionary, min_size=0)
+    raw_size = statistics.mean(len(sample) for sample in samples)
+    plain_size = statistics.mean(len(plain.compress(sample)) for sample in samples)
+    trained_size = statistics.mean(len(trained.compress(sample)) for sample in samples)
+    print(f"[done] Wrote {len(dictionary)} byte {args.codec} dictionary to {args.output}")
+    print(f"       {len(samples)} message(s), mean size: raw {raw_size:.0f} B | "
+          f"no dictionary {plain_size:.0f} B | dictionary {trained_size:.0f} B")
+
+
+if __name__ == "__main__":
+    main()